@@ -5,15 +5,18 @@ use crate::tracing::Tracer;
 use std::ffi::OsStr;
 use std::fs::File;
 use std::io::BufWriter;
+use std::net::TcpListener;
 use std::num::NonZeroUsize;
 use std::path::Path;
 use std::path::PathBuf;
 use std::process::exit;
+use std::time::Duration;
 
 use clap::Parser;
 use tket::optimiser::badger::log::BadgerLogger;
-use tket::optimiser::badger::BadgerOptions;
-use tket::optimiser::{BadgerOptimiser, ECCBadgerOptimiser};
+use tket::optimiser::badger::{BadgerCheckpoint, BadgerOptions, CheckpointOptions};
+use tket::optimiser::{BadgerOptimiser, ECCBadgerOptimiser, StopSignal};
+use tket::passes::SplitStrategy;
 use tket::serialize::pytket::{DecodeOptions, EncodeOptions};
 use tket::serialize::{load_tk1_json_file, save_tk1_json_file};
 
@@ -37,9 +40,10 @@ struct CmdLineArgs {
         short,
         long,
         value_name = "FILE",
+        required_unless_present = "connect",
         help = "Input. A quantum circuit in TK1 JSON format."
     )]
-    input: PathBuf,
+    input: Option<PathBuf>,
     /// Output circuit file
     #[arg(
         short,
@@ -104,6 +108,20 @@ struct CmdLineArgs {
         help = "Split the circuit into chunks and optimize each one in a separate thread. Use `-j` to specify the number of threads to use."
     )]
     split_circ: bool,
+    /// Choose the chunk boundaries to minimise the wires cut between chunks.
+    #[arg(
+        long = "min-boundary-split",
+        help = "When splitting the circuit, choose the chunk boundaries to minimise the number of wires between chunks, instead of cutting greedily."
+    )]
+    min_boundary_split: bool,
+    /// Halo size for split circuits.
+    #[arg(
+        long = "split-halo",
+        default_value = "0",
+        value_name = "HALO",
+        help = "When splitting the circuit, optimise in two phases on alternating chunks extended by HALO gates into their neighbours. Defaults to 0, which disables the halo."
+    )]
+    split_halo: usize,
     /// Max queue size.
     #[arg(
         short = 'q',
@@ -119,12 +137,48 @@ struct CmdLineArgs {
         help = "Trace each rewrite applied to the circuit. Prints statistics for the best circuit at the end of the optimisation."
     )]
     rewrite_tracing: bool,
+    /// Checkpoint file for the search state.
+    #[arg(
+        long,
+        value_name = "CHECKPOINT_FILE",
+        help = "Periodically save the search state to this file. Only supported on a single thread."
+    )]
+    checkpoint: Option<PathBuf>,
+    /// Time in seconds between checkpoints.
+    #[arg(
+        long = "checkpoint-interval",
+        default_value = "60",
+        value_name = "SECONDS",
+        help = "Time in seconds between checkpoints. Defaults to 60."
+    )]
+    checkpoint_interval: u64,
+    /// Resume from the checkpoint file.
+    #[arg(
+        long,
+        requires = "checkpoint",
+        help = "Resume the optimisation from the checkpoint file, if it exists. Requires `--checkpoint`."
+    )]
+    resume: bool,
+    /// Coordinate a distributed optimisation.
+    #[arg(
+        long,
+        value_name = "ADDRESS",
+        conflicts_with_all = ["connect", "checkpoint"],
+        help = "Coordinate a distributed optimisation, waiting for workers on this address (e.g. `0.0.0.0:7000`). Workers are started with `--connect`."
+    )]
+    listen: Option<String>,
+    /// Run as a worker of a distributed optimisation.
+    #[arg(
+        long,
+        value_name = "ADDRESS",
+        help = "Run as a worker for the coordinator at this address. The worker must use the same ECC file as the coordinator."
+    )]
+    connect: Option<String>,
 }
 
 fn main() -> Result<(), Box<dyn std::error::Error>> {
     let opts = CmdLineArgs::parse();
 
-    let input_path = Path::new(&opts.input);
     let output_path = Path::new(&opts.output);
     let ecc_path = Path::new(&opts.eccs);
 
@@ -144,14 +198,6 @@ fn main() -> Result<(), Box<dyn std::error::Error>> {
 
     let badger_logger = BadgerLogger::new(circ_candidates_csv);
 
-    let mut circ = load_tk1_json_file(
-        input_path,
-        DecodeOptions::new().with_config(tket_qsystem::pytket::qsystem_decoder_config()),
-    )?;
-    if opts.rewrite_tracing {
-        circ.enable_rewrite_tracing();
-    }
-
     print!("Loading optimiser...");
     let load_ecc_start = std::time::Instant::now();
     let Ok(optimiser) = load_optimiser(ecc_path) else {
@@ -161,6 +207,22 @@ fn main() -> Result<(), Box<dyn std::error::Error>> {
     };
     println!(" done in {:?}", load_ecc_start.elapsed());
 
+    if let Some(addr) = opts.connect {
+        println!("Processing circuits for the coordinator at {addr}...");
+        optimiser.run_distributed_worker(addr)?;
+        println!("Done.");
+        return Ok(());
+    }
+
+    let input_path = opts.input.expect("required unless running as a worker");
+    let mut circ = load_tk1_json_file(
+        input_path,
+        DecodeOptions::new().with_config(tket_qsystem::pytket::qsystem_decoder_config()),
+    )?;
+    if opts.rewrite_tracing {
+        circ.enable_rewrite_tracing();
+    }
+
     println!(
         "Using {n_threads} threads. Queue size is {}.",
         opts.queue_size
@@ -170,19 +232,56 @@ fn main() -> Result<(), Box<dyn std::error::Error>> {
         println!("Splitting circuit into {n_threads} chunks.");
     }
 
-    println!("Optimising...");
-    let opt_circ = optimiser.optimise_with_log(
-        &circ,
-        badger_logger,
-        BadgerOptions {
-            timeout: opts.timeout,
-            progress_timeout: opts.progress_timeout,
-            n_threads,
-            split_circuit: opts.split_circ,
-            queue_size: opts.queue_size,
-            max_circuit_count: opts.max_circuit_count,
+    let options = BadgerOptions {
+        timeout: opts.timeout,
+        progress_timeout: opts.progress_timeout,
+        n_threads,
+        split_circuit: opts.split_circ,
+        split_strategy: if opts.min_boundary_split {
+            SplitStrategy::MinBoundary
+        } else {
+            SplitStrategy::Greedy
         },
-    );
+        split_shift: false,
+        split_halo: opts.split_halo,
+        queue_size: opts.queue_size,
+        max_circuit_count: opts.max_circuit_count,
+    };
+    let checkpoint_opts = opts.checkpoint.map(|path| {
+        CheckpointOptions::new(path).with_interval(Duration::from_secs(opts.checkpoint_interval))
+    });
+
+    let opt_circ = match &checkpoint_opts {
+        _ if opts.listen.is_some() => {
+            let addr = opts.listen.as_deref().unwrap();
+            let listener = TcpListener::bind(addr)?;
+            println!(
+                "Optimising, waiting for workers on {}...",
+                listener.local_addr()?
+            );
+            optimiser.optimise_distributed(
+                &circ,
+                listener,
+                badger_logger,
+                options,
+                &StopSignal::new(),
+            )?
+        }
+        Some(ckpt) if opts.resume && ckpt.path.exists() => {
+            println!("Resuming from checkpoint {:?}...", ckpt.path);
+            let checkpoint = BadgerCheckpoint::load(&ckpt.path)?;
+            checkpoint.check_input(&circ)?;
+            optimiser.resume_from_checkpoint(&checkpoint, badger_logger, options, Some(ckpt))
+        }
+        Some(ckpt) => {
+            println!("Optimising, saving checkpoints to {:?}...", ckpt.path);
+            optimiser.optimise_with_checkpoints(&circ, badger_logger, options, ckpt)
+        }
+        None => {
+            println!("Optimising...");
+            optimiser.optimise_with_log(&circ, badger_logger, options)
+        }
+    };
 
     println!("Saving result");
     save_tk1_json_file(
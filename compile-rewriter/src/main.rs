@@ -32,6 +32,12 @@ struct CmdLineArgs {
         help = "Sets the output file or folder. Defaults to \"matcher.rwr\" if no file name is provided. The extension of the file name will always be set or amended to be `.rwr`."
     )]
     output: String,
+    /// Use the memory-mappable format
+    #[arg(
+        long,
+        help = "Save the rewriter uncompressed, in a format that is memory-mapped when loaded. Larger files, but much faster to load."
+    )]
+    mapped: bool,
 }
 
 fn main() {
@@ -58,7 +64,11 @@ fn main() {
         output_path.to_path_buf()
     };
     let write_time = Instant::now();
-    let output_file = rewriter.save_binary(output_file).unwrap();
+    let output_file = if opts.mapped {
+        rewriter.save_mapped(output_file).unwrap()
+    } else {
+        rewriter.save_binary(output_file).unwrap()
+    };
     println!(" done in {:?}", write_time.elapsed());
 
     println!("Written rewriter to {output_file:?}");
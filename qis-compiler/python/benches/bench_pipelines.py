@@ -0,0 +1,40 @@
+"""Benchmarks of the compile time and code size of the LLVM pipelines.
+
+Each benchmark records the size of the produced bitcode in its `extra_info`,
+which is included in the `--benchmark-json` output alongside the timings. Use
+`just bench-qis` to run them.
+"""
+
+from pathlib import Path
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+from selene_hugr_qis_compiler import compile_to_bitcode
+
+resources_dir = Path(__file__).parent.parent / "tests" / "resources"
+
+PROGRAMS = [
+    "rus",
+    "flip_some",
+    "print_array",
+    "measure_qb_array",
+    "discard_qb_array",
+    "rng",
+]
+
+PIPELINES = {
+    "O0": "default<O0>",
+    "O1": "default<O1>",
+    "O2": "default<O2>",
+    "O3": "default<O3>",
+    # A cheap cleanup, for programs too large for the default pipelines.
+    "cleanup": "function(mem2reg,instcombine,simplifycfg)",
+}
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+@pytest.mark.parametrize("pipeline", list(PIPELINES))
+def test_pipeline(benchmark: BenchmarkFixture, program: str, pipeline: str) -> None:
+    pkg = (resources_dir / f"{program}.hugr").read_bytes()
+    bitcode = benchmark(compile_to_bitcode, pkg, pipeline=PIPELINES[pipeline])
+    benchmark.extra_info["bitcode_size"] = len(bitcode)
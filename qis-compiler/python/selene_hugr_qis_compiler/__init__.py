@@ -1,11 +1,22 @@
+from .cache import CompilationCache
 from .selene_hugr_qis_compiler import (
     HugrReadError,
     check_hugr,
+    compile_many,
     compile_to_bitcode,
     compile_to_llvm_ir,
+    resolve_target,
 )
 
-__all__ = ["compile_to_bitcode", "compile_to_llvm_ir", "check_hugr", "HugrReadError"]
+__all__ = [
+    "compile_to_bitcode",
+    "compile_to_llvm_ir",
+    "compile_many",
+    "check_hugr",
+    "resolve_target",
+    "CompilationCache",
+    "HugrReadError",
+]
 
 # This is updated by our release-please workflow, triggered by this
 # annotation: x-release-please-version
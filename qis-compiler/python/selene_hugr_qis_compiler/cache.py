@@ -0,0 +1,225 @@
+"""A persistent cache of compiled LLVM bitcode."""
+
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from os import PathLike
+from pathlib import Path
+
+from .selene_hugr_qis_compiler import compile_many, compile_to_bitcode, resolve_target
+
+# Suffix of the cached bitcode files.
+_SUFFIX = ".bc"
+
+
+class CompilationCache:
+    """A content-addressed cache of LLVM bitcode, stored in a directory.
+
+    Entries are keyed by a hash of the HUGR envelope, the optimisation level
+    and pass pipeline options, the target and the compiler version. The
+    `"native"` target is resolved to the triple, CPU name and CPU features of
+    the current machine, so a directory shared between different machines
+    never returns bitcode built for another CPU. When the bitcode stored in the
+    directory exceeds `max_size` bytes, the least recently used entries are
+    evicted. The size of the directory is tracked as entries are added, and the
+    directory is only scanned when it may exceed `max_size`.
+
+    Entries are written atomically, so a directory can be shared by several
+    processes. The same package may be compiled more than once if it is
+    requested concurrently.
+    """
+
+    def __init__(self, directory: str | PathLike[str], max_size: int = 1 << 30) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        # An upper bound on the size of the bitcode stored in the directory,
+        # or `None` until the directory is first scanned.
+        self._size: int | None = None
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        """The number of lookups answered from the cache."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """The number of lookups that required a compilation."""
+        return self._misses
+
+    @staticmethod
+    def key(
+        pkg_bytes: bytes,
+        opt_level: int = 2,
+        target_triple: str = "native",
+        pipeline: str | None = None,
+        large_function_threshold: int | None = None,
+        large_function_pipeline: str = "default<O1>",
+    ) -> str:
+        """The cache key of a compilation."""
+        from . import __version__
+
+        digest = hashlib.sha256()
+        config = json.dumps(
+            [
+                __version__,
+                opt_level,
+                *_resolve_target(target_triple),
+                pipeline,
+                large_function_threshold,
+                large_function_pipeline,
+            ]
+        )
+        digest.update(config.encode())
+        digest.update(pkg_bytes)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached bitcode for a key, if any."""
+        path = self.directory / f"{key}{_SUFFIX}"
+        try:
+            bitcode = path.read_bytes()
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+        # Mark the entry as recently used.
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        self._count(hit=True)
+        return bitcode
+
+    def put(self, key: str, bitcode: bytes) -> None:
+        """Store the bitcode for a key, evicting old entries if needed."""
+        # Write to a temporary file first, so that concurrent readers never see
+        # partial bitcode.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(bitcode)
+            os.replace(tmp, self.directory / f"{key}{_SUFFIX}")
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        with self._lock:
+            if self._size is not None:
+                self._size += len(bitcode)
+            full = self._size is None or self._size > self.max_size
+        if full:
+            self._evict()
+
+    def compile_to_bitcode(
+        self,
+        pkg_bytes: bytes,
+        opt_level: int = 2,
+        target_triple: str = "native",
+        pipeline: str | None = None,
+        large_function_threshold: int | None = None,
+        large_function_pipeline: str = "default<O1>",
+    ) -> bytes:
+        """Compile serialized HUGR to LLVM IR bitcode, reusing cached results.
+
+        The optimisation pipeline options are described in
+        :func:`compile_to_bitcode`.
+        """
+        options = (pipeline, large_function_threshold, large_function_pipeline)
+        key = self.key(pkg_bytes, opt_level, target_triple, *options)
+        bitcode = self.get(key)
+        if bitcode is None:
+            bitcode = compile_to_bitcode(
+                pkg_bytes,
+                opt_level,
+                target_triple,
+                pipeline=pipeline,
+                large_function_threshold=large_function_threshold,
+                large_function_pipeline=large_function_pipeline,
+            )
+            self.put(key, bitcode)
+        return bitcode
+
+    def compile_many(
+        self,
+        pkgs: list[bytes],
+        opt_level: int = 2,
+        target_triple: str = "native",
+        n_threads: int | None = None,
+        pipeline: str | None = None,
+        large_function_threshold: int | None = None,
+        large_function_pipeline: str = "default<O1>",
+    ) -> list[bytes | Exception]:
+        """Compile serialized HUGRs to LLVM IR bitcode in parallel, reusing
+        cached results.
+
+        Only the packages missing from the cache are compiled. Failures are
+        returned as exceptions, and not cached.
+        """
+        options = (pipeline, large_function_threshold, large_function_pipeline)
+        keys = [self.key(pkg, opt_level, target_triple, *options) for pkg in pkgs]
+        cached = [self.get(key) for key in keys]
+        missing = [i for i, bitcode in enumerate(cached) if bitcode is None]
+        compiled: dict[int, bytes | Exception] = {}
+        if missing:
+            results = compile_many(
+                [pkgs[i] for i in missing],
+                opt_level,
+                target_triple,
+                n_threads,
+                pipeline=pipeline,
+                large_function_threshold=large_function_threshold,
+                large_function_pipeline=large_function_pipeline,
+            )
+            for i, result in zip(missing, results, strict=True):
+                if isinstance(result, bytes):
+                    self.put(keys[i], result)
+                compiled[i] = result
+        return [
+            compiled[i] if bitcode is None else bitcode
+            for i, bitcode in enumerate(cached)
+        ]
+
+    def clear(self) -> None:
+        """Remove all the entries in the cache directory."""
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._size = 0
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in
+        `max_size` bytes."""
+        entries = []
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Evicted by another process.
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._size = total
+
+
+@functools.cache
+def _resolve_target(target_triple: str) -> tuple[str, str, str]:
+    """Resolve a target triple once per process."""
+    return resolve_target(target_triple)
@@ -1,9 +1,111 @@
-def compile_to_bitcode(pkg_bytes: bytes, opt_level: int = 2) -> bytes:
-    """Compile serialized HUGR to LLVM IR bitcode"""
+from typing import Any, Literal, overload
+
+@overload
+def compile_to_bitcode(
+    pkg_bytes: bytes,
+    opt_level: int = 2,
+    target_triple: str = "native",
+    profile: Literal[False] = False,
+    pipeline: str | None = None,
+    large_function_threshold: int | None = None,
+    large_function_pipeline: str = "default<O1>",
+) -> bytes: ...
+@overload
+def compile_to_bitcode(
+    pkg_bytes: bytes,
+    opt_level: int = 2,
+    target_triple: str = "native",
+    *,
+    profile: Literal[True],
+    pipeline: str | None = None,
+    large_function_threshold: int | None = None,
+    large_function_pipeline: str = "default<O1>",
+) -> tuple[bytes, dict[str, Any]]: ...
+def compile_to_bitcode(
+    pkg_bytes: bytes,
+    opt_level: int = 2,
+    target_triple: str = "native",
+    profile: bool = False,
+    pipeline: str | None = None,
+    large_function_threshold: int | None = None,
+    large_function_pipeline: str = "default<O1>",
+) -> bytes | tuple[bytes, dict[str, Any]]:
+    """Compile serialized HUGR to LLVM IR bitcode
+
+    The module is optimised with the LLVM pass `pipeline` if given, in the
+    syntax of LLVM's new pass manager (e.g. `"default<O2>"`), or with the
+    default pipeline of `opt_level` otherwise. If any function has more than
+    `large_function_threshold` instructions, the cheaper
+    `large_function_pipeline` is run instead.
+
+    If `profile` is set, also returns a dictionary with the wall time in
+    seconds of each phase under `"phases"`, the number of HUGR nodes before
+    and after lowering and of LLVM instructions before and after optimisation,
+    and the pass pipeline that was run.
+    """
+    ...
+
+@overload
+def compile_to_llvm_ir(
+    pkg_bytes: bytes,
+    opt_level: int = 2,
+    target_triple: str = "native",
+    profile: Literal[False] = False,
+    pipeline: str | None = None,
+    large_function_threshold: int | None = None,
+    large_function_pipeline: str = "default<O1>",
+) -> str: ...
+@overload
+def compile_to_llvm_ir(
+    pkg_bytes: bytes,
+    opt_level: int = 2,
+    target_triple: str = "native",
+    *,
+    profile: Literal[True],
+    pipeline: str | None = None,
+    large_function_threshold: int | None = None,
+    large_function_pipeline: str = "default<O1>",
+) -> tuple[str, dict[str, Any]]: ...
+def compile_to_llvm_ir(
+    pkg_bytes: bytes,
+    opt_level: int = 2,
+    target_triple: str = "native",
+    profile: bool = False,
+    pipeline: str | None = None,
+    large_function_threshold: int | None = None,
+    large_function_pipeline: str = "default<O1>",
+) -> str | tuple[str, dict[str, Any]]:
+    """Compile serialized HUGR to LLVM IR string
+
+    The optimisation pipeline and the profile returned when `profile` is set
+    are described in `compile_to_bitcode`.
+    """
     ...
 
-def compile_to_llvm_ir(pkg_bytes: bytes, opt_level: int = 2) -> str:
-    """Compile serialized HUGR to LLVM IR string"""
+def compile_many(
+    pkgs: list[bytes],
+    opt_level: int = 2,
+    target_triple: str = "native",
+    n_threads: int | None = None,
+    pipeline: str | None = None,
+    large_function_threshold: int | None = None,
+    large_function_pipeline: str = "default<O1>",
+) -> list[bytes | Exception]:
+    """Compile serialized HUGRs to LLVM IR bitcode in parallel.
+
+    Returns one item per package, in input order: either the bitcode, or the
+    exception raised when compiling that package. The optimisation pipeline
+    options are described in `compile_to_bitcode`.
+    """
+    ...
+
+def resolve_target(target_triple: str = "native") -> tuple[str, str, str]:
+    """Resolve a target triple to the triple, CPU name and CPU features that
+    code is generated for.
+
+    `"native"` is resolved to the current platform. Other triples are returned
+    with an empty CPU name and features.
+    """
     ...
 
 def check_hugr(pkg_bytes: bytes) -> None:
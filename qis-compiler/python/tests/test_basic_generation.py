@@ -4,7 +4,13 @@ import pytest
 from hugr.ops import CFG
 from hugr.package import Package
 from pytest_snapshot.plugin import Snapshot
-from selene_hugr_qis_compiler import HugrReadError, check_hugr, compile_to_llvm_ir
+from selene_hugr_qis_compiler import (
+    HugrReadError,
+    check_hugr,
+    compile_many,
+    compile_to_bitcode,
+    compile_to_llvm_ir,
+)
 
 resources_dir = Path(__file__).parent / "resources"
 
@@ -82,6 +88,59 @@ def test_entry_args() -> None:
         _ = compile_to_llvm_ir(load("entry_args"))
 
 
+def test_profile() -> None:
+    pkg = load("rus")
+    bitcode, profile = compile_to_bitcode(pkg, profile=True)
+    assert bitcode == compile_to_bitcode(pkg)
+
+    assert list(profile["phases"]) == [
+        "read_hugr_envelope",
+        "process_hugr",
+        "codegen",
+        "optimize_module",
+        "total",
+    ]
+    assert all(t >= 0 for t in profile["phases"].values())
+    assert profile["hugr_nodes_before"] > 0
+    assert profile["hugr_nodes_after"] > 0
+    assert profile["llvm_instructions_before"] > 0
+    assert profile["llvm_instructions_after"] > 0
+
+
+def test_pipelines() -> None:
+    pkg = load("rus")
+    default = compile_to_bitcode(pkg, opt_level=0)
+    assert compile_to_bitcode(pkg, pipeline="default<O0>") == default
+    assert compile_to_bitcode(pkg, pipeline="default<O2>") == compile_to_bitcode(pkg)
+
+    _, profile = compile_to_bitcode(
+        pkg,
+        profile=True,
+        large_function_threshold=0,
+        large_function_pipeline="function(instcombine)",
+    )
+    assert profile["pipeline"] == "function(instcombine)"
+    _, profile = compile_to_bitcode(pkg, profile=True, large_function_threshold=10**9)
+    assert profile["pipeline"] == "default<O2>"
+
+    with pytest.raises(RuntimeError):
+        compile_to_bitcode(pkg, pipeline="not-a-pass")
+
+
+def test_compile_many() -> None:
+    pkgs = [load(name) for name in ["no_results", "entry_args", "rus", "flip_some"]]
+    pkgs.insert(2, pkgs[0][1:])
+    results = compile_many(pkgs, n_threads=2)
+
+    assert len(results) == len(pkgs)
+    assert results[0] == compile_to_bitcode(pkgs[0])
+    assert isinstance(results[1], RuntimeError)
+    assert "Entry point function must have no input parameters" in str(results[1])
+    assert isinstance(results[2], HugrReadError)
+    assert results[3] == compile_to_bitcode(pkgs[3])
+    assert results[4] == compile_to_bitcode(pkgs[4])
+
+
 @pytest.mark.parametrize("target_triple", triples)
 def test_gpu(snapshot: Snapshot, target_triple: str) -> None:
     # when we get GPU support in guppy, we might write something like:
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from selene_hugr_qis_compiler import (
+    CompilationCache,
+    compile_to_bitcode,
+    resolve_target,
+)
+
+resources_dir = Path(__file__).parent / "resources"
+
+
+def load(name: str) -> bytes:
+    hugr_file = resources_dir / f"{name}.hugr"
+    return hugr_file.read_bytes()
+
+
+def test_compilation_cache(tmp_path: Path) -> None:
+    pkg = load("flip_some")
+    cache = CompilationCache(tmp_path)
+
+    bitcode = cache.compile_to_bitcode(pkg)
+    assert bitcode == compile_to_bitcode(pkg)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.compile_to_bitcode(pkg) == bitcode
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # The cache is shared through the directory, and keyed by the options.
+    other = CompilationCache(tmp_path)
+    assert other.compile_to_bitcode(pkg) == bitcode
+    other.compile_to_bitcode(pkg, opt_level=0)
+    assert (other.hits, other.misses) == (1, 1)
+
+    results = other.compile_many([pkg, load("rus"), load("entry_args")])
+    assert results[0] == bitcode
+    assert isinstance(results[1], bytes)
+    assert isinstance(results[2], RuntimeError)
+    assert (other.hits, other.misses) == (2, 3)
+
+    # The pass pipeline options are forwarded, and part of the key.
+    pipeline = "default<O0>"
+    assert other.compile_to_bitcode(pkg, pipeline=pipeline) == compile_to_bitcode(
+        pkg, pipeline=pipeline
+    )
+    assert (other.hits, other.misses) == (2, 4)
+    assert other.compile_many([pkg], pipeline=pipeline) == [
+        other.compile_to_bitcode(pkg, pipeline=pipeline)
+    ]
+    assert (other.hits, other.misses) == (4, 4)
+
+
+def test_compilation_cache_native_key() -> None:
+    pkg = load("flip_some")
+    triple, cpu, _ = resolve_target("native")
+    assert triple != "native"
+    assert cpu
+
+    # Native compilations are keyed by the host CPU, not only by its triple.
+    assert CompilationCache.key(pkg) != CompilationCache.key(pkg, target_triple=triple)
+
+
+def test_compilation_cache_eviction(tmp_path: Path) -> None:
+    cache = CompilationCache(tmp_path, max_size=0)
+    cache.compile_to_bitcode(load("flip_some"))
+    assert list(tmp_path.iterdir()) == []
+    cache.compile_to_bitcode(load("flip_some"))
+    assert (cache.hits, cache.misses) == (0, 2)
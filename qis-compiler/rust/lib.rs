@@ -22,6 +22,7 @@ use inkwell::support::LLVMString;
 use inkwell::targets::{
     CodeModel, InitializationConfig, RelocMode, Target, TargetMachine, TargetTriple,
 };
+use inkwell::values::FunctionValue;
 use itertools::Itertools;
 use pyo3::prelude::*;
 use tket::hugr::ops::DataflowParent;
@@ -30,8 +31,11 @@ use std::error::Error;
 use std::fmt::{self, Display, Formatter};
 use std::path::PathBuf;
 use std::rc::Rc;
+use std::sync::Mutex;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::time::{Duration, Instant};
 use std::vec::Vec;
-use std::{fs, str, vec};
+use std::{fs, str, thread, vec};
 use tket::extension::rotation::ROTATION_EXTENSION;
 use tket::extension::{TKET_EXTENSION, TKET1_EXTENSION};
 use tket::hugr::extension::{ExtensionRegistry, prelude};
@@ -50,7 +54,7 @@ use tket_qsystem::llvm::{
     debug::DebugCodegenExtension, prelude::QISPreludeCodegen, qsystem::QSystemCodegenExtension,
     random::RandomCodegenExtension, result::ResultsCodegenExtension, utils::UtilsCodegenExtension,
 };
-use tracing::{Level, event, instrument};
+use tracing::{Level, Span, event, instrument};
 use utils::read_hugr_envelope;
 
 mod gpu;
@@ -127,7 +131,53 @@ impl From<Vec<String>> for ProcessErrs {
 
 impl Error for ProcessErrs {}
 
+/// Wall times and sizes of the phases of a compilation.
+#[derive(Debug, Default)]
+struct CompileProfile {
+    /// The wall time of each phase, in execution order.
+    phases: Vec<(&'static str, Duration)>,
+    /// The number of HUGR nodes before lowering.
+    hugr_nodes_before: usize,
+    /// The number of HUGR nodes after lowering.
+    hugr_nodes_after: usize,
+    /// The number of LLVM instructions before optimisation.
+    llvm_instructions_before: usize,
+    /// The number of LLVM instructions after optimisation.
+    llvm_instructions_after: usize,
+    /// The LLVM pass pipeline that was run.
+    pipeline: String,
+}
+
+impl CompileProfile {
+    /// Record the wall time of a phase that started at `start`.
+    fn record(&mut self, phase: &'static str, start: Instant) {
+        self.phases.push((phase, start.elapsed()));
+    }
+}
+
+/// Count the instructions in an LLVM module.
+fn count_instructions(module: &Module) -> usize {
+    module
+        .get_functions()
+        .map(count_function_instructions)
+        .sum()
+}
+
+/// Count the instructions in an LLVM function.
+fn count_function_instructions(function: FunctionValue) -> usize {
+    let mut count = 0;
+    for block in function.get_basic_blocks() {
+        let mut instruction = block.get_first_instruction();
+        while let Some(instr) = instruction {
+            count += 1;
+            instruction = instr.get_next_instruction();
+        }
+    }
+    count
+}
+
 /// create an llvm module from hugr via hugr-llvm
+#[instrument(skip_all)]
 fn get_hugr_llvm_module<'c, 'hugr, 'a: 'c>(
     context: &'c Context,
     namer: Rc<Namer>,
@@ -142,12 +192,14 @@ fn get_hugr_llvm_module<'c, 'hugr, 'a: 'c>(
         .finish())
 }
 
+#[instrument(skip_all, fields(nodes_before = hugr.num_nodes(), nodes_after))]
 fn process_hugr(hugr: &mut Hugr) -> Result<()> {
     QSystemPass::default().run(hugr)?;
     // with_entrypoint(hugr, hugr.module_root(), |hugr| {
     //     // `with_entrypoint` returns Rerooted, which the pass expects a bare Hugr.
     // })?;
     inline_constant_functions(hugr)?;
+    Span::current().record("nodes_after", hugr.num_nodes());
     Ok(())
 }
 
@@ -186,33 +238,78 @@ fn get_module_with_std_exts<'c>(
     context: &'c Context,
     namer: Rc<Namer>,
     hugr: &'c mut Hugr,
+    mut profile: Option<&mut CompileProfile>,
 ) -> Result<Module<'c>> {
+    let start = Instant::now();
     process_hugr(hugr)?;
+    if let Some(profile) = profile.as_deref_mut() {
+        profile.record("process_hugr", start);
+        profile.hugr_nodes_after = hugr.num_nodes();
+    }
     if let Some(filename) = &args.save_hugr {
         let file = fs::File::create(PathBuf::from(filename))?;
         hugr.store(file, EnvelopeConfig::text())?;
     }
-    get_hugr_llvm_module(
+    let start = Instant::now();
+    let module = get_hugr_llvm_module(
         context,
         namer,
         hugr,
         &args.name,
         Rc::new(codegen_extensions()),
-    )
+    )?;
+    if let Some(profile) = profile {
+        profile.record("codegen", start);
+    }
+    Ok(module)
 }
 
-/// Optimize the module using LLVM passes
-fn optimize_module(module: &Module, args: &CompileArgs) -> Result<()> {
-    let opt_str = match args.opt_level {
+/// The LLVM pass pipeline to optimize a module with.
+///
+/// Modules containing a function larger than the
+/// [`PipelineOptions::large_function_threshold`] use the cheaper
+/// [`PipelineOptions::large_function_pipeline`].
+fn select_pipeline<'a>(module: &Module, args: &'a CompileArgs) -> &'a str {
+    let options = &args.pipeline;
+    if let Some(threshold) = options.large_function_threshold {
+        let largest = module
+            .get_functions()
+            .map(count_function_instructions)
+            .max()
+            .unwrap_or_default();
+        if largest > threshold {
+            return &options.large_function_pipeline;
+        }
+    }
+    if let Some(pipeline) = &options.pipeline {
+        return pipeline;
+    }
+    match args.opt_level {
         OptimizationLevel::Aggressive => "default<O3>",
         OptimizationLevel::Less => "default<O1>",
         OptimizationLevel::None => "default<O0>",
         OptimizationLevel::Default => "default<O2>",
-    };
+    }
+}
+
+/// Optimize the module using LLVM passes
+///
+/// Returns the pass pipeline that was run.
+#[instrument(skip_all, fields(pipeline, instructions_before, instructions_after))]
+fn optimize_module<'a>(module: &Module, args: &'a CompileArgs) -> Result<&'a str> {
+    let span = Span::current();
+    if !span.is_disabled() {
+        span.record("instructions_before", count_instructions(module));
+    }
+    let opt_str = select_pipeline(module, args);
+    span.record("pipeline", opt_str);
     module
         .run_passes(opt_str, args.target_machine, PassBuilderOptions::create())
         .map_err(Into::<ProcessErrs>::into)?;
-    Ok(())
+    if !span.is_disabled() {
+        span.record("instructions_after", count_instructions(module));
+    }
+    Ok(opt_str)
 }
 
 fn get_entry_point_name(namer: &Namer, hugr: &impl HugrView<Node = Node>) -> Result<String> {
@@ -295,6 +392,31 @@ struct CompileArgs<'a> {
     target_machine: &'a TargetMachine,
     /// Optimization level
     opt_level: OptimizationLevel,
+    /// LLVM pass pipeline selection
+    pipeline: PipelineOptions,
+}
+
+/// The LLVM pass pipelines used to optimize a module.
+#[derive(Debug, Clone)]
+struct PipelineOptions {
+    /// Pass pipeline, in the syntax of LLVM's new pass manager.
+    /// Defaults to the `default<On>` pipeline of the optimization level.
+    pipeline: Option<String>,
+    /// Instruction count of a function above which the whole module is
+    /// optimized with `large_function_pipeline` instead.
+    large_function_threshold: Option<usize>,
+    /// Cheaper pass pipeline for modules with large functions.
+    large_function_pipeline: String,
+}
+
+impl Default for PipelineOptions {
+    fn default() -> Self {
+        Self {
+            pipeline: None,
+            large_function_threshold: None,
+            large_function_pipeline: "default<O1>".to_string(),
+        }
+    }
 }
 
 impl<'a> CompileArgs<'a> {
@@ -309,17 +431,22 @@ impl<'a> CompileArgs<'a> {
             save_hugr: None,
             target_machine,
             opt_level,
+            pipeline: PipelineOptions::default(),
         }
     }
 }
 
 /// Compile the given HUGR to an LLVM module.
 /// This function is the primary entry point for the compiler.
-#[instrument(skip(ctx, hugr),parent = None)]
+///
+/// If a profile is given, the wall time and size of each phase are recorded
+/// in it.
+#[instrument(skip(ctx, hugr, profile),parent = None)]
 fn compile<'c, 'hugr: 'c>(
     args: &CompileArgs,
     ctx: &'c Context,
     hugr: &'hugr mut Hugr,
+    mut profile: Option<&mut CompileProfile>,
 ) -> Result<Module<'c>> {
     event!(Level::DEBUG, "starting primary compilation");
     let namer = Rc::new(Namer::new("__hugr__.", true));
@@ -333,7 +460,10 @@ fn compile<'c, 'hugr: 'c>(
     let module_entry = args.entry.as_ref().map_or(LLVM_MAIN, |x| x.as_ref());
 
     // Create a new LLVM module using hugr-llvm
-    let module = get_module_with_std_exts(args, ctx, namer, hugr)?;
+    if let Some(profile) = profile.as_deref_mut() {
+        profile.hugr_nodes_before = hugr.num_nodes();
+    }
+    let module = get_module_with_std_exts(args, ctx, namer, hugr, profile.as_deref_mut())?;
 
     wrap_main(ctx, &module, &hugr_entry, module_entry)?;
 
@@ -346,7 +476,16 @@ fn compile<'c, 'hugr: 'c>(
     module.set_triple(&triple);
     module.set_data_layout(&data_layout);
 
-    optimize_module(&module, args)?;
+    if let Some(profile) = profile.as_deref_mut() {
+        profile.llvm_instructions_before = count_instructions(&module);
+    }
+    let start = Instant::now();
+    let pipeline = optimize_module(&module, args)?;
+    if let Some(profile) = profile {
+        profile.record("optimize_module", start);
+        profile.pipeline = pipeline.to_string();
+        profile.llvm_instructions_after = count_instructions(&module);
+    }
 
     // Add metadata to the module
     for (key, values) in METADATA {
@@ -402,6 +541,122 @@ pub fn get_target_machine_from_triple(
         .ok_or_else(|| anyhow!("Failed to create target machine"))
 }
 
+/// Serialises the initialisation of the LLVM targets, which is not thread-safe.
+static TARGET_INIT: Mutex<()> = Mutex::new(());
+
+/// Get the Inkwell TargetMachine for a target triple, or for the current
+/// platform if the triple is `"native"`.
+///
+/// The LLVM targets are initialised under a global lock, so this can be
+/// called from several threads at once.
+pub fn get_target_machine(
+    target_triple: &str,
+    opt_level: OptimizationLevel,
+) -> Result<TargetMachine> {
+    let _guard = TARGET_INIT.lock().unwrap_or_else(|e| e.into_inner());
+    if target_triple == "native" {
+        get_native_target_machine(opt_level)
+    } else {
+        get_target_machine_from_triple(target_triple, opt_level)
+    }
+}
+
+/// Resolve a target triple to the triple, CPU name and CPU features that code
+/// is generated for.
+///
+/// `"native"` is resolved to the current platform. Other triples determine
+/// the target machine on their own, and are returned with an empty CPU name
+/// and features.
+pub fn resolve_target(target_triple: &str) -> (String, String, String) {
+    if target_triple == "native" {
+        (
+            TargetMachine::get_default_triple()
+                .as_str()
+                .to_string_lossy()
+                .into_owned(),
+            TargetMachine::get_host_cpu_name().to_string(),
+            TargetMachine::get_host_cpu_features().to_string(),
+        )
+    } else {
+        (target_triple.to_string(), String::new(), String::new())
+    }
+}
+
+/// The error raised when compiling one package of a batch.
+#[derive(Debug)]
+enum BatchError {
+    /// The package could not be read.
+    Read(anyhow::Error),
+    /// The package could not be compiled.
+    Compile(anyhow::Error),
+}
+
+/// Compile a HUGR package to LLVM bitcode, in a fresh LLVM context.
+fn compile_package_to_bitcode(
+    pkg_bytes: &[u8],
+    target_machine: &TargetMachine,
+    opt_level: OptimizationLevel,
+    pipeline: &PipelineOptions,
+) -> Result<Vec<u8>, BatchError> {
+    let mut hugr = read_hugr_envelope(pkg_bytes).map_err(BatchError::Read)?;
+    let ctx = Context::create();
+    let mut args = CompileArgs::new(&"hugr", target_machine, opt_level);
+    args.pipeline = pipeline.clone();
+    let llvm_module = compile(&args, &ctx, &mut hugr, None).map_err(BatchError::Compile)?;
+    Ok(llvm_module.write_bitcode_to_memory().as_slice().to_vec())
+}
+
+/// Compile HUGR packages to LLVM bitcode on up to `n_threads` threads.
+///
+/// Each thread creates a single target machine, and compiles packages until
+/// there are none left. The results are returned in input order.
+fn compile_many_to_bitcode(
+    pkgs: &[&[u8]],
+    opt_level: OptimizationLevel,
+    target_triple: &str,
+    pipeline: &PipelineOptions,
+    n_threads: usize,
+) -> Vec<Result<Vec<u8>, BatchError>> {
+    let next = AtomicUsize::new(0);
+    let mut results = (0..pkgs.len()).map(|_| None).collect_vec();
+    thread::scope(|scope| {
+        let workers = (0..n_threads.min(pkgs.len()))
+            .map(|_| {
+                scope.spawn(|| {
+                    let target_machine = get_target_machine(target_triple, opt_level);
+                    let mut compiled = Vec::new();
+                    loop {
+                        let i = next.fetch_add(1, Ordering::Relaxed);
+                        let Some(pkg_bytes) = pkgs.get(i) else {
+                            break;
+                        };
+                        let result = match &target_machine {
+                            Ok(target_machine) => compile_package_to_bitcode(
+                                pkg_bytes,
+                                target_machine,
+                                opt_level,
+                                pipeline,
+                            ),
+                            Err(e) => Err(BatchError::Compile(anyhow!("{e}"))),
+                        };
+                        compiled.push((i, result));
+                    }
+                    compiled
+                })
+            })
+            .collect_vec();
+        for worker in workers {
+            let compiled = worker
+                .join()
+                .unwrap_or_else(|e| std::panic::resume_unwind(e));
+            for (i, result) in compiled {
+                results[i] = Some(result);
+            }
+        }
+    });
+    results.into_iter().map(Option::unwrap).collect()
+}
+
 /// Get the optimization level for the given integer value.
 pub fn get_opt_level(opt_level: u32) -> Result<OptimizationLevel> {
     match opt_level {
@@ -422,9 +677,15 @@ mod exceptions {
 }
 #[pymodule]
 mod selene_hugr_qis_compiler {
+    use std::num::NonZeroUsize;
+
+    use pyo3::IntoPyObjectExt;
+    use pyo3::types::{PyBytes, PyDict};
+
     use super::{
-        CompileArgs, Context, Hugr, PyResult, compile, get_native_target_machine, get_opt_level,
-        get_target_machine_from_triple, pyfunction, read_hugr_envelope,
+        BatchError, Bound, CompileArgs, CompileProfile, Context, Hugr, Instant, IntoPyObject,
+        Module, PipelineOptions, PyAny, PyDictMethods, PyErr, PyResult, Python, compile,
+        compile_many_to_bitcode, get_opt_level, get_target_machine, pyfunction, read_hugr_envelope,
     };
 
     #[pymodule_export]
@@ -440,51 +701,207 @@ mod selene_hugr_qis_compiler {
         py_read_envelope(pkg_bytes).map(|_| ())
     }
 
-    /// Compile HUGR package to LLVM IR string
-    #[pyfunction]
-    #[pyo3(signature = (pkg_bytes, opt_level=2, target_triple="native"))]
-    pub fn compile_to_llvm_ir(
+    /// Compile a HUGR package, and convert the LLVM module with `output`.
+    ///
+    /// If `profile` is set, returns a tuple of the output and a dictionary with
+    /// the wall time of each phase in seconds, and the sizes of the program
+    /// before and after lowering and optimisation.
+    fn compile_with<'py, T: IntoPyObject<'py>>(
+        py: Python<'py>,
         pkg_bytes: &[u8],
         opt_level: u32,
         target_triple: &str,
-    ) -> PyResult<String> {
+        profile: bool,
+        pipeline: PipelineOptions,
+        output: impl FnOnce(&Module) -> T,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let total = Instant::now();
         let opt = get_opt_level(opt_level)?;
-        let target_machine = if target_triple == "native" {
-            get_native_target_machine(opt)
-        } else {
-            get_target_machine_from_triple(target_triple, opt)
-        }?;
+        let target_machine = get_target_machine(target_triple, opt)?;
+        let mut compile_profile = CompileProfile::default();
+        let start = Instant::now();
         let mut hugr = py_read_envelope(pkg_bytes)?;
+        compile_profile.record("read_hugr_envelope", start);
         let ctx = Context::create();
+        let mut args = CompileArgs::new(&"hugr", &target_machine, opt);
+        args.pipeline = pipeline;
         let llvm_module = compile(
-            &CompileArgs::new(&"hugr", &target_machine, opt),
+            &args,
             &ctx,
             &mut hugr,
+            profile.then_some(&mut compile_profile),
+        )?;
+        let output = output(&llvm_module).into_bound_py_any(py)?;
+        if !profile {
+            return Ok(output);
+        }
+        compile_profile.record("total", total);
+
+        let phases = PyDict::new(py);
+        for (phase, duration) in &compile_profile.phases {
+            phases.set_item(phase, duration.as_secs_f64())?;
+        }
+        let stats = PyDict::new(py);
+        stats.set_item("phases", phases)?;
+        stats.set_item("hugr_nodes_before", compile_profile.hugr_nodes_before)?;
+        stats.set_item("hugr_nodes_after", compile_profile.hugr_nodes_after)?;
+        stats.set_item(
+            "llvm_instructions_before",
+            compile_profile.llvm_instructions_before,
         )?;
-        Ok(llvm_module.to_string())
+        stats.set_item(
+            "llvm_instructions_after",
+            compile_profile.llvm_instructions_after,
+        )?;
+        stats.set_item("pipeline", compile_profile.pipeline)?;
+        (output, stats).into_bound_py_any(py)
+    }
+
+    /// Compile HUGR package to LLVM IR string
+    ///
+    /// See `compile_to_bitcode` for the optimisation pipeline options.
+    #[pyfunction]
+    #[pyo3(signature = (
+        pkg_bytes,
+        opt_level=2,
+        target_triple="native",
+        profile=false,
+        pipeline=None,
+        large_function_threshold=None,
+        large_function_pipeline="default<O1>".to_string(),
+    ))]
+    pub fn compile_to_llvm_ir<'py>(
+        py: Python<'py>,
+        pkg_bytes: &[u8],
+        opt_level: u32,
+        target_triple: &str,
+        profile: bool,
+        pipeline: Option<String>,
+        large_function_threshold: Option<usize>,
+        large_function_pipeline: String,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let pipeline = PipelineOptions {
+            pipeline,
+            large_function_threshold,
+            large_function_pipeline,
+        };
+        compile_with(
+            py,
+            pkg_bytes,
+            opt_level,
+            target_triple,
+            profile,
+            pipeline,
+            |module| module.to_string(),
+        )
     }
 
     /// Compile HUGR package to LLVM bitcode
+    ///
+    /// The module is optimised with the LLVM pass `pipeline` if given, in the
+    /// syntax of LLVM's new pass manager, or the default pipeline of
+    /// `opt_level` otherwise. If any function has more than
+    /// `large_function_threshold` instructions, `large_function_pipeline` is
+    /// run instead.
     #[pyfunction]
-    #[pyo3(signature = (pkg_bytes, opt_level=2, target_triple="native"))]
-    pub fn compile_to_bitcode(
+    #[pyo3(signature = (
+        pkg_bytes,
+        opt_level=2,
+        target_triple="native",
+        profile=false,
+        pipeline=None,
+        large_function_threshold=None,
+        large_function_pipeline="default<O1>".to_string(),
+    ))]
+    pub fn compile_to_bitcode<'py>(
+        py: Python<'py>,
         pkg_bytes: &[u8],
         opt_level: u32,
         target_triple: &str,
-    ) -> PyResult<Vec<u8>> {
+        profile: bool,
+        pipeline: Option<String>,
+        large_function_threshold: Option<usize>,
+        large_function_pipeline: String,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let pipeline = PipelineOptions {
+            pipeline,
+            large_function_threshold,
+            large_function_pipeline,
+        };
+        compile_with(
+            py,
+            pkg_bytes,
+            opt_level,
+            target_triple,
+            profile,
+            pipeline,
+            |module| PyBytes::new(py, module.write_bitcode_to_memory().as_slice()),
+        )
+    }
+
+    /// Resolve a target triple to the triple, CPU name and CPU features that
+    /// code is generated for
+    ///
+    /// `"native"` is resolved to the current platform.
+    #[pyfunction]
+    #[pyo3(signature = (target_triple="native"))]
+    pub fn resolve_target(target_triple: &str) -> (String, String, String) {
+        super::resolve_target(target_triple)
+    }
+
+    /// Compile HUGR packages to LLVM bitcode in parallel, without the GIL
+    ///
+    /// Returns one item per package, in input order: either the bitcode, or
+    /// the exception raised when compiling that package. See
+    /// `compile_to_bitcode` for the optimisation pipeline options.
+    #[pyfunction]
+    #[pyo3(signature = (
+        pkgs,
+        opt_level=2,
+        target_triple="native",
+        n_threads=None,
+        pipeline=None,
+        large_function_threshold=None,
+        large_function_pipeline="default<O1>".to_string(),
+    ))]
+    pub fn compile_many<'py>(
+        py: Python<'py>,
+        pkgs: Vec<Bound<'py, PyBytes>>,
+        opt_level: u32,
+        target_triple: &str,
+        n_threads: Option<NonZeroUsize>,
+        pipeline: Option<String>,
+        large_function_threshold: Option<usize>,
+        large_function_pipeline: String,
+    ) -> PyResult<Vec<Bound<'py, PyAny>>> {
+        let pipeline = PipelineOptions {
+            pipeline,
+            large_function_threshold,
+            large_function_pipeline,
+        };
         let opt = get_opt_level(opt_level)?;
-        let target_machine = if target_triple == "native" {
-            get_native_target_machine(opt)
-        } else {
-            get_target_machine_from_triple(target_triple, opt)
-        }?;
-        let mut hugr = py_read_envelope(pkg_bytes)?;
-        let ctx = Context::create();
-        let llvm_module = compile(
-            &CompileArgs::new(&"hugr", &target_machine, opt),
-            &ctx,
-            &mut hugr,
-        )?;
-        Ok(llvm_module.write_bitcode_to_memory().as_slice().to_vec())
+        // Fail early on an invalid target.
+        get_target_machine(target_triple, opt)?;
+        let n_threads = match n_threads {
+            Some(n) => n,
+            None => std::thread::available_parallelism()?,
+        };
+        let pkgs = pkgs.iter().map(|pkg| pkg.as_bytes()).collect::<Vec<_>>();
+        let results = py.allow_threads(|| {
+            compile_many_to_bitcode(&pkgs, opt, target_triple, &pipeline, n_threads.get())
+        });
+        Ok(results
+            .into_iter()
+            .map(|result| match result {
+                Ok(bitcode) => PyBytes::new(py, &bitcode).into_any(),
+                Err(BatchError::Read(e)) => HugrReadError::new_err(format!("{e:?}"))
+                    .into_value(py)
+                    .into_bound(py)
+                    .into_any(),
+                Err(BatchError::Compile(e)) => {
+                    PyErr::from(e).into_value(py).into_bound(py).into_any()
+                }
+            })
+            .collect())
     }
 }
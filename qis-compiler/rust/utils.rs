@@ -6,11 +6,13 @@ use tket::hugr::types::Term;
 use tket::hugr::{Hugr, HugrView};
 
 use tket::extension::{TKET1_EXTENSION_ID, TKET1_OP_NAME};
+use tracing::instrument;
 
 /// Loads a HUGR package from a binary [Envelope][tket::hugr::envelope::Envelope].
 ///
 /// Interprets the string as a hugr package and, verifies there is exactly one module in the
 /// package, then extracts and returns that module.
+#[instrument(skip_all, fields(bytes = bytes.len()))]
 pub fn read_hugr_envelope(bytes: &[u8]) -> Result<Hugr> {
     let (desc, package) = read_described_envelope(bytes, &REGISTRY)
         .map_err(|e| Error::new(e).context("Error loading HUGR package."))?;
@@ -0,0 +1,23 @@
+"""Benchmarks for converting and serialising circuits."""
+
+from pytket import Circuit
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from tket.circuit import Tk2Circuit
+
+
+def test_from_pytket(benchmark: BenchmarkFixture, circuit: Circuit):
+    benchmark(Tk2Circuit, circuit)
+
+
+def test_to_pytket(benchmark: BenchmarkFixture, tk2_circuit: Tk2Circuit):
+    benchmark(tk2_circuit.to_tket1)
+
+
+def test_to_bytes(benchmark: BenchmarkFixture, tk2_circuit: Tk2Circuit):
+    benchmark(tk2_circuit.to_bytes)
+
+
+def test_from_bytes(benchmark: BenchmarkFixture, tk2_circuit: Tk2Circuit):
+    envelope = tk2_circuit.to_bytes()
+    benchmark(Tk2Circuit.from_bytes, envelope)
@@ -0,0 +1,26 @@
+"""Benchmarks for running optimisation passes from Python."""
+
+import json
+from pathlib import Path
+
+from pytket import Circuit
+from pytket.passes import CliffordSimp
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from tket.circuit import Tk2Circuit
+from tket.passes import badger_pass, tket1_pass
+
+
+def test_tket1_pass(benchmark: BenchmarkFixture, tk2_circuit: Tk2Circuit):
+    pass_json = json.dumps(CliffordSimp().to_dict())
+    benchmark(tket1_pass, tk2_circuit, pass_json)
+
+
+def test_badger_pass(benchmark: BenchmarkFixture, small_circuit: Circuit):
+    # A fixed amount of work, so that the timings are comparable.
+    badger = badger_pass(
+        rewriter=Path("test_files/eccs/nam_4_2.rwr"),
+        max_threads=1,
+        max_circuit_count=100,
+    )
+    benchmark(lambda: badger.apply(small_circuit.copy()))
@@ -0,0 +1,37 @@
+"""Benchmarks for pattern matching and rewriting."""
+
+import pytest
+from pytket import Circuit
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from tket.circuit import Tk2Circuit
+from tket.pattern import CircuitPattern, PatternMatcher
+from tket.rewrite import ECCRewriter
+
+
+@pytest.fixture(scope="module")
+def matcher() -> PatternMatcher:
+    patterns = [
+        CircuitPattern(Circuit(2).CX(0, 1).CX(0, 1)),
+        CircuitPattern(Circuit(2).CX(0, 1).CX(1, 0)),
+        CircuitPattern(Circuit(1).H(0).H(0)),
+        CircuitPattern(Circuit(1).T(0).Tdg(0)),
+    ]
+    return PatternMatcher(iter(patterns))
+
+
+@pytest.fixture(scope="module")
+def rewriter() -> ECCRewriter:
+    return ECCRewriter.load_precompiled("test_files/eccs/nam_4_2.rwr")
+
+
+def test_find_matches(
+    benchmark: BenchmarkFixture, matcher: PatternMatcher, tk2_circuit: Tk2Circuit
+):
+    benchmark(matcher.find_matches, tk2_circuit)
+
+
+def test_get_rewrites(
+    benchmark: BenchmarkFixture, rewriter: ECCRewriter, tk2_circuit: Tk2Circuit
+):
+    benchmark(rewriter.get_rewrites, tk2_circuit)
@@ -0,0 +1,87 @@
+"""Circuit generators and fixtures for the tket benchmarks.
+
+The benchmarks are not collected by the regular test run. Use `just bench-python`
+to run them against the stored baseline.
+"""
+
+import random
+
+import pytest
+from pytket import Circuit
+
+from tket.circuit import Tk2Circuit
+
+
+def cnot_layers(n_qubits: int, layers: int) -> Circuit:
+    """Alternating layers of CNOTs between neighbouring qubits."""
+    circ = Circuit(n_qubits)
+    for layer in range(layers):
+        for q in range(layer % 2, n_qubits - 1, 2):
+            circ.CX(q, q + 1)
+    return circ
+
+
+def random_clifford_t(n_qubits: int, n_gates: int, seed: int = 0) -> Circuit:
+    """A random Clifford+T circuit, with roughly a third of CNOTs."""
+    rng = random.Random(seed)
+    circ = Circuit(n_qubits)
+    single_qubit_gates = [circ.H, circ.S, circ.Sdg, circ.T, circ.Tdg, circ.X]
+    for _ in range(n_gates):
+        if n_qubits > 1 and rng.random() < 1 / 3:
+            control, target = rng.sample(range(n_qubits), 2)
+            circ.CX(control, target)
+        else:
+            rng.choice(single_qubit_gates)(rng.randrange(n_qubits))
+    return circ
+
+
+def qft(n_qubits: int) -> Circuit:
+    """The quantum Fourier transform, with controlled phases decomposed into
+    CX and Rz gates."""
+    circ = Circuit(n_qubits)
+    for target in range(n_qubits):
+        circ.H(target)
+        for control in range(target + 1, n_qubits):
+            # Controlled phase of pi / 2^k, in half-turns.
+            angle = 1 / 2 ** (control - target)
+            circ.Rz(angle / 2, control)
+            circ.CX(control, target)
+            circ.Rz(-angle / 2, target)
+            circ.CX(control, target)
+            circ.Rz(angle / 2, target)
+    return circ
+
+
+# Each family at roughly 100, 1k and 10k gates.
+CIRCUITS = {
+    "cnot_layers-100": lambda: cnot_layers(8, 29),
+    "cnot_layers-1k": lambda: cnot_layers(8, 286),
+    "cnot_layers-10k": lambda: cnot_layers(8, 2858),
+    "clifford_t-100": lambda: random_clifford_t(8, 100),
+    "clifford_t-1k": lambda: random_clifford_t(8, 1_000),
+    "clifford_t-10k": lambda: random_clifford_t(8, 10_000),
+    "qft-100": lambda: qft(6),
+    "qft-1k": lambda: qft(20),
+    "qft-10k": lambda: qft(64),
+}
+
+# Sizes cheap enough for the optimisation benchmarks.
+SMALL_CIRCUITS = [name for name in CIRCUITS if name.endswith("-100")]
+
+
+@pytest.fixture(params=list(CIRCUITS), scope="session")
+def circuit(request: pytest.FixtureRequest) -> Circuit:
+    """A pytket circuit from each family, at every size."""
+    return CIRCUITS[request.param]()
+
+
+@pytest.fixture(params=SMALL_CIRCUITS, scope="session")
+def small_circuit(request: pytest.FixtureRequest) -> Circuit:
+    """A pytket circuit from each family, at the smallest size."""
+    return CIRCUITS[request.param]()
+
+
+@pytest.fixture(scope="session")
+def tk2_circuit(circuit: Circuit) -> Tk2Circuit:
+    """The `circuit` fixture, converted to a Tk2Circuit."""
+    return Tk2Circuit(circuit)
@@ -3,6 +3,8 @@
 
 mod convert;
 mod cost;
+mod stats;
+mod stream;
 mod tk2circuit;
 
 use derive_more::{From, Into};
@@ -24,6 +26,8 @@ use crate::utils::ConvertPyErr;
 
 pub use self::convert::{try_update_circ, try_with_circ, update_circ, with_circ, CircuitType};
 pub use self::cost::PyCircuitCost;
+pub use self::stats::PyCircuitStats;
+pub use self::stream::{PyCircuitReader, PyCircuitWriter};
 pub use self::tk2circuit::Tk2Circuit;
 pub use tket::{Pauli, TketOp};
 
@@ -34,6 +38,9 @@ pub fn module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     m.add_class::<PyNode>()?;
     m.add_class::<PyWire>()?;
     m.add_class::<PyCircuitCost>()?;
+    m.add_class::<PyCircuitStats>()?;
+    m.add_class::<PyCircuitReader>()?;
+    m.add_class::<PyCircuitWriter>()?;
 
     m.add_function(wrap_pyfunction!(validate_circuit, &m)?)?;
     m.add_function(wrap_pyfunction!(render_circuit_dot, &m)?)?;
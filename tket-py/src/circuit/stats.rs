@@ -0,0 +1,101 @@
+//! Circuit statistics computed in a single traversal.
+
+use std::collections::HashMap;
+
+use hugr::extension::simple_op::MakeExtensionOp;
+use hugr::{HugrView, Node};
+use itertools::Itertools;
+use pyo3::prelude::*;
+use tket::{Circuit, TketOp};
+
+/// Statistics about the top-level operations of a circuit.
+///
+/// Returned by `Tk2Circuit.stats`.
+#[pyclass(name = "CircuitStats", frozen)]
+#[derive(Clone, Debug, Default)]
+pub struct PyCircuitStats {
+    /// The number of operations of each kind.
+    ///
+    /// `TketOp`s are keyed by their name, other operations by their qualified
+    /// name.
+    #[pyo3(get)]
+    op_counts: HashMap<String, usize>,
+    /// The total number of operations.
+    #[pyo3(get)]
+    num_operations: usize,
+    /// The number of operations acting on exactly two qubits.
+    #[pyo3(get)]
+    two_qubit_count: usize,
+    /// The number of T and Tdg gates.
+    #[pyo3(get)]
+    t_count: usize,
+    /// The length of the longest sequence of operations along the qubits.
+    #[pyo3(get)]
+    depth: usize,
+    /// The number of operations acting on each qubit, indexed by linear unit.
+    #[pyo3(get)]
+    qubit_counts: Vec<usize>,
+}
+
+#[pymethods]
+impl PyCircuitStats {
+    fn __repr__(&self) -> String {
+        format!(
+            "CircuitStats(num_operations={}, two_qubit_count={}, t_count={}, depth={})",
+            self.num_operations, self.two_qubit_count, self.t_count, self.depth
+        )
+    }
+}
+
+impl PyCircuitStats {
+    /// Compute the statistics of a circuit.
+    pub fn new<T: HugrView<Node = Node>>(circ: &Circuit<T>) -> Self {
+        let num_qubits = circ.qubit_count();
+        let mut stats = Self {
+            qubit_counts: vec![0; num_qubits],
+            ..Self::default()
+        };
+        // The depth of the last operation on each qubit.
+        let mut qubit_depths: Vec<usize> = vec![0; num_qubits];
+        for cmd in circ.operations() {
+            let Some(ext_op) = cmd.optype().as_extension_op() else {
+                continue;
+            };
+            let tket_op = TketOp::from_extension_op(ext_op).ok();
+            let name = match tket_op {
+                Some(_) => ext_op.def().name().to_string(),
+                None => format!("{}.{}", ext_op.def().extension_id(), ext_op.def().name()),
+            };
+            *stats.op_counts.entry(name).or_default() += 1;
+            stats.num_operations += 1;
+            if matches!(tket_op, Some(TketOp::T | TketOp::Tdg)) {
+                stats.t_count += 1;
+            }
+
+            let qubits = cmd
+                .input_qubits()
+                .map(|(unit, _, _)| unit.index())
+                .chain(cmd.output_qubits().map(|(unit, _, _)| unit.index()))
+                .sorted_unstable()
+                .dedup()
+                .collect_vec();
+            if qubits.len() == 2 {
+                stats.two_qubit_count += 1;
+            }
+            let Some(&max_qubit) = qubits.last() else {
+                continue;
+            };
+            if max_qubit >= qubit_depths.len() {
+                qubit_depths.resize(max_qubit + 1, 0);
+                stats.qubit_counts.resize(max_qubit + 1, 0);
+            }
+            let depth = qubits.iter().map(|&q| qubit_depths[q]).max().unwrap() + 1;
+            for &q in &qubits {
+                qubit_depths[q] = depth;
+                stats.qubit_counts[q] += 1;
+            }
+            stats.depth = stats.depth.max(depth);
+        }
+        stats
+    }
+}
@@ -0,0 +1,141 @@
+//! Lazy reading and appending of circuit streams.
+
+use std::fs::File;
+use std::io::{BufReader, BufWriter};
+use std::path::PathBuf;
+
+use hugr::envelope::EnvelopeConfig;
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::PyTuple;
+use tket::serialize::{CircuitStreamError, CircuitStreamReader, CircuitStreamWriter};
+
+use super::tk2circuit::envelope_config_from_py;
+use super::Tk2Circuit;
+
+/// Reads the circuits in a file lazily, one at a time.
+///
+/// The file is either a stream written by `CircuitWriter`, or a single HUGR
+/// envelope. Each circuit is decoded without the GIL as it is requested.
+#[pyclass(name = "CircuitReader", module = "tket._tket.circuit")]
+pub struct PyCircuitReader {
+    reader: CircuitStreamReader<BufReader<File>>,
+}
+
+#[pymethods]
+impl PyCircuitReader {
+    /// Open a circuit stream.
+    ///
+    /// If `split_functions` is set, yields one circuit per function
+    /// definition instead of the entrypoint of each envelope.
+    #[new]
+    #[pyo3(signature = (path, split_functions = false))]
+    fn new(path: PathBuf, split_functions: bool) -> PyResult<Self> {
+        let file = BufReader::new(File::open(path)?);
+        let reader = CircuitStreamReader::new(file)
+            .map_err(stream_err)?
+            .with_split_functions(split_functions);
+        Ok(Self { reader })
+    }
+
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __next__(mut slf: PyRefMut<'_, Self>) -> PyResult<Option<Tk2Circuit>> {
+        let py = slf.py();
+        let reader = &mut slf.reader;
+        py.allow_threads(|| reader.next())
+            .transpose()
+            .map(|circ| circ.map(Tk2Circuit::from))
+            .map_err(stream_err)
+    }
+}
+
+/// Appends circuits to a stream file, one envelope per circuit.
+///
+/// Can be used as a context manager, closing the file on exit.
+#[pyclass(name = "CircuitWriter", module = "tket._tket.circuit")]
+pub struct PyCircuitWriter {
+    /// The writer, or `None` once closed.
+    writer: Option<CircuitStreamWriter<BufWriter<File>>>,
+}
+
+#[pymethods]
+impl PyCircuitWriter {
+    /// Open a circuit stream for writing.
+    ///
+    /// If `append` is set and the file already contains a stream, new
+    /// circuits are added after the existing ones. Otherwise the file is
+    /// truncated. If no config is given, it defaults to the default binary
+    /// envelope.
+    #[new]
+    #[pyo3(signature = (path, config = None, append = true))]
+    fn new(path: PathBuf, config: Option<Bound<'_, PyAny>>, append: bool) -> PyResult<Self> {
+        let config = match config {
+            Some(cfg) => envelope_config_from_py(cfg)?,
+            None => EnvelopeConfig::binary(),
+        };
+        let writer = if append {
+            CircuitStreamWriter::open_append(path, config)
+        } else {
+            CircuitStreamWriter::create(path, config)
+        }
+        .map_err(stream_err)?;
+        Ok(Self {
+            writer: Some(writer),
+        })
+    }
+
+    /// Append a circuit to the stream.
+    ///
+    /// The circuit is encoded without the GIL.
+    fn write(&mut self, py: Python<'_>, circ: PyRef<'_, Tk2Circuit>) -> PyResult<()> {
+        let writer = self.writer_mut()?;
+        let circ = &circ.circ;
+        py.allow_threads(|| writer.write(circ)).map_err(stream_err)
+    }
+
+    /// Flush the buffered circuits to the file.
+    fn flush(&mut self) -> PyResult<()> {
+        Ok(self.writer_mut()?.flush()?)
+    }
+
+    /// Flush and close the file. Further writes raise a `ValueError`.
+    fn close(&mut self) -> PyResult<()> {
+        if let Some(writer) = self.writer.take() {
+            writer
+                .into_inner()
+                .into_inner()
+                .map_err(|e| e.into_error())?;
+        }
+        Ok(())
+    }
+
+    fn __enter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    #[pyo3(signature = (*_args))]
+    fn __exit__(&mut self, _args: &Bound<'_, PyTuple>) -> PyResult<()> {
+        self.close()
+    }
+}
+
+impl PyCircuitWriter {
+    fn writer_mut(&mut self) -> PyResult<&mut CircuitStreamWriter<BufWriter<File>>> {
+        self.writer
+            .as_mut()
+            .ok_or_else(|| PyValueError::new_err("The circuit writer is closed."))
+    }
+}
+
+/// Convert a stream error into a python exception.
+///
+/// IO errors become `OSError`s, and malformed streams `ValueError`s.
+fn stream_err(e: CircuitStreamError) -> PyErr {
+    match e {
+        CircuitStreamError::Io(e) => e.into(),
+        e => PyValueError::new_err(format!("Invalid circuit stream: {e}")),
+    }
+}
@@ -2,8 +2,11 @@
 
 use std::borrow::{Borrow, Cow};
 use std::fmt::Display;
+use std::fs::File;
+use std::io;
 use std::mem;
 use std::num::{NonZero, NonZeroU8};
+use std::path::PathBuf;
 
 use hugr::builder::{CircuitBuilder, DFGBuilder, Dataflow, DataflowHugr};
 use hugr::envelope::{EnvelopeConfig, EnvelopeFormat, ZstdConfig};
@@ -16,11 +19,15 @@ use hugr::package::Package;
 use hugr::types::Type;
 use itertools::Itertools;
 use pyo3::exceptions::{PyAttributeError, PyValueError};
-use pyo3::types::{PyAnyMethods, PyModule, PyString, PyTypeMethods};
+use pyo3::types::{
+    PyAnyMethods, PyByteArray, PyByteArrayMethods, PyBytes, PyBytesMethods, PyModule, PyString,
+    PyTypeMethods,
+};
 use pyo3::{
     pyclass, pymethods, Bound, FromPyObject, IntoPyObject, PyAny, PyErr, PyRef, PyRefMut, PyResult,
     PyTypeInfo, Python,
 };
+use rayon::prelude::*;
 
 use derive_more::From;
 use hugr::{Hugr, HugrView, Wire};
@@ -39,7 +46,7 @@ use crate::rewrite::PyCircuitRewrite;
 use crate::types::PyHugrType;
 use crate::utils::{into_vec, ConvertPyErr};
 
-use super::{cost, with_circ, PyCircuitCost, PyNode, PyWire};
+use super::{cost, with_circ, PyCircuitCost, PyCircuitStats, PyNode, PyWire};
 
 /// A circuit in tket format.
 ///
@@ -61,7 +68,7 @@ use super::{cost, with_circ, PyCircuitCost, PyNode, PyWire};
 /// # Convert back to a pytket.Circuit
 /// c2 = t2c.to_tket1()
 /// ```
-#[pyclass]
+#[pyclass(module = "tket._tket.circuit")]
 #[derive(Clone, Debug, PartialEq, From)]
 pub struct Tk2Circuit {
     /// Rust representation of the circuit.
@@ -92,6 +99,58 @@ impl Tk2Circuit {
         .to_tket1(py)
     }
 
+    /// Convert a batch of `pytket.Circuit`s.
+    ///
+    /// The circuits are decoded in parallel, without holding the GIL.
+    #[staticmethod]
+    pub fn from_tket1_many(py: Python<'_>, circs: Vec<Bound<'_, PyAny>>) -> PyResult<Vec<Self>> {
+        let serials = circs
+            .iter()
+            .map(SerialCircuit::from_tket1)
+            .collect::<PyResult<Vec<_>>>()?;
+        py.allow_threads(|| {
+            serials
+                .into_par_iter()
+                .map(|serial| {
+                    let circ = serial
+                        .decode(
+                            DecodeOptions::new()
+                                .with_config(tket_qsystem::pytket::qsystem_decoder_config()),
+                        )
+                        .convert_pyerrs()?;
+                    Ok(Tk2Circuit { circ })
+                })
+                .collect()
+        })
+    }
+
+    /// Convert a batch of [`Tk2Circuit`]s to tket1 circuits.
+    ///
+    /// The circuits are encoded to json bytes in parallel, without holding the
+    /// GIL, and only then loaded as `pytket.Circuit`s.
+    #[staticmethod]
+    pub fn to_tket1_many<'py>(
+        py: Python<'py>,
+        circs: Vec<PyRef<'py, Tk2Circuit>>,
+    ) -> PyResult<Vec<Bound<'py, PyAny>>> {
+        let hugrs = circs.iter().map(|c| &c.circ).collect_vec();
+        let encoded = py.allow_threads(|| {
+            hugrs
+                .into_par_iter()
+                .map(encode_tket1_json)
+                .collect::<PyResult<Vec<_>>>()
+        })?;
+        let loads = py.import("json")?.getattr("loads")?;
+        let from_dict = py
+            .import("pytket")?
+            .getattr("Circuit")?
+            .getattr("from_dict")?;
+        encoded
+            .into_iter()
+            .map(|json| from_dict.call1((loads.call1((PyBytes::new(py, &json),))?,)))
+            .collect()
+    }
+
     /// Apply a rewrite on the circuit.
     pub fn apply_rewrite(&mut self, rw: PyCircuitRewrite) {
         rw.rewrite
@@ -102,18 +161,37 @@ impl Tk2Circuit {
     /// Encode the circuit as a HUGR envelope.
     ///
     /// If no config is given, it defaults to the default binary envelope.
-    #[pyo3(signature = (config = None))]
-    pub fn to_bytes(&self, config: Option<Bound<'_, PyAny>>) -> PyResult<Vec<u8>> {
+    ///
+    /// If a `bytearray` is given as `out`, the envelope is appended to it
+    /// directly and `out` is returned, instead of allocating a new `bytes`
+    /// object.
+    #[pyo3(signature = (config = None, out = None))]
+    pub fn to_bytes<'py>(
+        &self,
+        py: Python<'py>,
+        config: Option<Bound<'py, PyAny>>,
+        out: Option<Bound<'py, PyByteArray>>,
+    ) -> PyResult<Bound<'py, PyAny>> {
         fn err(e: impl Display) -> PyErr {
             PyErr::new::<PyAttributeError, _>(format!("Could not encode circuit: {e}"))
-        };
+        }
         let config = match config {
             Some(cfg) => envelope_config_from_py(cfg)?,
             None => EnvelopeConfig::binary(),
         };
-        let mut buf = Vec::new();
-        self.circ.store(&mut buf, config).map_err(err)?;
-        Ok(buf)
+        match out {
+            Some(out) => {
+                self.circ
+                    .store(ByteArrayWriter(&out), config)
+                    .map_err(err)?;
+                Ok(out.into_any())
+            }
+            None => {
+                let mut buf = Vec::new();
+                self.circ.store(&mut buf, config).map_err(err)?;
+                Ok(PyBytes::new(py, &buf).into_any())
+            }
+        }
     }
 
     /// Encode the circuit as a HUGR envelope.
@@ -133,18 +211,48 @@ impl Tk2Circuit {
 
     /// Loads a circuit from a HUGR envelope.
     ///
+    /// The envelope is read in place from `bytes` and `bytearray` objects.
+    /// Other objects supporting the buffer protocol, such as `memoryview`s,
+    /// are copied into a `bytes` object first. Use [`Tk2Circuit::from_file`]
+    /// to read an envelope file without copying it.
+    ///
     /// If the name is not given, uses the encoded entrypoint.
     #[staticmethod]
     #[pyo3(signature = (bytes, function_name = None))]
-    pub fn from_bytes(bytes: &[u8], function_name: Option<String>) -> PyResult<Self> {
-        fn err(e: impl Display) -> PyErr {
-            PyErr::new::<PyAttributeError, _>(format!("Could not read envelope: {e}"))
-        };
-        let circ = match function_name {
-            Some(name) => Circuit::load_function(bytes, name).map_err(err)?,
-            None => Circuit::load(bytes, None).map_err(err)?,
-        };
-        Ok(Tk2Circuit { circ })
+    pub fn from_bytes(bytes: &Bound<'_, PyAny>, function_name: Option<String>) -> PyResult<Self> {
+        let py = bytes.py();
+        if let Ok(bytes) = bytes.downcast::<PyBytes>() {
+            // `bytes` objects are immutable, so we can release the GIL.
+            let bytes = bytes.as_bytes();
+            return py.allow_threads(|| load_envelope(bytes, function_name));
+        }
+        if let Ok(array) = bytes.downcast::<PyByteArray>() {
+            // SAFETY: No python code runs while the slice is borrowed, so
+            // the bytearray cannot be modified.
+            return load_envelope(unsafe { array.as_bytes() }, function_name);
+        }
+        let copy = py.get_type::<PyBytes>().call1((bytes,))?;
+        Self::from_bytes(&copy, function_name)
+    }
+
+    /// Loads a circuit from a file containing a HUGR envelope.
+    ///
+    /// The file is memory-mapped and decoded in place, without the GIL. It
+    /// must not be modified while it is being read.
+    ///
+    /// If the name is not given, uses the encoded entrypoint.
+    #[staticmethod]
+    #[pyo3(signature = (path, function_name = None))]
+    pub fn from_file(
+        py: Python<'_>,
+        path: PathBuf,
+        function_name: Option<String>,
+    ) -> PyResult<Self> {
+        let file = File::open(path)?;
+        // SAFETY: Modifying the file while it is mapped is undefined
+        // behaviour, as documented above.
+        let mmap = unsafe { memmap2::Mmap::map(&file)? };
+        py.allow_threads(|| load_envelope(&mmap, function_name))
     }
 
     /// Loads a circuit from a HUGR envelope string.
@@ -194,18 +302,7 @@ impl Tk2Circuit {
 
     /// Encode the circuit as a tket1 json utf8 bytes.
     pub fn to_tket1_json_bytes(&self) -> PyResult<Vec<u8>> {
-        // Try to simplify tuple pack-unpack pairs, and other operations not supported by pytket.
-        let circ = lower_to_pytket(&self.circ).convert_pyerrs()?;
-        serde_json::to_vec(
-            &SerialCircuit::encode(
-                &circ,
-                EncodeOptions::new().with_config(tket_qsystem::pytket::qsystem_encoder_config()),
-            )
-            .convert_pyerrs()?,
-        )
-        .map_err(|e| {
-            PyErr::new::<PyValueError, _>(format!("Could not encode pytket circuit to bytes: {e}"))
-        })
+        encode_tket1_json(&self.circ)
     }
 
     /// Decode a tket1 json utf8 bytes to a circuit.
@@ -255,14 +352,24 @@ impl Tk2Circuit {
         self.circ.num_operations()
     }
 
+    /// Returns statistics about the top-level operations of the circuit,
+    /// computed in a single traversal.
+    pub fn stats(&self, py: Python<'_>) -> PyCircuitStats {
+        py.allow_threads(|| PyCircuitStats::new(&self.circ))
+    }
+
     /// Returns a hash of the circuit.
-    pub fn hash(&self) -> u64 {
-        self.circ.circuit_hash(self.circ.parent()).unwrap()
+    ///
+    /// Raises a `ValueError` if the circuit is not a dataflow graph.
+    pub fn hash(&self) -> PyResult<u64> {
+        self.circ
+            .circuit_hash(self.circ.parent())
+            .map_err(|e| PyErr::new::<PyValueError, _>(format!("Could not hash circuit: {e}")))
     }
 
     /// Hash the circuit
-    pub fn __hash__(&self) -> isize {
-        self.hash() as isize
+    pub fn __hash__(&self) -> PyResult<isize> {
+        Ok(self.hash()? as isize)
     }
 
     /// Copy the circuit.
@@ -275,6 +382,14 @@ impl Tk2Circuit {
         Ok(self.clone())
     }
 
+    /// Pickle the circuit as a binary HUGR envelope.
+    pub fn __reduce__<'py>(
+        slf: &Bound<'py, Self>,
+    ) -> PyResult<(Bound<'py, PyAny>, (Bound<'py, PyAny>,))> {
+        let envelope = slf.borrow().to_bytes(slf.py(), None, None)?;
+        Ok((slf.get_type().getattr("from_bytes")?, (envelope,)))
+    }
+
     fn node_op(&self, node: PyNode) -> PyResult<Cow<'_, [u8]>> {
         let custom: ExtensionOp = self
             .circ
@@ -351,3 +466,52 @@ pub fn envelope_config_from_py(config: Bound<'_, PyAny>) -> PyResult<EnvelopeCon
 
     Ok(res)
 }
+
+/// Encode a circuit as tket1 json utf8 bytes.
+fn encode_tket1_json(circ: &Circuit) -> PyResult<Vec<u8>> {
+    // Try to simplify tuple pack-unpack pairs, and other operations not supported by pytket.
+    let circ = lower_to_pytket(circ).convert_pyerrs()?;
+    serde_json::to_vec(
+        &SerialCircuit::encode(
+            &circ,
+            EncodeOptions::new().with_config(tket_qsystem::pytket::qsystem_encoder_config()),
+        )
+        .convert_pyerrs()?,
+    )
+    .map_err(|e| {
+        PyErr::new::<PyValueError, _>(format!("Could not encode pytket circuit to bytes: {e}"))
+    })
+}
+
+/// Loads a circuit from a HUGR envelope.
+///
+/// If the name is not given, uses the encoded entrypoint.
+fn load_envelope(bytes: &[u8], function_name: Option<String>) -> PyResult<Tk2Circuit> {
+    fn err(e: impl Display) -> PyErr {
+        PyErr::new::<PyAttributeError, _>(format!("Could not read envelope: {e}"))
+    }
+    let circ = match function_name {
+        Some(name) => Circuit::load_function(bytes, name).map_err(err)?,
+        None => Circuit::load(bytes, None).map_err(err)?,
+    };
+    Ok(Tk2Circuit { circ })
+}
+
+/// An [`io::Write`] appending to a python `bytearray`.
+struct ByteArrayWriter<'a, 'py>(&'a Bound<'py, PyByteArray>);
+
+impl io::Write for ByteArrayWriter<'_, '_> {
+    fn write(&mut self, data: &[u8]) -> io::Result<usize> {
+        let start = self.0.len();
+        self.0
+            .resize(start + data.len())
+            .map_err(io::Error::other)?;
+        // SAFETY: No python code runs while the slice is borrowed.
+        unsafe { self.0.as_bytes_mut()[start..].copy_from_slice(data) };
+        Ok(data.len())
+    }
+
+    fn flush(&mut self) -> io::Result<()> {
+        Ok(())
+    }
+}
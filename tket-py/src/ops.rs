@@ -4,6 +4,7 @@ use derive_more::{From, Into};
 use hugr::{extension::simple_op::MakeExtensionOp, ops::custom::ExtensionOp};
 use pyo3::prelude::*;
 use std::fmt;
+use std::hash::{DefaultHasher, Hash, Hasher};
 use std::str::FromStr;
 use strum::IntoEnumIterator;
 
@@ -81,6 +82,13 @@ impl PyTketOp {
     pub fn __eq__(&self, other: &PyTketOp) -> bool {
         self.op == other.op
     }
+
+    /// Hash the operation, so it can be used as a dictionary key.
+    pub fn __hash__(&self) -> u64 {
+        let mut hasher = DefaultHasher::new();
+        self.op.hash(&mut hasher);
+        hasher.finish()
+    }
 }
 
 /// Iterator over the operations.
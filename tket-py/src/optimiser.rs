@@ -2,9 +2,17 @@
 
 use pyo3::prelude::*;
 
+use crate::utils::create_py_exception;
+
 mod badger;
 pub use badger::PyBadgerOptimiser;
 
+mod batch;
+pub use batch::PyBadgerBatchResult;
+
+mod job;
+pub use job::PyBadgerJob;
+
 mod seadog;
 pub use seadog::PySeadogOptimiser;
 
@@ -16,6 +24,15 @@ use cost_function::PyBadgerStrategy;
 pub fn module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
     let m = PyModule::new(py, "optimiser")?;
     m.add_class::<PyBadgerOptimiser>()?;
+    m.add_class::<PyBadgerJob>()?;
+    m.add_class::<PyBadgerBatchResult>()?;
     m.add_class::<PySeadogOptimiser>()?;
+    m.add("CheckpointError", py.get_type::<PyCheckpointError>())?;
     Ok(m)
 }
+
+create_py_exception!(
+    tket::optimiser::badger::CheckpointError,
+    PyCheckpointError,
+    "Errors that can occur while saving or loading a Badger checkpoint."
+);
@@ -1,23 +1,36 @@
 use std::io::BufWriter;
+use std::time::Duration;
 use std::{fs, num::NonZeroUsize, path::PathBuf};
 
-use derive_more::derive::From;
 use pyo3::prelude::*;
-use tket::optimiser::badger::BadgerOptions;
-use tket::optimiser::{BadgerLogger, BadgerOptimiser};
+use pyo3::types::PyType;
+use tket::optimiser::badger::{
+    BadgerCheckpoint, BadgerOptions, BadgerStats, CheckpointError, CheckpointOptions,
+};
+use tket::optimiser::{BadgerLogger, BadgerOptimiser, StopSignal};
+use tket::resource::ResourceScope;
+use tket::rewrite::strategy::RewriteStrategy;
 use tket::Circuit;
 
-use super::{BadgerCostFunction, PyBadgerStrategy};
-use crate::circuit::update_circ;
+use super::batch::{self, PyBadgerBatchResult};
+use super::{BadgerCostFunction, PyBadgerJob, PyBadgerStrategy};
+use crate::circuit::{try_update_circ, try_with_circ, update_circ};
+use crate::passes::chunks::PySplitStrategy;
 use crate::rewrite::{PyECCRewriter, PyRewriter};
 
 /// Wrapped [`DefaultBadgerOptimiser`].
 ///
 /// Currently only exposes loading from an ECC file using the constructor
 /// and optimising using default logging settings.
-#[pyclass(name = "BadgerOptimiser")]
-#[derive(From, Clone)]
-pub struct PyBadgerOptimiser(BadgerOptimiser<PyRewriter, PyBadgerStrategy>);
+///
+/// The optimiser is pickled as its rewriter and cost function.
+#[pyclass(name = "BadgerOptimiser", module = "tket._tket.optimiser")]
+#[derive(Clone)]
+pub struct PyBadgerOptimiser(
+    BadgerOptimiser<PyRewriter, PyBadgerStrategy>,
+    /// The cost function of the optimiser, kept for pickling.
+    BadgerCostFunction,
+);
 
 #[pymethods]
 impl PyBadgerOptimiser {
@@ -25,16 +38,23 @@ impl PyBadgerOptimiser {
     #[new]
     #[pyo3(signature = (rewriter, cost_fn=None))]
     pub fn new(rewriter: PyRewriter, cost_fn: Option<BadgerCostFunction>) -> Self {
-        BadgerOptimiser::new(rewriter, cost_fn.unwrap_or_default().into_strategy()).into()
+        let cost_fn = cost_fn.unwrap_or_default();
+        Self(
+            BadgerOptimiser::new(rewriter, cost_fn.clone().into_strategy()),
+            cost_fn,
+        )
     }
 
     /// Create a new [`PyDefaultBadgerOptimiser`] from a precompiled rewriter.
     #[staticmethod]
     #[pyo3(signature = (path, cost_fn=None))]
-    pub fn load_precompiled(path: PathBuf, cost_fn: Option<BadgerCostFunction>) -> Self {
-        let rewriter = PyECCRewriter::load_precompiled(path).unwrap();
-        let cost_fn = cost_fn.unwrap_or_default();
-        BadgerOptimiser::new(PyRewriter::ECC(rewriter), cost_fn.into_strategy()).into()
+    pub fn load_precompiled(
+        py: Python<'_>,
+        path: PathBuf,
+        cost_fn: Option<BadgerCostFunction>,
+    ) -> Self {
+        let rewriter = PyECCRewriter::load_precompiled(py, path).unwrap();
+        Self::new(PyRewriter::ECC(rewriter), cost_fn)
     }
 
     /// Create a new [`PyDefaultBadgerOptimiser`] from ECC sets.
@@ -42,10 +62,23 @@ impl PyBadgerOptimiser {
     /// This will compile the rewriter from the provided ECC JSON file.
     #[staticmethod]
     #[pyo3(signature = (path, cost_fn=None))]
-    pub fn compile_eccs(path: &str, cost_fn: Option<BadgerCostFunction>) -> Self {
-        let rewriter = PyECCRewriter::compile_eccs(path).unwrap();
-        let cost_fn = cost_fn.unwrap_or_default();
-        BadgerOptimiser::new(PyRewriter::ECC(rewriter), cost_fn.into_strategy()).into()
+    pub fn compile_eccs(py: Python<'_>, path: &str, cost_fn: Option<BadgerCostFunction>) -> Self {
+        let rewriter = PyECCRewriter::compile_eccs(py, path).unwrap();
+        Self::new(PyRewriter::ECC(rewriter), cost_fn)
+    }
+
+    /// Pickle the optimiser as its rewriter and cost function.
+    ///
+    /// Custom cost functions must themselves be picklable.
+    fn __reduce__<'py>(
+        slf: &Bound<'py, Self>,
+    ) -> PyResult<(Bound<'py, PyType>, (PyRewriter, Bound<'py, PyAny>))> {
+        let py = slf.py();
+        let this = slf.borrow();
+        Ok((
+            slf.get_type(),
+            (this.0.rewriter().clone(), this.1.to_object(py)),
+        ))
     }
 
     /// Run the optimiser on a circuit.
@@ -53,6 +86,10 @@ impl PyBadgerOptimiser {
     /// Returns an optimised circuit and optionally log the progress to a CSV
     /// file.
     ///
+    /// The GIL is released while the optimiser runs, so other Python threads
+    /// can make progress. Python cost functions and rewriters only reacquire
+    /// it for the duration of each call.
+    ///
     /// # Parameters
     ///
     /// * `circ`: The circuit to optimise.
@@ -94,9 +131,22 @@ impl PyBadgerOptimiser {
     ///   queue. Defaults to `20`.
     ///
     /// * `log_progress`: The path to a CSV file to log progress to.
+    ///
+    /// * `checkpoint`: The path to a checkpoint file. The search state is
+    ///   saved to it periodically, and if the file already exists the
+    ///   optimisation resumes from it. Raises a `CheckpointError` if the file
+    ///   was written while optimising a different circuit. Only supported on
+    ///   a single thread.
+    ///
+    /// * `checkpoint_interval`: The minimum time (in seconds) between two
+    ///   checkpoints. Defaults to `60`.
+    ///
+    /// * `split_strategy`: How to choose the chunk boundaries when
+    ///   `split_circ` is set. Either `"greedy"` (default) or `"min_boundary"`,
+    ///   which minimises the number of wires between chunks.
     #[pyo3(name = "optimise")]
     #[allow(clippy::too_many_arguments)]
-    #[pyo3(signature = (circ, timeout=None, progress_timeout=None, max_circuit_count=None, n_threads=None, split_circ=None, queue_size=None, log_progress=None))]
+    #[pyo3(signature = (circ, timeout=None, progress_timeout=None, max_circuit_count=None, n_threads=None, split_circ=None, queue_size=None, log_progress=None, checkpoint=None, checkpoint_interval=None, split_strategy=None))]
     pub fn py_optimise<'py>(
         &self,
         circ: &Bound<'py, PyAny>,
@@ -107,20 +157,153 @@ impl PyBadgerOptimiser {
         split_circ: Option<bool>,
         queue_size: Option<usize>,
         log_progress: Option<PathBuf>,
+        checkpoint: Option<PathBuf>,
+        checkpoint_interval: Option<f64>,
+        split_strategy: Option<PySplitStrategy>,
     ) -> PyResult<Bound<'py, PyAny>> {
-        let options = BadgerOptions {
+        let options = badger_options(
             timeout,
             progress_timeout,
             max_circuit_count,
-            n_threads: n_threads.unwrap_or(NonZeroUsize::new(1).unwrap()),
-            split_circuit: split_circ.unwrap_or(false),
-            queue_size: queue_size.unwrap_or(100),
+            n_threads,
+            split_circ,
+            split_strategy,
+            queue_size,
+        );
+        let py = circ.py();
+        let Some(checkpoint) = checkpoint else {
+            return update_circ(circ, |circ, _| {
+                py.allow_threads(|| self.optimise(circ, log_progress, options))
+            });
         };
-        update_circ(circ, |circ, _| self.optimise(circ, log_progress, options))
+        let mut checkpoint = CheckpointOptions::new(checkpoint);
+        if let Some(interval) = checkpoint_interval {
+            checkpoint = checkpoint.with_interval(Duration::from_secs_f64(interval));
+        }
+        try_update_circ(circ, |circ, _| {
+            py.allow_threads(|| {
+                self.optimise_with_checkpoints(circ, log_progress, options, &checkpoint)
+            })
+        })
+    }
+
+    /// Start optimising a circuit in a background thread.
+    ///
+    /// Takes the same parameters as [`Self::py_optimise`], and returns
+    /// immediately with a [`PyBadgerJob`] handle that can be used to follow
+    /// the progress of the optimisation, cancel it, or wait for its result.
+    #[allow(clippy::too_many_arguments)]
+    #[pyo3(signature = (circ, timeout=None, progress_timeout=None, max_circuit_count=None, n_threads=None, split_circ=None, queue_size=None, log_progress=None, split_strategy=None))]
+    pub fn start(
+        &self,
+        circ: &Bound<'_, PyAny>,
+        timeout: Option<u64>,
+        progress_timeout: Option<u64>,
+        max_circuit_count: Option<usize>,
+        n_threads: Option<NonZeroUsize>,
+        split_circ: Option<bool>,
+        queue_size: Option<usize>,
+        log_progress: Option<PathBuf>,
+        split_strategy: Option<PySplitStrategy>,
+    ) -> PyResult<PyBadgerJob> {
+        let options = badger_options(
+            timeout,
+            progress_timeout,
+            max_circuit_count,
+            n_threads,
+            split_circ,
+            split_strategy,
+            queue_size,
+        );
+        try_with_circ(circ, |circ, typ| {
+            PyBadgerJob::spawn(self.clone(), circ, typ, log_progress, options)
+        })
+    }
+
+    /// Optimise a batch of circuits on a shared pool of threads.
+    ///
+    /// Each circuit is optimised by a single-threaded search, and up to
+    /// `n_threads` circuits are optimised in parallel. The rewriter is shared
+    /// between all the searches. The GIL is released while the optimiser runs.
+    ///
+    /// Returns a [`PyBadgerBatchResult`] for each circuit, in input order.
+    ///
+    /// # Parameters
+    ///
+    /// * `circuits`: The circuits to optimise.
+    ///
+    /// * `timeout`, `progress_timeout`, `max_circuit_count`, `queue_size`: As
+    ///   in [`Self::py_optimise`], applied to each circuit separately.
+    ///
+    /// * `n_threads`: The number of threads in the pool. Defaults to the
+    ///   number of CPUs.
+    ///
+    /// * `on_result`: A callable invoked with each result as soon as its
+    ///   circuit has been optimised, in completion order.
+    #[allow(clippy::too_many_arguments)]
+    #[pyo3(signature = (circuits, timeout=None, progress_timeout=None, max_circuit_count=None, n_threads=None, queue_size=None, on_result=None))]
+    pub fn optimise_batch(
+        &self,
+        py: Python<'_>,
+        circuits: Vec<Bound<'_, PyAny>>,
+        timeout: Option<u64>,
+        progress_timeout: Option<u64>,
+        max_circuit_count: Option<usize>,
+        n_threads: Option<NonZeroUsize>,
+        queue_size: Option<usize>,
+        on_result: Option<Py<PyAny>>,
+    ) -> PyResult<Vec<Py<PyBadgerBatchResult>>> {
+        let options = badger_options(
+            timeout,
+            progress_timeout,
+            max_circuit_count,
+            None,
+            None,
+            None,
+            queue_size,
+        );
+        batch::optimise_batch(py, self, &circuits, options, n_threads, on_result)
     }
 }
 
 impl PyBadgerOptimiser {
+    /// Optimise a circuit while saving checkpoints, resuming from the
+    /// checkpoint file if it already exists.
+    pub(crate) fn optimise_with_checkpoints(
+        &self,
+        circ: Circuit,
+        log_progress: Option<PathBuf>,
+        options: BadgerOptions,
+        checkpoint: &CheckpointOptions,
+    ) -> Result<Circuit, CheckpointError> {
+        let badger_logger = badger_logger(log_progress);
+        if checkpoint.path.exists() {
+            let saved = BadgerCheckpoint::load(&checkpoint.path)?;
+            saved.check_input(&circ)?;
+            Ok(self
+                .0
+                .resume_from_checkpoint(&saved, badger_logger, options, Some(checkpoint)))
+        } else {
+            Ok(self
+                .0
+                .optimise_with_checkpoints(&circ, badger_logger, options, checkpoint))
+        }
+    }
+
+    /// Optimise a circuit on the current thread, returning statistics about
+    /// the search.
+    pub(crate) fn optimise_with_stats(
+        &self,
+        circ: Circuit,
+        options: BadgerOptions,
+    ) -> (
+        Circuit,
+        BadgerStats<<PyBadgerStrategy as RewriteStrategy>::Cost>,
+    ) {
+        self.0
+            .optimise_with_stats(&circ, BadgerLogger::default(), options)
+    }
+
     /// The Python optimise method, but on Hugrs.
     pub(crate) fn optimise(
         &self,
@@ -128,13 +311,56 @@ impl PyBadgerOptimiser {
         log_progress: Option<PathBuf>,
         options: BadgerOptions,
     ) -> Circuit {
-        let badger_logger = log_progress
-            .map(|file_name| {
-                let log_file = fs::File::create(file_name).unwrap();
-                let log_file = BufWriter::new(log_file);
-                BadgerLogger::new(log_file)
-            })
-            .unwrap_or_default();
-        self.0.optimise_with_log(&circ, badger_logger, options)
+        self.optimise_with_callback(circ, log_progress, options, &StopSignal::new(), |_, _| {})
+    }
+
+    /// Optimise a circuit, reporting every new best circuit to `on_best` and
+    /// stopping early once `stop_signal` is set.
+    pub(crate) fn optimise_with_callback(
+        &self,
+        circ: Circuit,
+        log_progress: Option<PathBuf>,
+        options: BadgerOptions,
+        stop_signal: &StopSignal,
+        on_best: impl FnMut(&ResourceScope, &<PyBadgerStrategy as RewriteStrategy>::Cost),
+    ) -> Circuit {
+        let badger_logger = badger_logger(log_progress);
+        self.0
+            .optimise_with_callback(&circ, badger_logger, options, stop_signal, on_best)
+    }
+}
+
+/// A logger writing progress to a CSV file, if a path is given.
+fn badger_logger(log_progress: Option<PathBuf>) -> BadgerLogger<'static> {
+    log_progress
+        .map(|file_name| {
+            let log_file = fs::File::create(file_name).unwrap();
+            let log_file = BufWriter::new(log_file);
+            BadgerLogger::new(log_file)
+        })
+        .unwrap_or_default()
+}
+
+/// Build the [`BadgerOptions`] from the Python arguments, using the binding's
+/// defaults.
+fn badger_options(
+    timeout: Option<u64>,
+    progress_timeout: Option<u64>,
+    max_circuit_count: Option<usize>,
+    n_threads: Option<NonZeroUsize>,
+    split_circ: Option<bool>,
+    split_strategy: Option<PySplitStrategy>,
+    queue_size: Option<usize>,
+) -> BadgerOptions {
+    BadgerOptions {
+        timeout,
+        progress_timeout,
+        max_circuit_count,
+        n_threads: n_threads.unwrap_or(NonZeroUsize::new(1).unwrap()),
+        split_circuit: split_circ.unwrap_or(false),
+        split_strategy: split_strategy.unwrap_or_default().0,
+        split_shift: false,
+        split_halo: 0,
+        queue_size: queue_size.unwrap_or(100),
     }
 }
@@ -0,0 +1,108 @@
+//! Optimisation of a batch of circuits on a shared thread pool.
+
+use std::num::NonZeroUsize;
+use std::time::Instant;
+
+use pyo3::exceptions::PyRuntimeError;
+use pyo3::prelude::*;
+use rayon::prelude::*;
+use tket::circuit::cost::CircuitCost;
+use tket::optimiser::badger::BadgerOptions;
+
+use super::PyBadgerOptimiser;
+use crate::circuit::with_circ;
+
+/// The result of optimising one circuit of a batch.
+///
+/// Returned by `BadgerOptimiser.optimise_batch`.
+#[pyclass(name = "BadgerBatchResult", frozen)]
+pub struct PyBadgerBatchResult {
+    /// The position of the circuit in the input batch.
+    #[pyo3(get)]
+    index: usize,
+    /// The optimised circuit, in the same format as the input.
+    #[pyo3(get)]
+    circuit: Py<PyAny>,
+    /// The cost of the input circuit.
+    #[pyo3(get)]
+    initial_cost: usize,
+    /// The cost of the optimised circuit.
+    #[pyo3(get)]
+    final_cost: usize,
+    /// The number of circuits processed by the optimiser.
+    #[pyo3(get)]
+    circuits_processed: usize,
+    /// The number of distinct circuits seen by the optimiser.
+    #[pyo3(get)]
+    circuits_seen: usize,
+    /// The time spent optimising the circuit, in seconds.
+    #[pyo3(get)]
+    elapsed: f64,
+}
+
+#[pymethods]
+impl PyBadgerBatchResult {
+    fn __repr__(&self) -> String {
+        format!(
+            "BadgerBatchResult(index={}, initial_cost={}, final_cost={}, circuits_processed={}, elapsed={:.3})",
+            self.index, self.initial_cost, self.final_cost, self.circuits_processed, self.elapsed
+        )
+    }
+}
+
+/// Optimise each circuit in `circuits` with a single-threaded search, running
+/// up to `n_threads` searches in parallel.
+///
+/// The results are returned in input order. If `on_result` is given, it is
+/// called with each result as soon as the corresponding circuit is done.
+pub(super) fn optimise_batch(
+    py: Python<'_>,
+    optimiser: &PyBadgerOptimiser,
+    circuits: &[Bound<'_, PyAny>],
+    options: BadgerOptions,
+    n_threads: Option<NonZeroUsize>,
+    on_result: Option<Py<PyAny>>,
+) -> PyResult<Vec<Py<PyBadgerBatchResult>>> {
+    let inputs = circuits
+        .iter()
+        .map(|circ| with_circ(circ, |circ, typ| (circ, typ)))
+        .collect::<PyResult<Vec<_>>>()?;
+    let n_threads = n_threads.map_or_else(num_cpus::get, NonZeroUsize::get);
+    let pool = rayon::ThreadPoolBuilder::new()
+        .num_threads(n_threads)
+        .thread_name(|i| format!("badger-batch-{i}"))
+        .build()
+        .map_err(|e| PyRuntimeError::new_err(e.to_string()))?;
+
+    py.allow_threads(|| {
+        pool.install(|| {
+            inputs
+                .into_par_iter()
+                .enumerate()
+                .map(|(index, (circ, typ))| {
+                    let start_time = Instant::now();
+                    let (circ, stats) = optimiser.optimise_with_stats(circ, options);
+                    let elapsed = start_time.elapsed().as_secs_f64();
+                    Python::with_gil(|py| {
+                        let result = Py::new(
+                            py,
+                            PyBadgerBatchResult {
+                                index,
+                                circuit: typ.convert(py, circ)?.unbind(),
+                                initial_cost: stats.initial_cost.as_usize(),
+                                final_cost: stats.final_cost.as_usize(),
+                                circuits_processed: stats.circuits_processed,
+                                circuits_seen: stats.circuits_seen,
+                                elapsed,
+                            },
+                        )?;
+                        if let Some(on_result) = &on_result {
+                            on_result.call1(py, (result.clone_ref(py),))?;
+                        }
+                        Ok(result)
+                    })
+                })
+                .collect()
+        })
+    })
+}
@@ -1,9 +1,13 @@
-use std::sync::Arc;
+use std::collections::HashMap;
+use std::sync::{Arc, OnceLock, RwLock};
 
 use hugr::extension::simple_op::MakeExtensionOp;
+use hugr::ops::custom::ExtensionOp;
 use hugr::ops::OpType;
-use pyo3::exceptions::PyValueError;
+use pyo3::exceptions::{PyTypeError, PyValueError};
 use pyo3::prelude::*;
+use pyo3::types::{PyMapping, PyString};
+use strum::IntoEnumIterator;
 use tket::rewrite::strategy::{ExhaustiveGreedyStrategy, LexicographicCostFunction};
 use tket::TketOp;
 
@@ -17,8 +21,8 @@ pub enum BadgerCostFunction {
     CXCount,
     /// Minimise Rz count.
     RzCount,
-    /// Custom cost function.
-    Custom(Arc<dyn Fn(&OpType) -> usize + Send + Sync>),
+    /// Custom cost function, along with the python object it was built from.
+    Custom(Arc<dyn Fn(&OpType) -> usize + Send + Sync>, Py<PyAny>),
 }
 
 pub(super) type PyBadgerStrategy = ExhaustiveGreedyStrategy<
@@ -30,10 +34,22 @@ impl BadgerCostFunction {
         let cost_fn = match self {
             BadgerCostFunction::CXCount => LexicographicCostFunction::cx_count().into(),
             BadgerCostFunction::RzCount => LexicographicCostFunction::rz_count().into(),
-            BadgerCostFunction::Custom(cost_fn) => LexicographicCostFunction::from_cost_fn(cost_fn),
+            BadgerCostFunction::Custom(cost_fn, _) => {
+                LexicographicCostFunction::from_cost_fn(cost_fn)
+            }
         };
         cost_fn.into_greedy_strategy()
     }
+
+    /// The python object describing the cost function, as accepted when
+    /// extracting a [`BadgerCostFunction`].
+    pub(super) fn to_object<'py>(&self, py: Python<'py>) -> Bound<'py, PyAny> {
+        match self {
+            BadgerCostFunction::CXCount => PyString::new(py, "cx").into_any(),
+            BadgerCostFunction::RzCount => PyString::new(py, "rz").into_any(),
+            BadgerCostFunction::Custom(_, source) => source.bind(py).clone(),
+        }
+    }
 }
 
 impl<'py> FromPyObject<'py> for BadgerCostFunction {
@@ -47,27 +63,145 @@ impl<'py> FromPyObject<'py> for BadgerCostFunction {
                 ))),
             };
         }
-        // not a string, interpret it as a callable
-        let cost_fn = ob.to_owned().unbind();
-        Ok(BadgerCostFunction::Custom(Arc::new(move |op| {
-            let Some(ext_op) = op.as_extension_op() else {
-                return 0;
-            };
-            if let Ok(tket_op) = TketOp::from_extension_op(ext_op) {
-                Python::with_gil(|py| {
-                    cost_fn
-                        .call1(py, (PyTketOp::from(tket_op),))
-                        .and_then(|v| v.extract(py))
-                })
-                .unwrap()
+        if let Ok(mapping) = ob.downcast::<PyMapping>() {
+            let table = CostTable::from_mapping(mapping)?;
+            return Ok(BadgerCostFunction::Custom(
+                Arc::new(move |op| table.cost(op)),
+                ob.to_owned().unbind(),
+            ));
+        }
+        if !ob.is_callable() {
+            return Err(PyErr::new::<PyValueError, _>(
+                "Invalid cost function. Expected 'cx', 'rz', a mapping from operations to costs, or a callable.",
+            ));
+        }
+        let memo = MemoizedCostFn::new(ob.to_owned().unbind());
+        Ok(BadgerCostFunction::Custom(
+            Arc::new(move |op| memo.cost(op)),
+            ob.to_owned().unbind(),
+        ))
+    }
+}
+
+/// A cost function given as a table of operation costs.
+///
+/// Operations missing from the table have zero cost.
+struct CostTable {
+    /// The cost of each tket operation.
+    tket_ops: HashMap<TketOp, usize>,
+    /// The cost of other extension operations, by qualified name.
+    ext_ops: HashMap<String, usize>,
+}
+
+impl CostTable {
+    /// Read a table from a python mapping.
+    ///
+    /// Keys are either `TketOp`s, native or from the python `tket.ops` module,
+    /// or operation names. Names are interpreted as `TketOp`s when possible,
+    /// and as qualified extension operation names otherwise.
+    fn from_mapping(mapping: &Bound<'_, PyMapping>) -> PyResult<Self> {
+        let mut tket_ops = HashMap::new();
+        let mut ext_ops = HashMap::new();
+        for item in mapping.items()?.iter() {
+            let (key, cost): (Bound<'_, PyAny>, usize) = item.extract()?;
+            if let Ok(op) = key.extract::<PyTketOp>() {
+                tket_ops.insert(op.op, cost);
+            } else if let Ok(name) = key.extract::<String>() {
+                match name.parse::<TketOp>() {
+                    Ok(op) => tket_ops.insert(op, cost),
+                    Err(_) => ext_ops.insert(name, cost),
+                };
             } else {
-                Python::with_gil(|py| {
-                    cost_fn
-                        .call1(py, (PyExtensionOp::from(ext_op.clone()),))
-                        .and_then(|v| v.extract(py))
-                })
-                .unwrap()
+                // Members of the python `tket.ops.TketOp` enum.
+                let op: PyTketOp = key
+                    .call_method0("_to_rs")
+                    .and_then(|op| op.extract())
+                    .map_err(|_| {
+                        PyTypeError::new_err(format!(
+                            "Invalid cost table key: {key}. Expected a TketOp or an operation name."
+                        ))
+                    })?;
+                tket_ops.insert(op.op, cost);
             }
-        })))
+        }
+        Ok(Self { tket_ops, ext_ops })
+    }
+
+    fn cost(&self, op: &OpType) -> usize {
+        let Some(ext_op) = op.as_extension_op() else {
+            return 0;
+        };
+        let cost = match TketOp::from_extension_op(ext_op) {
+            Ok(tket_op) => self.tket_ops.get(&tket_op),
+            Err(_) => self.ext_ops.get(&qualified_name(ext_op)),
+        };
+        cost.copied().unwrap_or_default()
     }
 }
+
+/// A python cost function, memoised per operation.
+///
+/// The python callable is only called the first time an operation is seen,
+/// so the GIL is not taken once the costs of all the operations in the
+/// circuit are known. Costs of `TketOp`s are then read without locking.
+struct MemoizedCostFn {
+    /// The python callable.
+    cost_fn: Py<PyAny>,
+    /// The cost of each tket operation, once computed.
+    tket_ops: HashMap<TketOp, OnceLock<usize>>,
+    /// The cost of other extension operations, keyed by their qualified name
+    /// and arguments.
+    ext_ops: RwLock<HashMap<String, usize>>,
+}
+
+impl MemoizedCostFn {
+    fn new(cost_fn: Py<PyAny>) -> Self {
+        Self {
+            cost_fn,
+            tket_ops: TketOp::iter().map(|op| (op, OnceLock::new())).collect(),
+            ext_ops: RwLock::default(),
+        }
+    }
+
+    fn cost(&self, op: &OpType) -> usize {
+        let Some(ext_op) = op.as_extension_op() else {
+            return 0;
+        };
+        if let Ok(tket_op) = TketOp::from_extension_op(ext_op) {
+            let cell = &self.tket_ops[&tket_op];
+            if let Some(&cost) = cell.get() {
+                return cost;
+            }
+            // Computed outside of the cell's initialisation, so that a thread
+            // holding the GIL never waits on one trying to acquire it.
+            let cost = self.call(PyTketOp::from(tket_op));
+            let _ = cell.set(cost);
+            cost
+        } else {
+            let key = format!(
+                "{}[{}]",
+                qualified_name(ext_op),
+                serde_json::to_string(ext_op.args()).unwrap()
+            );
+            if let Some(&cost) = self.ext_ops.read().unwrap().get(&key) {
+                return cost;
+            }
+            let cost = self.call(PyExtensionOp::from(ext_op.clone()));
+            self.ext_ops.write().unwrap().insert(key, cost);
+            cost
+        }
+    }
+
+    /// Call the python cost function on an operation.
+    fn call<T>(&self, op: T) -> usize
+    where
+        T: for<'py> IntoPyObject<'py>,
+    {
+        Python::with_gil(|py| self.cost_fn.call1(py, (op,)).and_then(|v| v.extract(py))).unwrap()
+    }
+}
+
+/// The qualified name of an extension operation.
+fn qualified_name(op: &ExtensionOp) -> String {
+    format!("{}.{}", op.def().extension_id(), op.def().name())
+}
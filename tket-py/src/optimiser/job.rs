@@ -0,0 +1,184 @@
+//! A handle on a Badger optimisation running in a background thread.
+
+use std::path::PathBuf;
+use std::sync::{Arc, Mutex};
+use std::thread;
+use std::time::{Duration, Instant};
+
+use crossbeam_channel::{Receiver, RecvTimeoutError};
+use pyo3::exceptions::PyRuntimeError;
+use pyo3::prelude::*;
+use tket::circuit::cost::CircuitCost;
+use tket::optimiser::badger::BadgerOptions;
+use tket::optimiser::StopSignal;
+use tket::Circuit;
+
+use super::PyBadgerOptimiser;
+use crate::circuit::CircuitType;
+
+/// An improvement found by a running optimisation.
+struct BadgerEvent {
+    /// Seconds elapsed since the start of the optimisation.
+    elapsed: f64,
+    /// The cost of the new best circuit.
+    cost: usize,
+    /// The new best circuit.
+    circ: Circuit,
+}
+
+/// A Badger optimisation running in a background thread.
+///
+/// Returned by `BadgerOptimiser.start`. The optimisation runs without holding
+/// the GIL. Iterating over the job yields `(elapsed, cost, circuit)` tuples for
+/// every new best circuit, until the optimisation terminates.
+///
+/// Dropping the job cancels the optimisation.
+#[pyclass(name = "BadgerJob")]
+pub struct PyBadgerJob {
+    /// Signal to terminate the optimisation early.
+    stop_signal: StopSignal,
+    /// The best circuit and cost found so far.
+    best: Arc<Mutex<Option<(usize, Circuit)>>>,
+    /// The final result, set once the optimisation terminates.
+    result: Arc<Mutex<Option<Circuit>>>,
+    /// Stream of improvements. Disconnected when the optimisation terminates.
+    events: Receiver<BadgerEvent>,
+    /// Never receives a message. Disconnected when the optimisation
+    /// terminates, successfully or not.
+    done: Receiver<()>,
+    /// The circuit format to return results in.
+    circuit_type: CircuitType,
+}
+
+impl PyBadgerJob {
+    /// Start optimising `circ` in a new thread.
+    pub(super) fn spawn(
+        optimiser: PyBadgerOptimiser,
+        circ: Circuit,
+        circuit_type: CircuitType,
+        log_progress: Option<PathBuf>,
+        options: BadgerOptions,
+    ) -> PyResult<Self> {
+        let stop_signal = StopSignal::new();
+        let best = Arc::new(Mutex::new(None));
+        let result = Arc::new(Mutex::new(None));
+        let (tx_events, events) = crossbeam_channel::unbounded();
+        let (tx_done, done) = crossbeam_channel::bounded::<()>(0);
+
+        let job = Self {
+            stop_signal: stop_signal.clone(),
+            best: best.clone(),
+            result: result.clone(),
+            events,
+            done,
+            circuit_type,
+        };
+
+        thread::Builder::new()
+            .name("badger-job".into())
+            .spawn(move || {
+                // Dropped when the thread terminates, waking up any waiters.
+                let _tx_done = tx_done;
+                let start_time = Instant::now();
+                let res = optimiser.optimise_with_callback(
+                    circ,
+                    log_progress,
+                    options,
+                    &stop_signal,
+                    |best_circ, cost| {
+                        let cost = cost.as_usize();
+                        let circ = Circuit::new(best_circ.hugr().clone());
+                        *best.lock().unwrap() = Some((cost, circ.clone()));
+                        let _ = tx_events.send(BadgerEvent {
+                            elapsed: start_time.elapsed().as_secs_f64(),
+                            cost,
+                            circ,
+                        });
+                    },
+                );
+                *result.lock().unwrap() = Some(res);
+            })?;
+
+        Ok(job)
+    }
+}
+
+impl Drop for PyBadgerJob {
+    fn drop(&mut self) {
+        self.stop_signal.stop();
+    }
+}
+
+#[pymethods]
+impl PyBadgerJob {
+    /// Request the optimisation to stop.
+    ///
+    /// The optimisation terminates shortly afterwards, and its result is the
+    /// best circuit found so far.
+    pub fn cancel(&self) {
+        self.stop_signal.stop();
+    }
+
+    /// Whether the optimisation has terminated.
+    pub fn done(&self) -> bool {
+        matches!(
+            self.done.try_recv(),
+            Err(crossbeam_channel::TryRecvError::Disconnected)
+        )
+    }
+
+    /// The best circuit found so far, or `None` if the optimisation has not
+    /// started yet.
+    pub fn best_so_far<'py>(&self, py: Python<'py>) -> PyResult<Option<Bound<'py, PyAny>>> {
+        let best = self.best.lock().unwrap().as_ref().map(|(_, c)| c.clone());
+        best.map(|circ| self.circuit_type.convert(py, circ))
+            .transpose()
+    }
+
+    /// The cost of the best circuit found so far.
+    pub fn best_cost(&self) -> Option<usize> {
+        self.best.lock().unwrap().as_ref().map(|(cost, _)| *cost)
+    }
+
+    /// Wait for the optimisation to terminate and return the optimised circuit.
+    ///
+    /// If `timeout` (in seconds) is given and the optimisation has not
+    /// terminated by then, returns `None`.
+    #[pyo3(signature = (timeout=None))]
+    pub fn result<'py>(
+        &self,
+        py: Python<'py>,
+        timeout: Option<f64>,
+    ) -> PyResult<Option<Bound<'py, PyAny>>> {
+        let finished = py.allow_threads(|| match timeout {
+            None => {
+                let _ = self.done.recv();
+                true
+            }
+            Some(t) => !matches!(
+                self.done.recv_timeout(Duration::from_secs_f64(t)),
+                Err(RecvTimeoutError::Timeout)
+            ),
+        });
+        if !finished {
+            return Ok(None);
+        }
+        let Some(circ) = self.result.lock().unwrap().clone() else {
+            return Err(PyRuntimeError::new_err("The Badger optimisation failed."));
+        };
+        self.circuit_type.convert(py, circ).map(Some)
+    }
+
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    /// Wait for the next improvement, as a `(elapsed, cost, circuit)` tuple.
+    fn __next__<'py>(&self, py: Python<'py>) -> PyResult<Option<(f64, usize, Bound<'py, PyAny>)>> {
+        let Ok(event) = py.allow_threads(|| self.events.recv()) else {
+            return Ok(None);
+        };
+        let circ = self.circuit_type.convert(py, event.circ)?;
+        Ok(Some((event.elapsed, event.cost, circ)))
+    }
+}
@@ -79,7 +79,10 @@ impl PySeadogOptimiser {
             save_rewrite_space,
             ..SeadogOptions::default()
         };
-        update_circ(circ, |circ, _| self.optimise(circ, options))
+        let py = circ.py();
+        update_circ(circ, |circ, _| {
+            py.allow_threads(|| self.optimise(circ, options))
+        })
     }
 }
 
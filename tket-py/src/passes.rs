@@ -83,7 +83,8 @@ fn normalize_guppy<'py>(
             .remove_dead_funcs(remove_dead_funcs)
             .inline_dfgs(inline_dfgs);
 
-        pass.run(circ.hugr_mut()).convert_pyerrs()?;
+        py.allow_threads(|| pass.run(circ.hugr_mut()))
+            .convert_pyerrs()?;
 
         let circ = typ.convert(py, circ)?;
         PyResult::Ok(circ)
@@ -95,7 +96,9 @@ fn normalize_guppy<'py>(
 fn greedy_depth_reduce<'py>(circ: &Bound<'py, PyAny>) -> PyResult<(Bound<'py, PyAny>, u32)> {
     let py = circ.py();
     try_with_circ(circ, |mut circ, typ| {
-        let n_moves = passes::apply_greedy_commutation(&mut circ).convert_pyerrs()?;
+        let n_moves = py
+            .allow_threads(|| passes::apply_greedy_commutation(&mut circ))
+            .convert_pyerrs()?;
         let circ = typ.convert(py, circ)?;
         PyResult::Ok((circ, n_moves))
     })
@@ -158,9 +161,16 @@ fn lower_to_pytket<'py>(circ: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyAny>>
 /// - `max_circuit_count` (default: None) circuits have been explored.
 ///
 /// Log files will be written to the directory `log_dir` if specified.
+///
+/// Each cycle splits the circuit into chunks at similar boundaries. If
+/// `shift_chunks` is set, the boundaries are shifted by half a chunk on every
+/// other cycle, so that patterns straddling a boundary can be found in the
+/// next cycle. If `chunk_halo` is non-zero, each cycle additionally optimises
+/// alternating chunks extended by `chunk_halo` gates into their neighbours,
+/// in two phases.
 #[pyfunction]
 #[allow(clippy::too_many_arguments)]
-#[pyo3(signature = (circ, optimiser, max_threads=None, timeout=None, progress_timeout=None, max_circuit_count=None, log_dir=None, rebase=None))]
+#[pyo3(signature = (circ, optimiser, max_threads=None, timeout=None, progress_timeout=None, max_circuit_count=None, log_dir=None, rebase=None, shift_chunks=None, chunk_halo=None))]
 fn badger_optimise<'py>(
     circ: &Bound<'py, PyAny>,
     optimiser: &PyBadgerOptimiser,
@@ -170,9 +180,13 @@ fn badger_optimise<'py>(
     max_circuit_count: Option<usize>,
     log_dir: Option<PathBuf>,
     rebase: Option<bool>,
+    shift_chunks: Option<bool>,
+    chunk_halo: Option<usize>,
 ) -> PyResult<Bound<'py, PyAny>> {
     // Default parameter values
     let rebase = rebase.unwrap_or(true);
+    let shift_chunks = shift_chunks.unwrap_or(false);
+    let chunk_halo = chunk_halo.unwrap_or(0);
     let max_threads = max_threads.unwrap_or(num_cpus::get().try_into().unwrap());
     let timeout = timeout.unwrap_or(30);
     // Create log directory if necessary
@@ -197,33 +211,40 @@ fn badger_optimise<'py>(
         1 => (vec![1], vec![timeout]),
         _ => unreachable!(),
     };
-    // Optimise
+    // Optimise. The GIL is released while the search runs.
+    let py = circ.py();
     try_update_circ(circ, |mut circ, _| {
-        let n_cx = circ
-            .commands()
-            .filter(|c| op_matches(c.optype(), TketOp::CX))
-            .count();
-        let n_threads = min(
-            (n_cx / 50).try_into().unwrap_or(1.try_into().unwrap()),
-            max_threads,
-        );
-        let (split_threads, split_timeouts) = badger_splits(n_threads);
-        for (i, (n_threads, timeout)) in split_threads.into_iter().zip(split_timeouts).enumerate() {
-            let log_file = log_dir.as_ref().map(|log_dir| {
-                let mut log_file = log_dir.clone();
-                log_file.push(format!("cycle-{i}.log"));
-                log_file
-            });
-            let options = BadgerOptions {
-                timeout: Some(timeout),
-                progress_timeout,
-                n_threads: n_threads.try_into().unwrap(),
-                split_circuit: true,
-                max_circuit_count,
-                ..Default::default()
-            };
-            circ = optimiser.optimise(circ, log_file, options);
-        }
+        py.allow_threads(|| {
+            let n_cx = circ
+                .commands()
+                .filter(|c| op_matches(c.optype(), TketOp::CX))
+                .count();
+            let n_threads = min(
+                (n_cx / 50).try_into().unwrap_or(1.try_into().unwrap()),
+                max_threads,
+            );
+            let (split_threads, split_timeouts) = badger_splits(n_threads);
+            for (i, (n_threads, timeout)) in
+                split_threads.into_iter().zip(split_timeouts).enumerate()
+            {
+                let log_file = log_dir.as_ref().map(|log_dir| {
+                    let mut log_file = log_dir.clone();
+                    log_file.push(format!("cycle-{i}.log"));
+                    log_file
+                });
+                let options = BadgerOptions {
+                    timeout: Some(timeout),
+                    progress_timeout,
+                    n_threads: n_threads.try_into().unwrap(),
+                    split_circuit: true,
+                    split_shift: shift_chunks && i % 2 == 1,
+                    split_halo: chunk_halo,
+                    max_circuit_count,
+                    ..Default::default()
+                };
+                circ = optimiser.optimise(circ, log_file, options);
+            }
+        });
         PyResult::Ok(circ)
     })
 }
@@ -1,24 +1,59 @@
 //! Circuit chunking utilities.
 
+use std::num::NonZeroUsize;
+
 use derive_more::From;
-use pyo3::exceptions::PyAttributeError;
+use pyo3::exceptions::{PyAttributeError, PyRuntimeError, PyValueError};
 use pyo3::prelude::*;
-use tket::passes::CircuitChunks;
+use rayon::prelude::*;
+use tket::optimiser::badger::BadgerOptions;
+use tket::passes::{apply_greedy_commutation, CircuitChunks, SplitStrategy};
+use tket::Circuit;
 
+use super::tket1::run_tket1_pass;
 use crate::circuit::CircuitType;
 use crate::circuit::{try_with_circ, with_circ};
+use crate::optimiser::PyBadgerOptimiser;
 use crate::utils::ConvertPyErr;
 
 /// Split a circuit into chunks of a given size.
+///
+/// `strategy` selects how the chunk boundaries are chosen, either `"greedy"`
+/// (default) or `"min_boundary"`.
 #[pyfunction]
-pub fn chunks(c: &Bound<PyAny>, max_chunk_size: usize) -> PyResult<PyCircuitChunks> {
+#[pyo3(signature = (c, max_chunk_size, strategy=None))]
+pub fn chunks(
+    c: &Bound<PyAny>,
+    max_chunk_size: usize,
+    strategy: Option<PySplitStrategy>,
+) -> PyResult<PyCircuitChunks> {
     with_circ(c, |hugr, typ| {
         // TODO: Detect if the circuit is in tket1 format or Tk2Circuit.
-        let chunks = CircuitChunks::split(&hugr, max_chunk_size);
+        let chunks = match strategy.unwrap_or_default().0 {
+            SplitStrategy::Greedy => CircuitChunks::split(&hugr, max_chunk_size),
+            strategy => CircuitChunks::split_with_strategy(&hugr, max_chunk_size, |_| 1, strategy),
+        };
         (chunks, typ).into()
     })
 }
 
+/// A [`SplitStrategy`], given by name from python.
+#[derive(Debug, Clone, Copy, Default)]
+pub struct PySplitStrategy(pub SplitStrategy);
+
+impl<'py> FromPyObject<'py> for PySplitStrategy {
+    fn extract_bound(ob: &Bound<'py, PyAny>) -> PyResult<Self> {
+        let name: &str = ob.extract()?;
+        match name {
+            "greedy" => Ok(Self(SplitStrategy::Greedy)),
+            "min_boundary" => Ok(Self(SplitStrategy::MinBoundary)),
+            _ => Err(PyValueError::new_err(format!(
+                "Invalid split strategy: {name}. Expected 'greedy' or 'min_boundary'."
+            ))),
+        }
+    }
+}
+
 /// A pattern that match a circuit exactly
 ///
 /// Python equivalent of [`CircuitChunks`].
@@ -66,4 +101,121 @@ impl PyCircuitChunks {
             Ok(())
         })
     }
+
+    /// Applies a pass to every chunk in parallel, and reassembles the circuit.
+    ///
+    /// The chunks are updated in place. `chunk_pass` may be:
+    /// - a `BadgerOptimiser`, run single-threaded on each chunk with the given
+    ///   `timeout`, `progress_timeout` and `max_circuit_count`,
+    /// - a pytket `BasePass`, run with `tket1_pass`,
+    /// - the string `"greedy_depth_reduce"`,
+    /// - any other callable taking and returning a circuit. Python callables
+    ///   hold the GIL, so they are applied to one chunk at a time.
+    ///
+    /// Native passes run on a pool of `n_threads` threads (defaults to the
+    /// number of CPUs), without the GIL and without converting the chunks to
+    /// python objects.
+    #[pyo3(signature = (chunk_pass, n_threads=None, *, timeout=None, progress_timeout=None, max_circuit_count=None))]
+    fn map_parallel<'py>(
+        &mut self,
+        py: Python<'py>,
+        chunk_pass: &Bound<'py, PyAny>,
+        n_threads: Option<NonZeroUsize>,
+        timeout: Option<u64>,
+        progress_timeout: Option<u64>,
+        max_circuit_count: Option<usize>,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let options = BadgerOptions {
+            timeout,
+            progress_timeout,
+            max_circuit_count,
+            ..Default::default()
+        };
+        // Keep the optimiser borrowed while the worker threads use it.
+        let optimiser = chunk_pass.extract::<PyRef<'py, PyBadgerOptimiser>>().ok();
+        let native = match &optimiser {
+            Some(optimiser) => Some(ChunkPass::Badger(optimiser, options)),
+            None => ChunkPass::extract(chunk_pass)?,
+        };
+
+        let Some(native) = native else {
+            // A python callable, applied to one chunk at a time.
+            for index in 0..self.chunks.len() {
+                let chunk = self.original_type.convert(py, self.chunks[index].clone())?;
+                let new_chunk = chunk_pass.call1((chunk,))?;
+                self.update_circuit(index, &new_chunk)?;
+            }
+            return self.reassemble(py);
+        };
+
+        let n_threads = n_threads.map_or_else(num_cpus::get, NonZeroUsize::get);
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(n_threads)
+            .build()
+            .map_err(|e| PyRuntimeError::new_err(e.to_string()))?;
+        let chunks = &mut self.chunks;
+        py.allow_threads(|| {
+            pool.install(|| {
+                IntoParallelRefMutIterator::par_iter_mut(chunks)
+                    .try_for_each(|circ| native.run(circ))
+            })
+        })?;
+        self.reassemble(py)
+    }
+}
+
+/// A native pass applied to each chunk by [`PyCircuitChunks::map_parallel`].
+enum ChunkPass<'a> {
+    /// Optimise with Badger.
+    Badger(&'a PyBadgerOptimiser, BadgerOptions),
+    /// A pytket pass, encoded as JSON.
+    Tket1(String),
+    /// Greedy depth reduction.
+    GreedyDepthReduce,
+}
+
+impl ChunkPass<'_> {
+    /// Interpret a python object as a native pass other than Badger.
+    ///
+    /// Returns `None` for python callables.
+    fn extract(ob: &Bound<'_, PyAny>) -> PyResult<Option<Self>> {
+        let py = ob.py();
+        if let Ok(name) = ob.extract::<&str>() {
+            return match name {
+                "greedy_depth_reduce" => Ok(Some(Self::GreedyDepthReduce)),
+                _ => Err(PyValueError::new_err(format!(
+                    "Unknown chunk pass: {name}. Expected 'greedy_depth_reduce'."
+                ))),
+            };
+        }
+        let base_pass = py.import("pytket.passes")?.getattr("BasePass")?;
+        if ob.is_instance(&base_pass)? {
+            let pass_json = py
+                .import("json")?
+                .call_method1("dumps", (ob.call_method0("to_dict")?,))?
+                .extract()?;
+            return Ok(Some(Self::Tket1(pass_json)));
+        }
+        if ob.is_callable() {
+            return Ok(None);
+        }
+        Err(PyValueError::new_err(
+            "Expected a BadgerOptimiser, a pytket pass, 'greedy_depth_reduce' or a callable.",
+        ))
+    }
+
+    /// Run the pass on a chunk. Does not require the GIL.
+    fn run(&self, circ: &mut Circuit) -> PyResult<()> {
+        match self {
+            Self::Badger(optimiser, options) => {
+                let (optimised, _) = optimiser.optimise_with_stats(circ.clone(), *options);
+                *circ = optimised;
+            }
+            Self::Tket1(pass_json) => run_tket1_pass(circ, pass_json, true)?,
+            Self::GreedyDepthReduce => {
+                apply_greedy_commutation(circ).convert_pyerrs()?;
+            }
+        }
+        Ok(())
+    }
 }
@@ -5,6 +5,7 @@ use std::sync::Arc;
 
 use pyo3::prelude::*;
 use tket::serialize::pytket::{EncodeOptions, EncodedCircuit};
+use tket::Circuit;
 use tket_qsystem::pytket::{qsystem_decoder_config, qsystem_encoder_config};
 
 use crate::circuit::try_with_circ;
@@ -30,33 +31,48 @@ pub fn tket1_pass<'py>(
     let py = circ.py();
 
     try_with_circ(circ, |mut circ, typ| {
-        let mut encoded_circ = EncodedCircuit::new(
-            &circ,
-            EncodeOptions::new()
-                .with_config(qsystem_encoder_config())
-                .with_subcircuits(traverse_subcircuits),
-        )
-        .convert_pyerrs()?;
-
-        encoded_circ
-            .par_iter_mut()
-            .try_for_each(|(_, circ)| -> Result<(), tket1_passes::PassError> {
-                let mut tk1_circ = tket1_passes::Tket1Circuit::from_serial_circuit(circ)?;
-                tket1_passes::Tket1Pass::run_from_json(pass_json, &mut tk1_circ)?;
-                *circ = tk1_circ.to_serial_circuit()?;
-                Ok(())
-            })
-            .convert_pyerrs()?;
-
-        encoded_circ
-            .reassemble_inplace(circ.hugr_mut(), Some(Arc::new(qsystem_decoder_config())))
-            .convert_pyerrs()?;
+        // Encoding, running the passes and decoding do not touch any Python
+        // objects, so we release the GIL while they run.
+        py.allow_threads(|| run_tket1_pass(&mut circ, pass_json, traverse_subcircuits))?;
 
         let circ = typ.convert(py, circ)?;
         PyResult::Ok(circ)
     })
 }
 
+/// Runs a pytket pass on all circuit-like regions under the entrypoint of the
+/// HUGR, in place.
+///
+/// See [`tket1_pass`]. Does not require the GIL.
+pub(crate) fn run_tket1_pass(
+    circ: &mut Circuit,
+    pass_json: &str,
+    traverse_subcircuits: bool,
+) -> PyResult<()> {
+    let mut encoded_circ = EncodedCircuit::new(
+        &*circ,
+        EncodeOptions::new()
+            .with_config(qsystem_encoder_config())
+            .with_subcircuits(traverse_subcircuits),
+    )
+    .convert_pyerrs()?;
+
+    encoded_circ
+        .par_iter_mut()
+        .try_for_each(|(_, circ)| -> Result<(), tket1_passes::PassError> {
+            let mut tk1_circ = tket1_passes::Tket1Circuit::from_serial_circuit(circ)?;
+            tket1_passes::Tket1Pass::run_from_json(pass_json, &mut tk1_circ)?;
+            *circ = tk1_circ.to_serial_circuit()?;
+            Ok(())
+        })
+        .convert_pyerrs()?;
+
+    encoded_circ
+        .reassemble_inplace(circ.hugr_mut(), Some(Arc::new(qsystem_decoder_config())))
+        .convert_pyerrs()?;
+    Ok(())
+}
+
 create_py_exception!(
     tket1_passes::PassError,
     PytketPassError,
@@ -2,9 +2,11 @@
 
 use derive_more::From;
 use hugr::persistent::{Commit, PatchNode};
-use hugr::{hugr::views::SiblingSubgraph, HugrView, Node, SimpleReplacement};
+use hugr::{hugr::views::SiblingSubgraph, HugrView, IncomingPort, Node, OutgoingPort};
+use hugr::{PortIndex, SimpleReplacement};
 use itertools::Itertools;
 use pyo3::prelude::*;
+use pyo3::types::PyBytes;
 use std::path::PathBuf;
 use tket::rewrite::matcher::CachedWalker;
 use tket::rewrite::RewriteName;
@@ -33,7 +35,7 @@ pub fn module(py: Python<'_>) -> PyResult<Bound<'_, PyModule>> {
 /// Python equivalent of [`CircuitRewrite`].
 ///
 /// [`CircuitRewrite`]: tket::rewrite::CircuitRewrite
-#[pyclass]
+#[pyclass(module = "tket._tket.rewrite")]
 #[pyo3(name = "CircuitRewrite")]
 #[derive(Debug, Clone, From)]
 #[repr(transparent)]
@@ -75,13 +77,93 @@ impl PyCircuitRewrite {
             rewrite: repl.into(),
         })
     }
+
+    /// Pickle the rewrite as its subgraph and its replacement circuit.
+    ///
+    /// The source circuit is not stored, so the rewrite is not validated again
+    /// when unpickled.
+    fn __reduce__<'py>(
+        slf: &Bound<'py, Self>,
+    ) -> PyResult<(Bound<'py, PyAny>, (String, Tk2Circuit))> {
+        let this = slf.borrow();
+        let subgraph = this.rewrite.subgraph();
+        let state = SubgraphState {
+            nodes: subgraph.nodes().to_vec(),
+            inputs: subgraph
+                .incoming_ports()
+                .iter()
+                .map(|ports| ports.iter().map(|&(n, p)| (n, p.index())).collect())
+                .collect(),
+            outputs: subgraph
+                .outgoing_ports()
+                .iter()
+                .map(|&(n, p)| (n, p.index()))
+                .collect(),
+            function_calls: subgraph
+                .function_calls()
+                .iter()
+                .map(|ports| ports.iter().map(|&(n, p)| (n, p.index())).collect())
+                .collect(),
+        };
+        let state = serde_json::to_string(&state).unwrap();
+        Ok((
+            slf.get_type().getattr("_unpickle")?,
+            (state, this.replacement()),
+        ))
+    }
+
+    /// Rebuild a rewrite pickled by [`PyCircuitRewrite::__reduce__`].
+    #[staticmethod]
+    fn _unpickle(subgraph: &str, replacement: Tk2Circuit) -> PyResult<Self> {
+        let state: SubgraphState = serde_json::from_str(subgraph)
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
+        let subgraph = SiblingSubgraph::new_unchecked(
+            state
+                .inputs
+                .into_iter()
+                .map(|ports| {
+                    ports
+                        .into_iter()
+                        .map(|(n, p)| (n, IncomingPort::from(p)))
+                        .collect()
+                })
+                .collect(),
+            state
+                .outputs
+                .into_iter()
+                .map(|(n, p)| (n, OutgoingPort::from(p)))
+                .collect(),
+            state
+                .function_calls
+                .into_iter()
+                .map(|ports| {
+                    ports
+                        .into_iter()
+                        .map(|(n, p)| (n, IncomingPort::from(p)))
+                        .collect()
+                })
+                .collect(),
+            state.nodes,
+        );
+        let rewrite = SimpleReplacement::new_unchecked(subgraph, replacement.circ.into_hugr());
+        Ok(Self { rewrite })
+    }
+}
+
+/// The subgraph of a pickled [`PyCircuitRewrite`], with ports given by index.
+#[derive(serde::Serialize, serde::Deserialize)]
+struct SubgraphState {
+    nodes: Vec<Node>,
+    inputs: Vec<Vec<(Node, usize)>>,
+    outputs: Vec<(Node, usize)>,
+    function_calls: Vec<Vec<(Node, usize)>>,
 }
 
 /// An enum of all rewriters exposed to the Python API.
 ///
 /// This type is not exposed to Python, but instead corresponds to the Python
 /// type union in `rewrite.py`.
-#[derive(Clone, FromPyObject)]
+#[derive(Clone, FromPyObject, IntoPyObject)]
 pub enum PyRewriter {
     /// A rewriter based on circuit equivalence classes.
     ECC(PyECCRewriter),
@@ -102,7 +184,7 @@ impl<H: HugrView<Node = Node>> Rewriter<ResourceScope<H>> for PyRewriter {
         root_node: H::Node,
     ) -> Vec<CircuitRewrite<H::Node>> {
         match self {
-            Self::ECC(ecc) => ecc.0.get_rewrites(circ, root_node),
+            Self::ECC(ecc) => ecc.rewriter.get_rewrites(circ, root_node),
             Self::MatchReplace(rewriter) => {
                 Rewriter::<ResourceScope<H>>::get_rewrites(rewriter, circ, root_node)
             }
@@ -118,7 +200,7 @@ impl<H: HugrView<Node = Node>> Rewriter<ResourceScope<H>> for PyRewriter {
 
     fn get_all_rewrites(&self, circ: &ResourceScope<H>) -> Vec<CircuitRewrite<H::Node>> {
         match self {
-            Self::ECC(ecc) => ecc.0.get_all_rewrites(circ),
+            Self::ECC(ecc) => ecc.rewriter.get_all_rewrites(circ),
             Self::MatchReplace(rewriter) => {
                 Rewriter::<ResourceScope<H>>::get_all_rewrites(rewriter, circ)
             }
@@ -241,32 +323,92 @@ impl PySubcircuit {
 /// In every equivalence class, one circuit is chosen as the representative.
 /// Valid rewrites turn a non-representative circuit into its representative,
 /// or a representative circuit into any of the equivalent non-representative
-#[pyclass(name = "ECCRewriter")]
-#[derive(Clone, From)]
-pub struct PyECCRewriter(ECCRewriter);
+///
+/// Rewriters loaded from a precompiled file are pickled as a reference to the
+/// file, other rewriters are pickled in the compressed binary format.
+#[pyclass(name = "ECCRewriter", module = "tket._tket.rewrite")]
+#[derive(Clone)]
+pub struct PyECCRewriter {
+    /// The rust rewriter.
+    rewriter: ECCRewriter,
+    /// The precompiled file the rewriter was loaded from, if any.
+    path: Option<PathBuf>,
+}
+
+impl From<ECCRewriter> for PyECCRewriter {
+    fn from(rewriter: ECCRewriter) -> Self {
+        Self {
+            rewriter,
+            path: None,
+        }
+    }
+}
 
 #[pymethods]
 impl PyECCRewriter {
     /// Load a precompiled ecc rewriter from a file.
     #[staticmethod]
-    pub fn load_precompiled(path: PathBuf) -> PyResult<Self> {
-        Ok(Self(ECCRewriter::load_binary(path).map_err(|e| {
-            PyErr::new::<pyo3::exceptions::PyIOError, _>(e.to_string())
-        })?))
+    pub fn load_precompiled(py: Python<'_>, path: PathBuf) -> PyResult<Self> {
+        let path = path.canonicalize()?;
+        let rewriter = py.allow_threads(|| ECCRewriter::load_binary(&path));
+        Ok(Self {
+            rewriter: rewriter
+                .map_err(|e| PyErr::new::<pyo3::exceptions::PyIOError, _>(e.to_string()))?,
+            path: Some(path),
+        })
     }
 
     /// Compile an ECC rewriter from a JSON file.
     #[staticmethod]
-    pub fn compile_eccs(path: &str) -> PyResult<Self> {
-        Ok(Self(ECCRewriter::try_from_eccs_json_file(path).map_err(
-            |e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()),
-        )?))
+    pub fn compile_eccs(py: Python<'_>, path: &str) -> PyResult<Self> {
+        let rewriter = py.allow_threads(|| ECCRewriter::try_from_eccs_json_file(path));
+        Ok(rewriter
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?
+            .into())
+    }
+
+    /// Load a rewriter from the compressed binary format, as returned by
+    /// [`PyECCRewriter::to_bytes`].
+    #[staticmethod]
+    pub fn from_bytes(py: Python<'_>, bytes: &[u8]) -> PyResult<Self> {
+        let rewriter = py.allow_threads(|| ECCRewriter::load_binary_io(bytes));
+        Ok(rewriter
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?
+            .into())
+    }
+
+    /// Encode the rewriter in the compressed binary format, as written by
+    /// precompiled rewriter files.
+    pub fn to_bytes<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyBytes>> {
+        let mut buf = Vec::new();
+        py.allow_threads(|| self.rewriter.save_binary_io(&mut buf))
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e.to_string()))?;
+        Ok(PyBytes::new(py, &buf))
+    }
+
+    /// Pickle the rewriter, by reference to its file when it was loaded from
+    /// one.
+    fn __reduce__<'py>(
+        slf: &Bound<'py, Self>,
+    ) -> PyResult<(Bound<'py, PyAny>, (Bound<'py, PyAny>,))> {
+        let py = slf.py();
+        let this = slf.borrow();
+        match &this.path {
+            Some(path) => Ok((
+                slf.get_type().getattr("load_precompiled")?,
+                (path.into_pyobject(py)?.into_any(),),
+            )),
+            None => Ok((
+                slf.get_type().getattr("from_bytes")?,
+                (this.to_bytes(py)?.into_any(),),
+            )),
+        }
     }
 
     /// Returns a list of circuit rewrites that can be applied to the given
     /// Tk2Circuit.
     pub fn get_rewrites(&self, circ: &Tk2Circuit) -> Vec<PyCircuitRewrite> {
-        self.0
+        self.rewriter
             .get_all_rewrites(&circ.circ)
             .into_iter()
             .map(|r| match r {
@@ -1,8 +1,11 @@
 from dataclasses import dataclass
 
+import pytest
 from pytket._tket.circuit import Circuit
 
 from tket.circuit import (
+    CircuitReader,
+    CircuitWriter,
     Tk2Circuit,
     render_circuit_dot,
 )
@@ -40,6 +43,75 @@ def test_hash():
     assert hash(circA) == hash(circC)
 
 
+def test_stats():
+    circ = Tk2Circuit(Circuit(3).H(0).CX(0, 1).T(1).Tdg(2).CX(1, 2).T(0))
+    stats = circ.stats()
+
+    assert stats.op_counts == {"H": 1, "CX": 2, "T": 2, "Tdg": 1}
+    assert stats.num_operations == 6
+    assert stats.two_qubit_count == 2
+    assert stats.t_count == 3
+    assert stats.depth == 4
+    assert stats.qubit_counts == [3, 3, 2]
+
+    # Idle qubits are counted too.
+    assert Tk2Circuit(Circuit(4).H(0)).stats().qubit_counts == [1, 0, 0, 0]
+
+
+def test_pickle():
+    import pickle
+
+    circ = Tk2Circuit(Circuit(4).CX(0, 1).H(1).CX(1, 2).CX(0, 3).H(0))
+    copy = pickle.loads(pickle.dumps(circ))
+
+    assert type(copy) is Tk2Circuit
+    assert copy.hash() == circ.hash()
+
+
+def test_envelope_buffers(tmp_path):
+    circ = Tk2Circuit(Circuit(4).CX(0, 1).H(1).CX(1, 2).CX(0, 3).H(0))
+    envelope = circ.to_bytes()
+
+    out = bytearray(b"prefix")
+    assert circ.to_bytes(out=out) is out
+    assert out == b"prefix" + envelope
+
+    assert Tk2Circuit.from_bytes(out[6:]).hash() == circ.hash()
+    assert Tk2Circuit.from_bytes(memoryview(out)[6:]).hash() == circ.hash()
+
+    path = tmp_path / "circuit.hugr"
+    path.write_bytes(envelope)
+    assert Tk2Circuit.from_file(path).hash() == circ.hash()
+    assert Tk2Circuit.from_file(str(path)).hash() == circ.hash()
+
+
+def test_circuit_stream(tmp_path):
+    circs = [
+        Tk2Circuit(Circuit(2).CX(0, 1)),
+        Tk2Circuit(Circuit(3).H(0).CX(1, 2)),
+        Tk2Circuit(Circuit(1).H(0)),
+    ]
+    path = tmp_path / "circuits.tkstream"
+
+    with CircuitWriter(path) as writer:
+        writer.write(circs[0])
+    with CircuitWriter(path) as writer:
+        for circ in circs[1:]:
+            writer.write(circ)
+    assert [c.hash() for c in CircuitReader(path)] == [c.hash() for c in circs]
+
+    with CircuitWriter(path, append=False) as writer:
+        writer.write(circs[0])
+    assert [c.hash() for c in CircuitReader(str(path))] == [circs[0].hash()]
+
+    # A single envelope is read as a stream of one circuit.
+    envelope = tmp_path / "circuit.hugr"
+    envelope.write_bytes(circs[1].to_bytes())
+    assert [c.hash() for c in CircuitReader(envelope)] == [circs[1].hash()]
+    with pytest.raises(ValueError):
+        CircuitWriter(envelope)
+
+
 def test_conversion():
     tk1 = Circuit(4).CX(0, 2).CX(1, 2).CX(1, 3)
     tk1_dot = render_circuit_dot(tk1)
@@ -56,6 +128,15 @@ def test_conversion():
     assert type(tk1_back) is Circuit
 
 
+def test_conversion_many():
+    tk1s = [Circuit(4).CX(0, 2).CX(1, 2).CX(1, 3), Circuit(2).H(0).CX(0, 1)]
+
+    tk2s = Tk2Circuit.from_tket1_many(tk1s)
+    assert [c.hash() for c in tk2s] == [Tk2Circuit(c).hash() for c in tk1s]
+    assert Tk2Circuit.to_tket1_many(tk2s) == tk1s
+    assert Tk2Circuit.from_tket1_many([]) == []
+
+
 def test_conversion_qsystem():
     tk1 = Circuit(2).ZZPhase(0.75, 0, 1).PhasedX(0.25, 0.33, 1)
     tk1_dot = render_circuit_dot(tk1)
@@ -1,6 +1,10 @@
-from pytket import Circuit
-from tket.rewrite import ECCRewriter
-from tket.optimiser import BadgerOptimiser
+import pytest
+from pytket import Circuit, OpType
+from tket.circuit import Tk2Circuit
+from tket.rewrite import ECCRewriter, RewriterCache
+from tket.optimiser import BadgerOptimiser, CheckpointError
+from tket._tket.ops import TketOp
+from tket import ops
 
 
 def test_simple_optimiser():
@@ -24,3 +28,182 @@ def test_compose_rewriter():
     exp_c = Circuit(3).CX(0, 2)
 
     assert cc == exp_c
+
+
+def test_custom_cost_functions():
+    """Cost functions given as tables or memoised callables."""
+    c = Circuit(3).CX(0, 1).CX(0, 1).CX(1, 2)
+    exp_c = Circuit(3).CX(1, 2)
+
+    opt = BadgerOptimiser.compile_eccs(
+        "test_files/eccs/cx_cx_eccs.json", cost_fn={"CX": 1}
+    )
+    assert opt.optimise(c, 3) == exp_c
+
+    # Tables may be keyed by the python `TketOp` enum too.
+    opt = BadgerOptimiser.compile_eccs(
+        "test_files/eccs/cx_cx_eccs.json", cost_fn={ops.TketOp.CX: 1}
+    )
+    assert opt.optimise(c, 3) == exp_c
+
+    seen = []
+
+    def cost(op) -> int:
+        seen.append(op.name)
+        return 1 if op.name == "CX" else 0
+
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json", cost_fn=cost)
+    assert opt.optimise(c, 3) == exp_c
+    # The python callable is only called once per distinct operation.
+    assert sorted(seen) == sorted(set(seen))
+
+
+def test_pickle():
+    """Rewriters, rewrites and optimisers survive a pickle round-trip."""
+    import pickle
+
+    c = Tk2Circuit(Circuit(3).CX(0, 1).CX(0, 1).CX(1, 2))
+    exp_c = Tk2Circuit(Circuit(3).CX(1, 2))
+
+    compiled = ECCRewriter.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+    precompiled = ECCRewriter.load_precompiled("test_files/eccs/small_eccs.rwr")
+    for rewriter in [compiled, precompiled]:
+        copy = pickle.loads(pickle.dumps(rewriter))
+        assert [r.replacement().hash() for r in copy.get_rewrites(c)] == [
+            r.replacement().hash() for r in rewriter.get_rewrites(c)
+        ]
+
+    rewrite = compiled.get_rewrites(c)[0]
+    copy = pickle.loads(pickle.dumps(rewrite))
+    assert copy.replacement().hash() == rewrite.replacement().hash()
+    assert copy.node_count_delta() == rewrite.node_count_delta()
+
+    opt = BadgerOptimiser(compiled, cost_fn={"CX": 1})
+    copy = pickle.loads(pickle.dumps(opt))
+    assert copy.optimise(c, 3).hash() == exp_c.hash()
+
+
+def test_optimise_threaded():
+    """Optimisations can run concurrently from a thread pool."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+    circs = [Circuit(3).CX(0, 1).CX(0, 1).CX(i % 2, 2) for i in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda c: opt.optimise(c, 1), circs))
+
+    assert results == [Circuit(3).CX(i % 2, 2) for i in range(4)]
+
+
+def test_optimise_batch():
+    """Optimise many circuits at once, with per-circuit statistics."""
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+    circs = [Circuit(3).CX(0, 1).CX(0, 1).CX(i % 2, 2) for i in range(4)]
+
+    completed = []
+    results = opt.optimise_batch(circs, 1, n_threads=2, on_result=completed.append)
+
+    assert [r.index for r in results] == list(range(4))
+    assert [r.circuit for r in results] == [Circuit(3).CX(i % 2, 2) for i in range(4)]
+    assert sorted(r.index for r in completed) == list(range(4))
+    for r in results:
+        assert (r.initial_cost, r.final_cost) == (3, 1)
+        assert r.circuits_processed >= 1
+        assert r.circuits_seen >= r.circuits_processed
+
+
+def test_optimise_job():
+    """Optimise in the background, streaming the improvements."""
+    c = Circuit(3).CX(0, 1).CX(0, 1).CX(1, 2)
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+
+    job = opt.start(c, 3)
+    events = list(job)
+    res = job.result()
+
+    assert job.done()
+    assert res == Circuit(3).CX(1, 2)
+    assert job.best_so_far() == res
+    assert job.best_cost() == 1
+    # The initial circuit is reported first, followed by improvements.
+    assert [cost for (_, cost, _) in events] == [3, 1]
+    assert events[-1][2] == res
+
+
+def test_optimise_job_cancel():
+    """A cancelled job returns the best circuit found so far."""
+    c = Circuit(3).CX(0, 1).CX(0, 1).CX(1, 2)
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+
+    job = opt.start(c)
+    job.cancel()
+    res = job.result(timeout=10)
+
+    assert res is not None
+    assert res.n_gates_of_type(OpType.CX) <= 3
+
+
+def test_optimise_async():
+    """Await the result of an optimisation from asyncio."""
+    import asyncio
+    from tket.optimiser import optimise_async
+
+    c = Circuit(3).CX(0, 1).CX(0, 1).CX(1, 2)
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+
+    async def run() -> tuple[list[int], Circuit]:
+        job = optimise_async(opt, c, timeout=3)
+        costs = [cost async for (_, cost, _) in job]
+        return costs, await job.result()
+
+    costs, res = asyncio.run(run())
+    assert costs == [3, 1]
+    assert res == Circuit(3).CX(1, 2)
+
+
+def test_optimise_checkpoint(tmp_path):
+    """Save the search state to a checkpoint, and resume from it."""
+    c = Circuit(3).CX(0, 1).CX(0, 1).CX(1, 2)
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+    checkpoint = tmp_path / "badger.ckpt"
+
+    opt.optimise(c, max_circuit_count=1, checkpoint=checkpoint, checkpoint_interval=0)
+    assert checkpoint.exists()
+
+    cc = opt.optimise(c, 3, checkpoint=checkpoint)
+    assert cc == Circuit(3).CX(1, 2)
+
+    # A checkpoint cannot be resumed with another circuit.
+    with pytest.raises(CheckpointError):
+        opt.optimise(Circuit(3).CX(0, 1), checkpoint=checkpoint)
+
+
+def test_rewriter_cache():
+    """Loaded rewriters and optimisers are reused."""
+    cache = RewriterCache(max_size=2)
+    path = "test_files/eccs/small_eccs.rwr"
+
+    rewriter = cache.load_rewriter(path)
+    assert cache.load_rewriter(path) is rewriter
+    opt = cache.load_optimiser(path)
+    assert cache.load_optimiser(path) is opt
+    assert cache.load_optimiser(path, cost_fn="rz") is not opt
+
+    # The least recently used entry was evicted.
+    assert len(cache) == 2
+    assert cache.load_rewriter(path) is not rewriter
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_rewriter_cache_cost_table():
+    """Optimisers with a cost table are cached by the contents of the table."""
+    cache = RewriterCache()
+    path = "test_files/eccs/small_eccs.rwr"
+
+    opt = cache.load_optimiser(path, cost_fn={TketOp.CX: 1, "Rz": 2})
+    assert cache.load_optimiser(path, cost_fn={"CX": 1, "Rz": 2}) is opt
+    assert cache.load_optimiser(path, cost_fn={ops.TketOp.CX: 1, "Rz": 2}) is opt
+    assert cache.load_optimiser(path, cost_fn={"CX": 2, "Rz": 1}) is not opt
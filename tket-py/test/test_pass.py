@@ -1,21 +1,25 @@
+import hashlib
+from pathlib import Path
 from pytket import Circuit, OpType
 from dataclasses import dataclass
 from typing import Callable, Any
 from tket.ops import TketOp
 from tket.passes import (
+    badger_optimise,
     badger_pass,
     greedy_depth_reduce,
     chunks,
     normalize_guppy,
 )
 from tket.circuit import Tk2Circuit
+from tket.optimiser import BadgerOptimiser
 
 from tket.pattern import Rule, RuleMatcher
 import hypothesis.strategies as st
 from hypothesis.strategies._internal import SearchStrategy
 from hypothesis import given, settings
 
-from tket.passes import PytketPass
+from tket.passes import PytketPass, PytketPassPipeline, ResultCache
 from pytket.passes import CliffordSimp, SquashRzPhasedX, SequencePass
 from hugr.build.base import Hugr
 
@@ -63,6 +67,23 @@ def test_simple_badger_pass_no_opt():
     assert c.n_gates_of_type(OpType.CX) == 6
 
 
+def test_badger_optimise_rechunking():
+    c = Circuit(3).CX(0, 1).CX(0, 1).CX(1, 2)
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+
+    res = badger_optimise(
+        c,
+        opt,
+        max_threads=2,
+        timeout=1,
+        max_circuit_count=100,
+        rebase=False,
+        shift_chunks=True,
+        chunk_halo=2,
+    )
+    assert res.n_gates_of_type(OpType.CX) == 1
+
+
 @dataclass
 class DepthOptimisePass:
     def apply(self, circ: Circuit) -> Circuit:
@@ -118,6 +139,36 @@ def test_chunks():
     assert type(tk2) is Tk2Circuit
 
 
+def test_chunks_min_boundary():
+    c = Circuit(4).CX(0, 1).CX(2, 3).H(0).H(2).CX(0, 1).CX(2, 3)
+
+    circ_chunks = chunks(c, 3, strategy="min_boundary")
+    # Each chunk acts on a single pair of qubits.
+    assert [chunk.n_qubits for chunk in circ_chunks.circuits()] == [2, 2]
+    assert circ_chunks.reassemble().n_gates == c.n_gates
+
+
+def test_chunks_map_parallel():
+    c = Circuit(4).CX(0, 1).CX(0, 1).CX(2, 3).CX(2, 3).CX(1, 2)
+    opt = BadgerOptimiser.compile_eccs("test_files/eccs/cx_cx_eccs.json")
+
+    # Badger, on every chunk concurrently.
+    optimised = chunks(c, 2).map_parallel(opt, 2, max_circuit_count=100)
+    assert type(optimised) is Circuit
+    assert optimised.n_gates_of_type(OpType.CX) < c.n_gates_of_type(OpType.CX)
+
+    # Native pytket passes and greedy depth reduction.
+    assert chunks(c, 2).map_parallel(CliffordSimp()).n_gates <= c.n_gates
+    reduced = chunks(Tk2Circuit(c), 2).map_parallel("greedy_depth_reduce")
+    assert type(reduced) is Tk2Circuit
+
+    # Python callables are applied to each chunk in turn.
+    seen = []
+    chunk_pass = chunks(c, 2)
+    chunk_pass.map_parallel(lambda chunk: seen.append(chunk) or chunk)
+    assert len(seen) == len(chunk_pass.circuits())
+
+
 def test_cx_rule():
     c = Tk2Circuit(Circuit(4).CX(0, 2).CX(1, 2).CX(1, 2))
 
@@ -194,6 +245,81 @@ def test_sequence_pass():
     assert opt_circ.circuit_cost(lambda op: int(op == TketOp.CX)) == 1
 
 
+def test_pytket_pass_pipeline():
+    c = Tk2Circuit(
+        Circuit(2).CX(0, 1).CX(1, 0).Rz(0.25, 0).Rz(0.75, 0).Rz(0.25, 0).Rz(-1.25, 0)
+    )
+    hugr = Hugr.from_str(c.to_str())
+    pipeline = PytketPassPipeline([SquashRzPhasedX(), CliffordSimp(allow_swaps=True)])
+    res = pipeline.run(hugr)
+    assert not res.inplace
+    opt_circ = Tk2Circuit.from_bytes(res.hugr.to_bytes())
+    assert opt_circ.num_operations() == 1
+    assert opt_circ.circuit_cost(lambda op: int(op == TketOp.CX)) == 1
+
+    # An empty pipeline leaves the program unchanged.
+    unchanged = PytketPassPipeline([])(hugr)
+    assert Tk2Circuit.from_bytes(unchanged.to_bytes()).num_operations() == 6
+
+
+def test_result_cache(tmp_path):
+    c = Tk2Circuit(Circuit(2).CX(0, 1).CX(1, 0).Rz(0.25, 0).Rz(-0.25, 0))
+    calls = []
+
+    def compute(circ: Tk2Circuit) -> Tk2Circuit:
+        calls.append(circ)
+        return Tk2Circuit(Circuit(2).CX(0, 1))
+
+    cache = ResultCache(max_size=1, directory=tmp_path)
+    fingerprint = ResultCache.fingerprint("test", 1)
+    assert cache.get(c, fingerprint) is None
+    res = cache.run(c, fingerprint, compute)
+    assert cache.run(c, fingerprint, compute).hash() == res.hash()
+    assert len(calls) == 1
+
+    # A different configuration is computed again, evicting the first result.
+    cache.run(c, ResultCache.fingerprint("test", 2), compute)
+    assert len(calls) == 2
+    assert len(cache) == 1
+
+    # Cost tables are fingerprinted by operation name.
+    cx = TketOp.CX._to_rs()
+    assert ResultCache.fingerprint({cx: 1}) == ResultCache.fingerprint({"CX": 1})
+
+    # Evicted results are reloaded from disk, also by a fresh cache.
+    assert cache.get(c, fingerprint).hash() == res.hash()
+    assert ResultCache(directory=tmp_path).get(c, fingerprint).hash() == res.hash()
+    # Results are addressed by the digest of the whole program's envelope.
+    digest = hashlib.sha256(c.to_bytes()).hexdigest()
+    assert (tmp_path / f"{digest}-{fingerprint}.hugr").exists()
+
+    # Pytket passes reuse cached results.
+    hugr = Hugr.from_str(c.to_str())
+    squash_pass = PytketPass(SquashRzPhasedX(), cache=ResultCache())
+    first = Tk2Circuit.from_bytes(squash_pass(hugr).to_bytes())
+    assert len(squash_pass.cache) == 1
+    second = Tk2Circuit.from_bytes(squash_pass(hugr).to_bytes())
+    assert len(squash_pass.cache) == 1
+    assert first.hash() == second.hash()
+
+
+def test_badger_pass_cache_rebase():
+    """Cached Badger passes rebase the pytket circuit before converting it."""
+    cache = ResultCache()
+    badger = badger_pass(
+        rewriter=Path("test_files/eccs/small_eccs.rwr"),
+        max_threads=1,
+        max_circuit_count=10,
+        rebase=True,
+        cache=cache,
+    )
+    c = Circuit(2).CZ(0, 1)
+    badger.apply(c)
+    assert len(cache) == 1
+    assert c.n_gates_of_type(OpType.CZ) == 0
+    assert c.n_gates_of_type(OpType.CX) == 1
+
+
 def test_normalize_guppy():
     """Test the normalize_guppy pass.
 
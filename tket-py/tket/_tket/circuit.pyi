@@ -1,4 +1,5 @@
-from typing import Any, Callable
+from os import PathLike
+from typing import Any, Callable, Sequence
 from pytket._tket.circuit import Circuit as Tk1Circuit
 
 from tket._tket.ops import TketOp
@@ -29,8 +30,18 @@ class Tk2Circuit:
     def __deepcopy__(self) -> Tk2Circuit:
         """Create a deep copy of the circuit."""
 
+    def stats(self) -> CircuitStats:
+        """Compute statistics about the top-level operations of the circuit.
+
+        All the statistics are computed natively in a single traversal.
+        """
+
     def hash(self) -> int:
-        """Compute the circuit hash by traversal."""
+        """Compute the circuit hash by traversal.
+
+        Raises:
+            ValueError: If the circuit is not a dataflow graph.
+        """
 
     def circuit_cost(self, cost_fn: Callable[[TketOp], Any]) -> int:
         """Compute the cost of the circuit. Return value must implement __add__."""
@@ -49,6 +60,20 @@ class Tk2Circuit:
     def to_tket1(self) -> Tk1Circuit:
         """Convert to pytket Circuit."""
 
+    @staticmethod
+    def from_tket1_many(circs: Sequence[Tk1Circuit]) -> list[Tk2Circuit]:
+        """Convert a batch of pytket Circuits.
+
+        The circuits are decoded in parallel, without holding the GIL.
+        """
+
+    @staticmethod
+    def to_tket1_many(circs: Sequence[Tk2Circuit]) -> list[Tk1Circuit]:
+        """Convert a batch of circuits to pytket Circuits.
+
+        The circuits are encoded in parallel, without holding the GIL.
+        """
+
     def apply_rewrite(self, rw) -> None:
         """Apply a rewrite to the circuit."""
 
@@ -71,13 +96,20 @@ class Tk2Circuit:
     def from_hugr_json(json: str) -> Tk2Circuit:
         """Decode a HUGR json string to a Tk2Circuit."""
 
-    def to_bytes(self, config: EnvelopeConfig | None = None) -> bytes:
+    def to_bytes(
+        self, config: EnvelopeConfig | None = None, out: bytearray | None = None
+    ) -> bytes | bytearray:
         """Encode the circuit as a HUGR envelope, according to the given config.
 
         Some envelope formats can be encoded into a string. See :meth:`to_str`.
 
         Args:
             config: The envelope configuration to use.
+            out: A bytearray to append the envelope to, instead of allocating a
+                new bytes object.
+
+        Returns:
+            The encoded envelope, or `out` if it was given.
         """
 
     def to_str(self, config: EnvelopeConfig | None = None) -> str:
@@ -92,9 +124,15 @@ class Tk2Circuit:
         """
 
     @staticmethod
-    def from_bytes(envelope: bytes, function_name: str | None = None) -> Tk2Circuit:
+    def from_bytes(
+        envelope: bytes | bytearray | memoryview, function_name: str | None = None
+    ) -> Tk2Circuit:
         """Load a Circuit from a HUGR envelope.
 
+        `bytes` and `bytearray` objects are read in place. Other buffers, such
+        as memoryviews, are copied first. See :meth:`from_file` to read an
+        envelope file without copying it.
+
         Some envelope formats can be read from a string. See :meth:`from_str`.
 
         Args:
@@ -106,6 +144,24 @@ class Tk2Circuit:
             The loaded circuit.
         """
 
+    @staticmethod
+    def from_file(
+        path: str | PathLike[str], function_name: str | None = None
+    ) -> Tk2Circuit:
+        """Load a Circuit from a file containing a HUGR envelope.
+
+        The file is memory-mapped and decoded in place. It must not be modified
+        while it is being read.
+
+        Args:
+            path: The path to the envelope file.
+            function_name: The name of the function in the envelope's module to load.
+                Defaults to `main`.
+
+        Returns:
+            The loaded circuit.
+        """
+
     @staticmethod
     def from_str(envelope: str, function_name: str | None = None) -> Tk2Circuit:
         """Load a Circuit from a HUGR envelope string.
@@ -176,6 +232,93 @@ class CircuitCost:
 
         The cost object must implement __add__, __sub__, __eq__, and __lt__."""
 
+class CircuitStats:
+    """Statistics about the top-level operations of a circuit.
+
+    Returned by :meth:`Tk2Circuit.stats`.
+    """
+
+    @property
+    def op_counts(self) -> dict[str, int]:
+        """The number of operations of each kind.
+
+        `TketOp`s are keyed by their name, other operations by their qualified
+        name.
+        """
+
+    @property
+    def num_operations(self) -> int:
+        """The total number of operations."""
+
+    @property
+    def two_qubit_count(self) -> int:
+        """The number of operations acting on exactly two qubits."""
+
+    @property
+    def t_count(self) -> int:
+        """The number of T and Tdg gates."""
+
+    @property
+    def depth(self) -> int:
+        """The length of the longest sequence of operations along the qubits."""
+
+    @property
+    def qubit_counts(self) -> list[int]:
+        """The number of operations acting on each qubit, indexed by linear unit."""
+
+class CircuitReader:
+    """Reads the circuits in a file lazily, one at a time.
+
+    The file is either a stream written by :class:`CircuitWriter`, or a single
+    HUGR envelope. Each circuit is decoded without the GIL as it is requested.
+    """
+
+    def __init__(
+        self, path: str | PathLike[str], split_functions: bool = False
+    ) -> None:
+        """Open a circuit stream.
+
+        If `split_functions` is set, yields one circuit per function definition
+        instead of the entrypoint of each envelope.
+        """
+
+    def __iter__(self) -> CircuitReader: ...
+    def __next__(self) -> Tk2Circuit: ...
+
+class CircuitWriter:
+    """Appends circuits to a stream file, one envelope per circuit.
+
+    Can be used as a context manager, closing the file on exit.
+    """
+
+    def __init__(
+        self,
+        path: str | PathLike[str],
+        config: EnvelopeConfig | None = None,
+        append: bool = True,
+    ) -> None:
+        """Open a circuit stream for writing.
+
+        If `append` is set and the file already contains a stream, new circuits
+        are added after the existing ones. Otherwise the file is truncated. If
+        no config is given, it defaults to the default binary envelope.
+        """
+
+    def write(self, circ: Tk2Circuit) -> None:
+        """Append a circuit to the stream.
+
+        The circuit is encoded without the GIL.
+        """
+
+    def flush(self) -> None:
+        """Flush the buffered circuits to the file."""
+
+    def close(self) -> None:
+        """Flush and close the file. Further writes raise a `ValueError`."""
+
+    def __enter__(self) -> CircuitWriter: ...
+    def __exit__(self, *args: Any) -> None: ...
+
 def render_circuit_dot(hugr: Tk2Circuit | Tk1Circuit) -> str: ...
 def render_circuit_mermaid(hugr: Tk2Circuit | Tk1Circuit) -> str: ...
 def validate_circuit(hugr: Tk2Circuit | Tk1Circuit) -> None: ...
@@ -53,6 +53,7 @@ class TketOp(Enum):
         """Get the string name of the operation."""
 
     def __eq__(self, value: object) -> bool: ...
+    def __hash__(self) -> int: ...
 
 class Pauli(Enum):
     """Simple enum representation of Pauli matrices."""
@@ -1,16 +1,38 @@
-from typing import TypeVar, Literal, Callable, TYPE_CHECKING
+from typing import (
+    TypeVar,
+    Literal,
+    Callable,
+    Generic,
+    Iterator,
+    Mapping,
+    Sequence,
+    TYPE_CHECKING,
+)
 from .circuit import Tk2Circuit
 from pytket._tket.circuit import Circuit
 
 if TYPE_CHECKING:
     from ..rewrite import Rewriter
     from .ops import TketOp, CustomOp
+    from .. import ops
 
 from pathlib import Path
 
 CircuitClass = TypeVar("CircuitClass", Circuit, Tk2Circuit)
 
-BadgerCostFunction = Literal["cx", "rz"] | Callable[["TketOp" | "CustomOp"], int] | None
+# A cost function for the Badger optimiser. Either one of the builtin cost
+# functions, a table of operation costs (keyed by `TketOp`s, native or from
+# `tket.ops`, or operation names, missing operations cost 0), or a callable computing the cost of an operation.
+# Callables are only called once per distinct operation.
+BadgerCostFunction = (
+    Literal["cx", "rz"]
+    | Mapping["str | TketOp | ops.TketOp", int]
+    | Callable[["TketOp" | "CustomOp"], int]
+    | None
+)
+
+class CheckpointError(Exception):
+    """Errors that can occur while saving or loading a Badger checkpoint."""
 
 class BadgerOptimiser:
     def __init__(self, rewriter: "Rewriter", cost_fn: BadgerCostFunction = None):
@@ -52,9 +74,21 @@ class BadgerOptimiser:
         split_circ: bool = False,
         queue_size: int | None = None,
         log_progress: Path | None = None,
+        checkpoint: Path | None = None,
+        checkpoint_interval: float | None = None,
+        split_strategy: Literal["greedy", "min_boundary"] | None = None,
     ) -> CircuitClass:
         """Optimise a circuit.
 
+        The GIL is released while the optimiser runs, so multiple circuits can
+        be optimised concurrently from a thread pool.
+
+        If `checkpoint` is given, the search state is saved to that file every
+        `checkpoint_interval` seconds (60 by default) and when the optimisation
+        terminates. If the file already exists, the optimisation resumes from
+        it, and a `CheckpointError` is raised if it was written while optimising
+        a different circuit. Checkpointing is only supported on a single thread.
+
         :param circ: The circuit to optimise.
         :param timeout: Maximum time to spend on the optimisation.
         :param progress_timeout: Maximum time to wait between new best results.
@@ -62,8 +96,128 @@ class BadgerOptimiser:
         :param split_circ: Split the circuit into subcircuits and optimise them separately.
         :param queue_size: Maximum number of circuits to keep in the queue of candidates.
         :param log_progress: Log progress to a CSV file.
+        :param checkpoint: File to save the search state to, and resume from.
+        :param checkpoint_interval: Minimum time in seconds between checkpoints.
+        :param split_strategy: How to choose the chunk boundaries when splitting
+            the circuit. "min_boundary" minimises the wires between chunks.
+            Defaults to "greedy".
+        """
+
+    def start(
+        self,
+        circ: CircuitClass,
+        timeout: int | None = None,
+        progress_timeout: int | None = None,
+        max_circuit_count: int | None = None,
+        n_threads: int | None = None,
+        split_circ: bool = False,
+        queue_size: int | None = None,
+        log_progress: Path | None = None,
+        split_strategy: Literal["greedy", "min_boundary"] | None = None,
+    ) -> BadgerJob[CircuitClass]:
+        """Start optimising a circuit in a background thread.
+
+        Takes the same parameters as :py:meth:`optimise`, but returns
+        immediately with a :py:class:`BadgerJob` handle that can be used to
+        follow the progress of the optimisation, cancel it, or wait for its
+        result.
         """
 
+    def optimise_batch(
+        self,
+        circuits: Sequence[CircuitClass],
+        timeout: int | None = None,
+        progress_timeout: int | None = None,
+        max_circuit_count: int | None = None,
+        n_threads: int | None = None,
+        queue_size: int | None = None,
+        on_result: Callable[[BadgerBatchResult[CircuitClass]], None] | None = None,
+    ) -> list[BadgerBatchResult[CircuitClass]]:
+        """Optimise a batch of circuits on a shared pool of threads.
+
+        Each circuit is optimised by a single-threaded search, and up to
+        `n_threads` circuits are optimised in parallel, sharing the rewriter.
+        The GIL is released while the optimiser runs.
+
+        :param circuits: The circuits to optimise.
+        :param timeout: Maximum time to spend on each circuit.
+        :param progress_timeout: Maximum time to wait between new best results,
+            for each circuit.
+        :param max_circuit_count: Maximum number of circuits to process, for
+            each circuit.
+        :param n_threads: Number of threads in the pool. Defaults to the number
+            of CPUs.
+        :param queue_size: Maximum number of circuits to keep in the queue of candidates.
+        :param on_result: Called with each result as soon as its circuit has
+            been optimised, in completion order.
+        :return: The results, in the order of the input circuits.
+        """
+
+class BadgerBatchResult(Generic[CircuitClass]):
+    """The result of optimising one circuit of a batch."""
+
+    @property
+    def index(self) -> int:
+        """The position of the circuit in the input batch."""
+
+    @property
+    def circuit(self) -> CircuitClass:
+        """The optimised circuit, in the same format as the input."""
+
+    @property
+    def initial_cost(self) -> int:
+        """The cost of the input circuit."""
+
+    @property
+    def final_cost(self) -> int:
+        """The cost of the optimised circuit."""
+
+    @property
+    def circuits_processed(self) -> int:
+        """The number of circuits processed by the optimiser."""
+
+    @property
+    def circuits_seen(self) -> int:
+        """The number of distinct circuits seen by the optimiser."""
+
+    @property
+    def elapsed(self) -> float:
+        """The time spent optimising the circuit, in seconds."""
+
+class BadgerJob(Generic[CircuitClass]):
+    """A Badger optimisation running in a background thread.
+
+    Iterating over the job yields `(elapsed, cost, circuit)` tuples for every
+    new best circuit found, until the optimisation terminates. Dropping the job
+    cancels the optimisation.
+    """
+
+    def cancel(self) -> None:
+        """Request the optimisation to stop.
+
+        The optimisation terminates shortly afterwards, and its result is the
+        best circuit found so far.
+        """
+
+    def done(self) -> bool:
+        """Whether the optimisation has terminated."""
+
+    def best_so_far(self) -> CircuitClass | None:
+        """The best circuit found so far."""
+
+    def best_cost(self) -> int | None:
+        """The cost of the best circuit found so far."""
+
+    def result(self, timeout: float | None = None) -> CircuitClass | None:
+        """Wait for the optimisation to terminate and return the optimised circuit.
+
+        :param timeout: Maximum time to wait, in seconds. If the optimisation
+            has not terminated by then, returns `None`.
+        """
+
+    def __iter__(self) -> Iterator[tuple[float, int, CircuitClass]]: ...
+    def __next__(self) -> tuple[float, int, CircuitClass]: ...
+
 class SeadogOptimiser:
     def __init__(self, rewriter: "Rewriter", cost_fn: BadgerCostFunction = None):
         """Create a new Badger optimiser.
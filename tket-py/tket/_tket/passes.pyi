@@ -1,9 +1,10 @@
 from pathlib import Path
-from typing import TypeVar
+from typing import Callable, Literal, TypeVar
 
 from .optimiser import BadgerOptimiser
 from .circuit import Tk2Circuit
 from pytket._tket.circuit import Circuit
+from pytket.passes import BasePass
 
 CircuitClass = TypeVar("CircuitClass", Circuit, Tk2Circuit)
 
@@ -17,6 +18,33 @@ class CircuitChunks:
     def update_circuit(self, index: int, circ: Circuit | Tk2Circuit) -> None:
         """Replace a circuit chunk with a new version."""
 
+    def map_parallel(
+        self,
+        chunk_pass: BadgerOptimiser
+        | BasePass
+        | Literal["greedy_depth_reduce"]
+        | Callable[[Circuit | Tk2Circuit], Circuit | Tk2Circuit],
+        n_threads: int | None = None,
+        *,
+        timeout: int | None = None,
+        progress_timeout: int | None = None,
+        max_circuit_count: int | None = None,
+    ) -> Circuit | Tk2Circuit:
+        """Apply a pass to every chunk in parallel, and reassemble the circuit.
+
+        The chunks are updated in place. `chunk_pass` may be:
+        - a `BadgerOptimiser`, run single-threaded on each chunk with the given
+          `timeout`, `progress_timeout` and `max_circuit_count`,
+        - a pytket `BasePass`, run with `tket1_pass`,
+        - the string `"greedy_depth_reduce"`,
+        - any other callable taking and returning a circuit. Python callables
+          hold the GIL, so they are applied to one chunk at a time.
+
+        Native passes run on a pool of `n_threads` threads (defaults to the
+        number of CPUs), without the GIL and without converting the chunks to
+        python objects.
+        """
+
 class PullForwardError(Exception):
     """Error from a `PullForward` operation."""
 
@@ -59,6 +87,8 @@ def badger_optimise(
     max_circuit_count: int | None = None,
     log_dir: Path | None = None,
     rebase: bool | None = False,
+    shift_chunks: bool | None = False,
+    chunk_halo: int | None = 0,
 ) -> CircuitClass:
     """Optimise a circuit using the Badger optimiser.
 
@@ -81,10 +111,27 @@ def badger_optimise(
     - `max_circuit_count` (default: None) circuits have been explored.
 
     Log files will be written to the directory `log_dir` if specified.
+
+    Each cycle splits the circuit into chunks at similar boundaries. If
+    `shift_chunks` is set, the boundaries are shifted by half a chunk on every
+    other cycle, so that patterns straddling a boundary can be found in the
+    next cycle. If `chunk_halo` is non-zero, each cycle additionally optimises
+    alternating chunks extended by `chunk_halo` gates into their neighbours,
+    in two phases.
     """
 
-def chunks(c: Circuit | Tk2Circuit, max_chunk_size: int) -> CircuitChunks:
-    """Split a circuit into chunks of at most `max_chunk_size` gates."""
+def chunks(
+    c: Circuit | Tk2Circuit,
+    max_chunk_size: int,
+    strategy: Literal["greedy", "min_boundary"] | None = None,
+) -> CircuitChunks:
+    """Split a circuit into chunks of at most `max_chunk_size` gates.
+
+    With the "min_boundary" strategy, the chunk boundaries are chosen to
+    minimise the number of wires between chunks, keeping densely interacting
+    gates together. Defaults to "greedy", which cuts the circuit in command
+    order.
+    """
 
 def tket1_pass(
     circ: CircuitClass,
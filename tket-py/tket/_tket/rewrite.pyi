@@ -10,6 +10,13 @@ class ECCRewriter:
     def compile_eccs(filename: str | Path) -> ECCRewriter:
         """Compile an ECC rewriter from a JSON file."""
 
+    @staticmethod
+    def from_bytes(data: bytes) -> ECCRewriter:
+        """Load a rewriter from the compressed binary format."""
+
+    def to_bytes(self) -> bytes:
+        """Encode the rewriter in the compressed binary format."""
+
     def get_rewrites(self, circ: Tk2Circuit) -> list[CircuitRewrite]:
         """Get rewrites for a circuit."""
 
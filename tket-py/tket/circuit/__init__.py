@@ -5,6 +5,9 @@ from .._tket.circuit import (
     Node,
     Wire,
     CircuitCost,
+    CircuitStats,
+    CircuitReader,
+    CircuitWriter,
     validate_circuit,
     render_circuit_dot,
     render_circuit_mermaid,
@@ -26,6 +29,9 @@ __all__ = [
     "Node",
     "Wire",
     "CircuitCost",
+    "CircuitStats",
+    "CircuitReader",
+    "CircuitWriter",
     "validate_circuit",
     "render_circuit_dot",
     "render_circuit_mermaid",
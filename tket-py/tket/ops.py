@@ -78,6 +78,10 @@ class TketOp(Enum):
             return self.name == other
         return False
 
+    def __hash__(self) -> int:
+        """Hash by name, consistently with equality."""
+        return hash(self.name)
+
 
 class Pauli(Enum):
     """Simple enum representation of Pauli matrices.
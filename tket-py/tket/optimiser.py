@@ -1,4 +1,103 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Generic, TypeVar
+
+from pytket._tket.circuit import Circuit
+
+from .circuit import Tk2Circuit
+
 # Re-export native bindings
-from ._tket.optimiser import BadgerOptimiser, SeadogOptimiser
+from ._tket.optimiser import (
+    BadgerBatchResult,
+    BadgerJob,
+    BadgerOptimiser,
+    CheckpointError,
+    SeadogOptimiser,
+)
+
+__all__ = [
+    "optimise_async",
+    "AsyncBadgerJob",
+    # Bindings.
+    "BadgerBatchResult",
+    "BadgerJob",
+    "BadgerOptimiser",
+    "CheckpointError",
+    "SeadogOptimiser",
+]
+
+CircuitClass = TypeVar("CircuitClass", Circuit, Tk2Circuit)
+
+
+class AsyncBadgerJob(Generic[CircuitClass]):
+    """An asyncio interface to a Badger optimisation running in the background.
+
+    Use :py:func:`optimise_async` to create one. The improvements found by the
+    optimiser can be streamed with ``async for (elapsed, cost, circ) in job``,
+    and the final result awaited with ``await job.result()``.
+    """
+
+    def __init__(self, job: BadgerJob[CircuitClass]) -> None:
+        self._job = job
+
+    @property
+    def job(self) -> BadgerJob[CircuitClass]:
+        """The underlying native job handle."""
+        return self._job
+
+    def cancel(self) -> None:
+        """Request the optimisation to stop, keeping the best circuit found so far."""
+        self._job.cancel()
+
+    def done(self) -> bool:
+        """Whether the optimisation has terminated."""
+        return self._job.done()
+
+    def best_so_far(self) -> CircuitClass | None:
+        """The best circuit found so far."""
+        return self._job.best_so_far()
+
+    def best_cost(self) -> int | None:
+        """The cost of the best circuit found so far."""
+        return self._job.best_cost()
+
+    async def result(self) -> CircuitClass:
+        """Wait for the optimisation to terminate and return the optimised circuit."""
+        circ = await asyncio.to_thread(self._job.result)
+        assert circ is not None
+        return circ
+
+    async def __aiter__(self) -> AsyncIterator[tuple[float, int, CircuitClass]]:
+        while True:
+            event = await asyncio.to_thread(next, self._job, None)
+            if event is None:
+                return
+            yield event
+
+
+def optimise_async(
+    optimiser: BadgerOptimiser,
+    circ: CircuitClass,
+    timeout: int | None = None,
+    progress_timeout: int | None = None,
+    max_circuit_count: int | None = None,
+    n_threads: int | None = None,
+    split_circ: bool = False,
+    queue_size: int | None = None,
+    log_progress: Path | None = None,
+) -> AsyncBadgerJob[CircuitClass]:
+    """Start optimising a circuit in the background, returning an asyncio handle.
 
-__all__ = ["BadgerOptimiser", "SeadogOptimiser"]
+    Takes the same parameters as :py:meth:`BadgerOptimiser.optimise`.
+    """
+    job = optimiser.start(
+        circ,
+        timeout=timeout,
+        progress_timeout=progress_timeout,
+        max_circuit_count=max_circuit_count,
+        n_threads=n_threads,
+        split_circ=split_circ,
+        queue_size=queue_size,
+        log_progress=log_progress,
+    )
+    return AsyncBadgerJob(job)
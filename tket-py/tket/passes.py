@@ -1,16 +1,24 @@
 from pathlib import Path
-from typing import Optional, Literal
+from typing import Any, Callable, Iterable, Mapping, Optional, Literal
+import hashlib
 import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from copy import copy, deepcopy
 from dataclasses import dataclass
 
-from pytket import Circuit
+from pytket import Circuit, OpType
 from pytket.passes import (
+    AutoRebase,
     CustomPass,
     BasePass,
+    SequencePass,
 )
 
-from tket import optimiser
 from tket.circuit import Tk2Circuit
+from tket.rewrite import rewriter_cache, file_key
 
 from hugr.passes._composable_pass import (
     ComposablePass,
@@ -20,6 +28,7 @@ from hugr.passes._composable_pass import (
 
 
 from hugr.hugr.base import Hugr
+from hugr.envelope import EnvelopeConfig
 
 # Re-export native bindings.
 from ._tket.passes import (
@@ -35,6 +44,9 @@ from ._tket.passes import (
 
 __all__ = [
     "badger_pass",
+    "PytketPass",
+    "PytketPassPipeline",
+    "ResultCache",
     # Bindings.
     # TODO: Wrap these in Python classes.
     "CircuitChunks",
@@ -47,6 +59,140 @@ __all__ = [
 ]
 
 
+class ResultCache:
+    """A cache of optimisation results, keyed by a digest of the input program
+    and a fingerprint of the pass configuration.
+
+    Programs are identified by the SHA-256 digest of their binary HUGR
+    envelope. This covers the whole HUGR, including the functions called from
+    the circuit, so passes that traverse subcircuits are cached correctly.
+
+    The most recently used `max_size` results are kept in memory. If a
+    `directory` is given, every result is also stored there as a binary HUGR
+    envelope, so that it is shared between processes and survives restarts.
+
+    Results are returned as fresh copies, so they can be modified freely. The
+    cache is safe to use from multiple threads, but the same circuit may be
+    optimised more than once if it is requested concurrently.
+
+    Passes accepting a `cache` argument, such as :py:func:`badger_pass` and
+    :py:class:`PytketPass`, use it automatically. Other passes can be wrapped
+    with :py:meth:`run`::
+
+        pass_json = json.dumps(pytket_pass.to_dict())
+        result = cache.run(
+            circ,
+            ResultCache.fingerprint("tket1_pass", pass_json),
+            lambda c: tket1_pass(c, pass_json),
+        )
+    """
+
+    def __init__(
+        self, max_size: int = 128, directory: str | Path | None = None
+    ) -> None:
+        self.max_size = max_size
+        self.directory = Path(directory) if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._entries: OrderedDict[tuple[str, str], Tk2Circuit] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(*config: Any) -> str:
+        """Fingerprint a pass configuration.
+
+        The configuration must be serializable as JSON. Mapping keys, such as
+        the operations of a cost table, are converted to strings.
+        """
+        encoded = json.dumps(_json_keys(config), sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+    def get(self, circ: Tk2Circuit, fingerprint: str) -> Tk2Circuit | None:
+        """Return the cached result of a pass on a circuit, if any."""
+        key = (_circuit_key(circ), fingerprint)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return copy(self._entries[key])
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        result = Tk2Circuit.from_file(path)
+        self._remember(key, result)
+        return copy(result)
+
+    def put(self, circ: Tk2Circuit, fingerprint: str, result: Tk2Circuit) -> None:
+        """Store the result of a pass on a circuit."""
+        key = (_circuit_key(circ), fingerprint)
+        result = copy(result)
+        self._remember(key, result)
+        path = self._path(key)
+        if path is not None:
+            # Write to a temporary file first, so that concurrent readers never
+            # see a partial envelope.
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(result.to_bytes())
+            os.replace(tmp, path)
+
+    def run(
+        self,
+        circ: Tk2Circuit,
+        fingerprint: str,
+        compute: Callable[[Tk2Circuit], Tk2Circuit],
+    ) -> Tk2Circuit:
+        """Return the cached result of a pass on a circuit, or compute and
+        store it with `compute`."""
+        result = self.get(circ, fingerprint)
+        if result is None:
+            result = compute(circ)
+            self.put(circ, fingerprint, result)
+        return result
+
+    def clear(self) -> None:
+        """Drop all the results held in memory.
+
+        Results stored in the directory are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: tuple[str, str], result: Tk2Circuit) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: tuple[str, str]) -> Path | None:
+        if self.directory is None:
+            return None
+        digest, fingerprint = key
+        return self.directory / f"{digest}-{fingerprint}.hugr"
+
+
+def _json_keys(value: Any) -> Any:
+    """Convert the keys of the mappings in a value to strings."""
+    if isinstance(value, Mapping):
+        return {str(k): _json_keys(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_keys(v) for v in value]
+    return value
+
+
+def _circuit_key(circ: Tk2Circuit) -> str:
+    """Identify a program by the digest of its binary envelope.
+
+    The traversal hash of :py:meth:`Tk2Circuit.hash` only covers the
+    entrypoint region, and is not meant to be stable across processes, so it
+    cannot be used to address results on disk.
+    """
+    return hashlib.sha256(circ.to_bytes(EnvelopeConfig.BINARY)).hexdigest()
+
+
 def badger_pass(
     rewriter: Optional[Path] = None,
     max_threads: Optional[int] = None,
@@ -56,6 +202,9 @@ def badger_pass(
     log_dir: Optional[Path] = None,
     rebase: bool = False,
     cost_fn: Literal["cx", "rz"] | None = None,
+    shift_chunks: bool = False,
+    chunk_halo: int = 0,
+    cache: Optional[ResultCache] = None,
 ) -> BasePass:
     """Construct a Badger pass.
 
@@ -67,8 +216,15 @@ def badger_pass(
     or `'rz'`. If not specified, the default is `'cx'`.
 
     The arguments `max_threads`, `timeout`, `progress_timeout`, `max_circuit_count`,
-    `log_dir` and `rebase` are optional and will be passed on to the Badger
-    optimiser if provided."""
+    `log_dir`, `rebase`, `shift_chunks` and `chunk_halo` are optional and will be
+    passed on to the Badger optimiser if provided. See
+    :py:func:`badger_optimise` for how the circuit is chunked.
+
+    The optimiser is loaded through :py:data:`tket.rewrite.rewriter_cache`, so
+    constructing the pass repeatedly with the same rewriter is cheap.
+
+    If a `cache` is given, circuits that were already optimised with the same
+    rewriter and options are not optimised again."""
     if rewriter is None:
         try:
             import tket_eccs
@@ -78,10 +234,9 @@ def badger_pass(
             )
 
         rewriter = tket_eccs.nam_6_3()
-    opt = optimiser.BadgerOptimiser.load_precompiled(rewriter, cost_fn=cost_fn)
+    opt = rewriter_cache.load_optimiser(rewriter, cost_fn=cost_fn)
 
-    def apply(circuit: Circuit) -> Circuit:
-        """Apply Badger optimisation to the circuit."""
+    def optimise(circuit: Any, rebase: bool = rebase) -> Any:
         return badger_optimise(
             circuit,
             optimiser=opt,
@@ -91,24 +246,61 @@ def badger_pass(
             max_circuit_count=max_circuit_count,
             log_dir=log_dir,
             rebase=rebase,
+            shift_chunks=shift_chunks,
+            chunk_halo=chunk_halo,
         )
 
+    if cache is None:
+        apply = optimise
+    else:
+        fingerprint = ResultCache.fingerprint(
+            "badger_pass",
+            file_key(rewriter),
+            cost_fn,
+            max_threads,
+            timeout,
+            progress_timeout,
+            max_circuit_count,
+            rebase,
+            shift_chunks,
+            chunk_halo,
+        )
+
+        def apply(circuit: Circuit) -> Circuit:
+            """Apply Badger optimisation to the circuit, or reuse a cached result."""
+            if rebase:
+                # Only pytket circuits can be rebased, so rebase before
+                # converting the circuit.
+                circuit = circuit.copy()
+                AutoRebase({OpType.CX, OpType.Rz, OpType.H}).apply(circuit)
+            result = cache.run(
+                Tk2Circuit(circuit), fingerprint, lambda c: optimise(c, rebase=False)
+            )
+            return result.to_tket1()
+
     return CustomPass(apply, label="tket.badger_pass")
 
 
 @dataclass
 class PytketPass(ComposablePass):
     pytket_pass: BasePass
+    cache: Optional[ResultCache] = None
 
     """
     A class which provides an interface to apply pytket passes to Hugr programs.
 
     The user can create a :py:class:`PytketPass` object from any serializable member of `pytket.passes`.
+
+    If a :py:class:`ResultCache` is given, programs that were already
+    transformed by the same pass are not transformed again.
     """
 
-    def __init__(self, pytket_pass: BasePass) -> None:
+    def __init__(
+        self, pytket_pass: BasePass, cache: Optional[ResultCache] = None
+    ) -> None:
         """Initialize a PytketPass from a :py:class:`~pytket.passes.BasePass` instance."""
         self.pytket_pass = pytket_pass
+        self.cache = cache
 
     def __call__(self, hugr: Hugr, *, inplace: bool = False) -> Hugr:
         """Call the pytket pass to transform a HUGR, returning a Hugr."""
@@ -124,8 +316,74 @@ class PytketPass(ComposablePass):
         )
 
     def _run_pytket_pass_on_hugr(self, hugr: Hugr) -> PassResult:
-        pass_json = json.dumps(self.pytket_pass.to_dict())
-        compiler_state: Tk2Circuit = Tk2Circuit.from_bytes(hugr.to_bytes())
-        opt_program = tket1_pass(compiler_state, pass_json, traverse_subcircuits=True)
-        new_hugr = Hugr.from_str(opt_program.to_str())
+        new_hugr = _run_pytket_pass_on_hugr(hugr, self.pytket_pass, self.cache)
+        return PassResult(hugr=new_hugr, inplace=False)
+
+
+@dataclass
+class PytketPassPipeline(ComposablePass):
+    pytket_passes: list[BasePass]
+    cache: Optional[ResultCache] = None
+
+    """
+    A sequence of pytket passes applied to Hugr programs in a single call.
+
+    Equivalent to chaining a :py:class:`PytketPass` for each pass, but the Hugr
+    is only encoded and decoded once for the whole pipeline rather than once
+    per pass.
+
+    If a :py:class:`ResultCache` is given, results are cached for the pipeline
+    as a whole.
+    """
+
+    def __init__(
+        self,
+        pytket_passes: Iterable[BasePass],
+        cache: Optional[ResultCache] = None,
+    ) -> None:
+        """Initialize a PytketPassPipeline from the pytket passes to run, in order."""
+        self.pytket_passes = list(pytket_passes)
+        self.cache = cache
+
+    def __call__(self, hugr: Hugr, *, inplace: bool = False) -> Hugr:
+        """Call the pytket passes to transform a HUGR, returning a Hugr."""
+        return self.run(hugr, inplace=inplace).hugr
+
+    def run(self, hugr: Hugr, *, inplace: bool = False) -> PassResult:
+        """Run the pytket passes as a HUGR transform returning a PassResult."""
+        return implement_pass_run(
+            self,
+            hugr=hugr,
+            inplace=inplace,
+            copy_call=lambda h: self._run_pytket_passes_on_hugr(h),
+        )
+
+    def _run_pytket_passes_on_hugr(self, hugr: Hugr) -> PassResult:
+        if not self.pytket_passes:
+            return PassResult(hugr=deepcopy(hugr), inplace=False)
+        new_hugr = _run_pytket_pass_on_hugr(
+            hugr, SequencePass(self.pytket_passes), self.cache
+        )
         return PassResult(hugr=new_hugr, inplace=False)
+
+
+def _run_pytket_pass_on_hugr(
+    hugr: Hugr, pytket_pass: BasePass, cache: Optional[ResultCache] = None
+) -> Hugr:
+    """Run a pytket pass on all the circuit-like regions of a HUGR.
+
+    The HUGR crosses into the native module once and back once, as a binary
+    envelope.
+    """
+    pass_json = json.dumps(pytket_pass.to_dict())
+    compiler_state = Tk2Circuit.from_bytes(hugr.to_bytes(EnvelopeConfig.BINARY))
+
+    def run(circ: Tk2Circuit) -> Tk2Circuit:
+        return tket1_pass(circ, pass_json, traverse_subcircuits=True)
+
+    if cache is None:
+        opt_program = run(compiler_state)
+    else:
+        fingerprint = ResultCache.fingerprint("tket1_pass", pass_json, True)
+        opt_program = cache.run(compiler_state, fingerprint, run)
+    return Hugr.from_bytes(opt_program.to_bytes(EnvelopeConfig.BINARY))
@@ -1,10 +1,23 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Mapping, TypeVar
+
 # Re-export native bindings
 from ._tket.rewrite import ECCRewriter, CircuitRewrite, Subcircuit
+from ._tket.optimiser import BadgerOptimiser
 from .matcher import MatchReplaceRewriter
 
+if TYPE_CHECKING:
+    from ._tket.optimiser import BadgerCostFunction
+
 __all__ = [
     "default_ecc_rewriter",
     "clifford_t_ecc_rewriter",
+    "RewriterCache",
+    "rewriter_cache",
+    "file_key",
     # Bindings.
     # TODO: Wrap these in Python classes.
     "ECCRewriter",
@@ -15,9 +28,103 @@ __all__ = [
 
 Rewriter = ECCRewriter | MatchReplaceRewriter | list["Rewriter"]
 
+T = TypeVar("T")
+
+
+class RewriterCache:
+    """A cache of precompiled rewriters and Badger optimisers loaded from disk.
+
+    Entries are keyed by the resolved path of the rewriter file, its
+    modification time and size, and the cost function of the optimiser. A
+    file that is modified on disk is therefore reloaded.
+
+    The least recently used entries are evicted once more than `max_size`
+    objects are cached. The cache is safe to use from multiple threads.
+    """
+
+    def __init__(self, max_size: int = 8) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_rewriter(self, path: str | Path) -> ECCRewriter:
+        """Load a precompiled rewriter, or return the cached one."""
+        return self._get(
+            ("rewriter", *file_key(path)),
+            lambda: ECCRewriter.load_precompiled(path),
+        )
+
+    def load_optimiser(
+        self, path: str | Path, cost_fn: "BadgerCostFunction" = None
+    ) -> BadgerOptimiser:
+        """Load a Badger optimiser from a precompiled rewriter, or return the
+        cached one.
+
+        Cost tables are keyed by their contents, and callable cost functions
+        by identity.
+        """
+        return self._get(
+            ("optimiser", *file_key(path), _cost_fn_key(cost_fn)),
+            lambda: BadgerOptimiser.load_precompiled(path, cost_fn=cost_fn),
+        )
+
+    def clear(self) -> None:
+        """Drop all the cached objects."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: Hashable, load: Callable[[], T]) -> T:
+        # Loading is done under the lock, so concurrent requests for the same
+        # file only load it once.
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            value = load()
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return value
+
+
+def file_key(path: str | Path) -> tuple[str, int, int]:
+    """Identify the current contents of a file without reading it.
+
+    The key is made of the resolved path, the modification time and the size
+    of the file.
+    """
+    path = Path(path).resolve()
+    stat = os.stat(path)
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _cost_fn_key(cost_fn: "BadgerCostFunction") -> Hashable:
+    """A hashable key for a cost function.
+
+    Operations in cost tables are identified by name, so tables keyed by
+    `TketOp`s or by their names share a key.
+    """
+    if isinstance(cost_fn, Mapping):
+        return frozenset(
+            (op if isinstance(op, str) else op.name, cost)
+            for op, cost in cost_fn.items()
+        )
+    return cost_fn
+
+
+rewriter_cache = RewriterCache()
+"""The process-wide cache used by :py:func:`default_ecc_rewriter`,
+:py:func:`clifford_t_ecc_rewriter` and :py:func:`tket.passes.badger_pass`."""
+
 
 def default_ecc_rewriter() -> ECCRewriter:
-    """Load the default ecc rewriter."""
+    """Load the default ecc rewriter.
+
+    The rewriter is cached in :py:data:`rewriter_cache`.
+    """
     try:
         import tket_eccs
     except ImportError:
@@ -26,11 +133,14 @@ def default_ecc_rewriter() -> ECCRewriter:
         )
 
     rewriter = tket_eccs.nam_6_3()
-    return ECCRewriter.load_precompiled(rewriter)
+    return rewriter_cache.load_rewriter(rewriter)
 
 
 def clifford_t_ecc_rewriter() -> ECCRewriter:
-    """Load the ECC rewriter on the Clifford T gateset."""
+    """Load the ECC rewriter on the Clifford T gateset.
+
+    The rewriter is cached in :py:data:`rewriter_cache`.
+    """
     try:
         import tket_eccs
     except ImportError:
@@ -39,4 +149,4 @@ def clifford_t_ecc_rewriter() -> ECCRewriter:
         )
 
     rewriter = tket_eccs.clifford_t_6_3()
-    return ECCRewriter.load_precompiled(rewriter)
+    return rewriter_cache.load_rewriter(rewriter)
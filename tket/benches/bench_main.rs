@@ -5,6 +5,15 @@ mod benchmarks;
 
 use criterion::criterion_main;
 
+#[cfg(not(feature = "portmatching"))]
 criterion_main! {
+    benchmarks::chunks::benches,
     benchmarks::hash::benches,
 }
+
+#[cfg(feature = "portmatching")]
+criterion_main! {
+    benchmarks::chunks::benches,
+    benchmarks::hash::benches,
+    benchmarks::portmatching::benches,
+}
@@ -0,0 +1,111 @@
+use std::hint::black_box;
+
+use criterion::{criterion_group, AxisScale, BenchmarkId, Criterion, PlotConfiguration};
+use tket::passes::{CircuitChunks, SplitStrategy};
+use tket::{op_matches, Circuit, TketOp};
+
+use super::generators::{build_simple_circuit, make_cnot_layers};
+
+const STRATEGIES: [(&str, SplitStrategy); 2] = [
+    ("greedy", SplitStrategy::Greedy),
+    ("min_boundary", SplitStrategy::MinBoundary),
+];
+
+/// Time taken to choose the chunk boundaries and extract the chunks.
+fn bench_split(c: &mut Criterion) {
+    let mut g = c.benchmark_group("split a circuit into chunks");
+    g.plot_config(PlotConfiguration::default().summary_scale(AxisScale::Logarithmic));
+
+    for layers in [30, 300, 3_000] {
+        let circ = Circuit::new(make_cnot_layers(8, layers));
+        let gates = circ.num_operations();
+        for (name, strategy) in STRATEGIES {
+            g.bench_with_input(BenchmarkId::new(name, gates), &circ, |b, circ| {
+                b.iter(|| {
+                    black_box(CircuitChunks::split_with_strategy(
+                        circ,
+                        64,
+                        |_| 1,
+                        strategy,
+                    ))
+                })
+            });
+        }
+    }
+    g.finish();
+}
+
+/// Badger in `split_circuit` mode with each splitter, on a circuit where
+/// every CX is cancelled by an identical CX a few commands later.
+///
+/// The final CX counts are printed, as they depend on whether the
+/// cancelling pairs end up in the same chunk.
+#[cfg(feature = "portmatching")]
+fn bench_split_badger(c: &mut Criterion) {
+    use std::num::NonZeroUsize;
+    use tket::optimiser::badger::BadgerOptions;
+    use tket::optimiser::ECCBadgerOptimiser;
+
+    let mut g = c.benchmark_group("badger on split circuits");
+    g.sample_size(10);
+
+    let optimiser =
+        ECCBadgerOptimiser::default_with_eccs_json_file("../test_files/eccs/small_eccs.json")
+            .unwrap();
+    let circ = Circuit::new(make_interleaved_cx_pairs(8, 100));
+    let gates = circ.num_operations();
+    for (name, strategy) in STRATEGIES {
+        let options = BadgerOptions {
+            n_threads: NonZeroUsize::new(4).unwrap(),
+            split_circuit: true,
+            split_strategy: strategy,
+            max_circuit_count: Some(200),
+            ..Default::default()
+        };
+        let cx_count = cx_count(&optimiser.optimise(&circ, options));
+        println!("{name}: {gates} gates optimised down to {cx_count} CX");
+        g.bench_with_input(BenchmarkId::new(name, gates), &circ, |b, circ| {
+            b.iter(|| black_box(optimiser.optimise(circ, options)))
+        });
+    }
+    g.finish();
+}
+
+/// The Badger benchmarks require the `portmatching` feature.
+#[cfg(not(feature = "portmatching"))]
+fn bench_split_badger(_c: &mut Criterion) {}
+
+/// Layers of CX gates on disjoint pairs of qubits followed by Hadamards. Each
+/// CX layer is applied twice, so that the two copies of a CX are only
+/// adjacent on their own qubits and not in command order.
+fn make_interleaved_cx_pairs(num_qubits: usize, layers: usize) -> tket::Hugr {
+    build_simple_circuit(num_qubits, |circ| {
+        for layer in 0..layers {
+            let pairs = (layer % 2..num_qubits - 1).step_by(2).collect::<Vec<_>>();
+            for _ in 0..2 {
+                for &q in &pairs {
+                    circ.append(TketOp::CX, [q, q + 1])?;
+                }
+            }
+            for q in 0..num_qubits {
+                circ.append(TketOp::H, [q])?;
+            }
+        }
+        Ok(())
+    })
+    .unwrap()
+}
+
+fn cx_count(circ: &Circuit) -> usize {
+    circ.commands()
+        .filter(|cmd| op_matches(cmd.optype(), TketOp::CX))
+        .count()
+}
+
+criterion_group! {
+    name = benches;
+    config = Criterion::default();
+    targets =
+        bench_split,
+        bench_split_badger,
+}
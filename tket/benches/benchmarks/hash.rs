@@ -1,8 +1,10 @@
 use std::hint::black_box;
 
 use criterion::{criterion_group, AxisScale, BenchmarkId, Criterion, PlotConfiguration};
-use hugr::HugrView;
-use tket::circuit::CircuitHash;
+use hugr::hugr::hugrmut::HugrMut;
+use hugr::{Hugr, HugrView, Node};
+use tket::circuit::{CircuitHash, IncrementalHash};
+use tket::{Circuit, TketOp};
 
 use super::generators::make_cnot_layers;
 
@@ -19,9 +21,66 @@ fn bench_hash_simple(c: &mut Criterion) {
     g.finish();
 }
 
+/// Rehash a circuit after replacing one of its gates, either from scratch or
+/// incrementally.
+///
+/// The incremental update only rehashes the forward cone of the modified
+/// gate, so we modify a gate in the middle of the circuit and one close to
+/// the output.
+fn bench_hash_incremental(c: &mut Criterion) {
+    let mut g = c.benchmark_group("rehash after a local change");
+    g.plot_config(PlotConfiguration::default().summary_scale(AxisScale::Logarithmic));
+
+    // 8 qubits with 3.5 CNOTs per layer, up to ~10k gates.
+    for layers in [30, 300, 3_000] {
+        let circ = make_cnot_layers(8, layers);
+        let gates = Circuit::new(&circ).num_operations();
+        let nodes: Vec<Node> = Circuit::new(&circ)
+            .commands()
+            .map(|cmd| cmd.node())
+            .collect();
+        let middle = nodes[nodes.len() / 2];
+        let near_output = nodes[nodes.len() - 8];
+
+        g.bench_with_input(BenchmarkId::new("full", gates), &circ, |b, circ| {
+            let mut circ = circ.clone();
+            let parent = circ.entrypoint();
+            let mut toggle = false;
+            b.iter(|| {
+                toggle_gate(&mut circ, middle, &mut toggle);
+                black_box(circ.circuit_hash(parent))
+            })
+        });
+        for (name, node) in [
+            ("incremental_middle", middle),
+            ("incremental_output", near_output),
+        ] {
+            g.bench_with_input(BenchmarkId::new(name, gates), &circ, |b, circ| {
+                let mut circ = circ.clone();
+                let parent = circ.entrypoint();
+                let mut hash = IncrementalHash::new(&circ, parent).unwrap();
+                let mut toggle = false;
+                b.iter(|| {
+                    toggle_gate(&mut circ, node, &mut toggle);
+                    black_box(hash.update(&circ, [node], []))
+                })
+            });
+        }
+    }
+    g.finish();
+}
+
+/// Swap a gate between a CX and a CZ.
+fn toggle_gate(circ: &mut Hugr, node: Node, toggle: &mut bool) {
+    *toggle = !*toggle;
+    let op = if *toggle { TketOp::CZ } else { TketOp::CX };
+    circ.replace_op(node, op);
+}
+
 criterion_group! {
     name = benches;
     config = Criterion::default();
     targets =
         bench_hash_simple,
+        bench_hash_incremental,
 }
@@ -1,3 +1,5 @@
 pub mod generators;
 
+pub mod chunks;
 pub mod hash;
+pub mod portmatching;
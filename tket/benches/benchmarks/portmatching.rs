@@ -0,0 +1,99 @@
+#![cfg(feature = "portmatching")]
+
+use std::hint::black_box;
+
+use criterion::{criterion_group, AxisScale, BenchmarkId, Criterion, PlotConfiguration};
+use hugr::hugr::Patch;
+use hugr::{Hugr, Node};
+use tket::portmatching::{CircuitPattern, IncrementalMatcher, PatternMatch, PatternMatcher};
+use tket::rewrite::CircuitRewrite;
+use tket::{Circuit, TketOp};
+
+use super::generators::{build_simple_circuit, make_cnot_layers};
+
+/// Two CNOTs chained on their target and control, matched everywhere in the
+/// layered CNOT circuits.
+fn cx_chain() -> Hugr {
+    build_simple_circuit(3, |circ| {
+        circ.append(TketOp::CX, [0, 1])?;
+        circ.append(TketOp::CX, [1, 2])?;
+        Ok(())
+    })
+    .unwrap()
+}
+
+/// Find the matches again after each rewrite, either from scratch or
+/// incrementally.
+///
+/// Every iteration replaces a match by a copy of the pattern, so the circuit
+/// keeps the same shape and the next rewrite targets the new nodes.
+fn bench_matches_after_rewrite(c: &mut Criterion) {
+    let mut g = c.benchmark_group("find matches after a rewrite");
+    g.plot_config(PlotConfiguration::default().summary_scale(AxisScale::Logarithmic));
+
+    let pattern = cx_chain();
+    let matcher = PatternMatcher::from_patterns(vec![CircuitPattern::try_from_circuit(
+        &Circuit::new(pattern.clone()),
+    )
+    .unwrap()]);
+
+    // 8 qubits with 3.5 CNOTs per layer, up to ~10k gates.
+    for layers in [30, 300, 3_000] {
+        let circ = Circuit::new(make_cnot_layers(8, layers));
+        let gates = circ.num_operations();
+        let all_matches = matcher.find_matches(&circ);
+        let middle = all_matches[all_matches.len() / 2].root();
+
+        g.bench_with_input(BenchmarkId::new("find_matches", gates), &circ, |b, circ| {
+            let mut circ = circ.clone();
+            let mut matches = matcher.find_matches(&circ);
+            let mut root = middle;
+            b.iter(|| {
+                let m = matches.iter().find(|m| m.root() == root).unwrap();
+                let rewrite = to_rewrite(m, &circ, &pattern);
+                let outcome =
+                    <CircuitRewrite as Patch<Circuit<Hugr>>>::apply(rewrite, &mut circ).unwrap();
+                matches = matcher.find_matches(&circ);
+                root = next_root(outcome.node_map.values(), |n| {
+                    matches.iter().any(|m| m.root() == n)
+                });
+                black_box(matches.len())
+            })
+        });
+        g.bench_with_input(BenchmarkId::new("incremental", gates), &circ, |b, circ| {
+            let mut circ = circ.clone();
+            let mut incremental = IncrementalMatcher::new(&matcher, &circ);
+            let mut root = middle;
+            b.iter(|| {
+                let m = incremental.rooted_matches(root).next().unwrap();
+                let rewrite = to_rewrite(m, &circ, &pattern);
+                let outcome = incremental.apply_rewrite(&mut circ, rewrite).unwrap();
+                root = next_root(outcome.node_map.values(), |n| {
+                    incremental.rooted_matches(n).next().is_some()
+                });
+                black_box(incremental.rooted_matches(root).count())
+            })
+        });
+    }
+    g.finish();
+}
+
+/// Replace a match by a copy of the pattern.
+fn to_rewrite(m: &PatternMatch, circ: &Circuit<Hugr>, pattern: &Hugr) -> CircuitRewrite {
+    m.to_rewrite(circ, Circuit::new(pattern.clone())).unwrap()
+}
+
+/// The inserted node at which the pattern copy is matched.
+fn next_root<'a>(
+    inserted: impl IntoIterator<Item = &'a Node>,
+    is_root: impl Fn(Node) -> bool,
+) -> Node {
+    inserted.into_iter().copied().find(|&n| is_root(n)).unwrap()
+}
+
+criterion_group! {
+    name = benches;
+    config = Criterion::default();
+    targets =
+        bench_matches_after_rewrite,
+}
@@ -3,12 +3,13 @@
 use std::hash::{Hash, Hasher};
 
 use derive_more::{Display, Error};
-use fxhash::{FxHashMap, FxHasher64};
+use fxhash::{FxHashMap, FxHashSet, FxHasher64};
 use hugr::core::HugrNode;
 use hugr::hugr::views::NodesIter;
 use hugr::ops::OpType;
 use hugr::{HugrView, Node};
 use hugr_core::hugr::internal::PortgraphNodeMap;
+use itertools::Itertools;
 use petgraph::visit::{self as pg, Walker};
 
 use super::Circuit;
@@ -39,25 +40,162 @@ where
     T: HugrView,
 {
     fn circuit_hash(&self, node: T::Node) -> Result<u64, HashError> {
-        let Some([_, output_node]) = self.get_io(node) else {
+        Ok(IncrementalHash::new(self, node)?.hash())
+    }
+}
+
+/// The hash of a dataflow region, along with the hashes of all its nodes.
+///
+/// Node hashes only depend on the operation and the hashes of the node's
+/// predecessors, so after a local modification of the region only the
+/// modified nodes and their successors need to be rehashed. See
+/// [`IncrementalHash::update`].
+#[derive(Clone, Debug)]
+pub struct IncrementalHash<N = Node> {
+    /// The hashed dataflow container node.
+    parent: N,
+    /// The output node of the region.
+    output: N,
+    /// The hashes of the nodes in the region.
+    state: HashState<N>,
+    /// The hash of the region.
+    hash: u64,
+}
+
+impl<N: HugrNode> IncrementalHash<N> {
+    /// Hash the dataflow region under `parent`.
+    ///
+    /// The resulting hash is the same as [`CircuitHash::circuit_hash`].
+    pub fn new(circ: &impl HugrView<Node = N>, parent: N) -> Result<Self, HashError> {
+        let Some([_, output]) = circ.get_io(parent) else {
             return Err(HashError::NotADfg);
         };
 
-        let mut node_hashes = HashState::default();
+        let mut state = HashState::default();
 
-        let (region, node_map) = self.region_portgraph(node);
+        let (region, node_map) = circ.region_portgraph(parent);
         for pg_node in pg::Topo::new(&region).iter(&region) {
             let node = node_map.from_portgraph(pg_node);
-            let hash = hash_node(self, node, &mut node_hashes)?;
-            if node_hashes.set_hash(node, hash).is_some() {
+            let hash = hash_node(circ, node, &mut state)?;
+            if state.set_hash(node, hash).is_some() {
                 panic!("Hash already set for node {node}");
             }
         }
 
         // If the output node has no hash, the topological sort failed due to a cycle.
-        node_hashes
-            .node_hash(output_node)
-            .ok_or(HashError::CyclicCircuit)
+        let hash = state.node_hash(output).ok_or(HashError::CyclicCircuit)?;
+        Ok(Self {
+            parent,
+            output,
+            state,
+            hash,
+        })
+    }
+
+    /// The hash of the region.
+    #[inline]
+    pub fn hash(&self) -> u64 {
+        self.hash
+    }
+
+    /// The hashed dataflow container node.
+    #[inline]
+    pub fn parent(&self) -> N {
+        self.parent
+    }
+
+    /// Update the hash after the region has been modified, returning the new
+    /// hash.
+    ///
+    /// `changed` must contain every node of the region that was added, or
+    /// whose operation or input links were modified, since the hash was last
+    /// computed. The hashes of these nodes and of all the nodes reachable
+    /// from them are recomputed. `removed` contains the nodes that were
+    /// deleted from the region; their identifiers may have been reused by
+    /// nodes in `changed`.
+    ///
+    /// On error, the node hashes are left in an inconsistent state and the
+    /// [`IncrementalHash`] should be discarded.
+    pub fn update(
+        &mut self,
+        circ: &impl HugrView<Node = N>,
+        changed: impl IntoIterator<Item = N>,
+        removed: impl IntoIterator<Item = N>,
+    ) -> Result<u64, HashError> {
+        for node in removed {
+            self.state.hashes.remove(&node);
+        }
+
+        // Collect the nodes whose hash may have changed.
+        let in_region = |n: N| circ.get_parent(n) == Some(self.parent);
+        let mut cone = FxHashSet::default();
+        let mut stack = changed
+            .into_iter()
+            .filter(|&n| circ.contains_node(n) && in_region(n))
+            .collect_vec();
+        while let Some(node) = stack.pop() {
+            if cone.insert(node) {
+                stack.extend(circ.output_neighbours(node).filter(|&n| in_region(n)));
+            }
+        }
+
+        // Rehash them in topological order.
+        let mut pending_preds: FxHashMap<N, usize> = cone
+            .iter()
+            .map(|&n| {
+                let count = circ
+                    .input_neighbours(n)
+                    .filter(|pred| cone.contains(pred))
+                    .count();
+                (n, count)
+            })
+            .collect();
+        let mut ready = pending_preds
+            .iter()
+            .filter(|(_, &count)| count == 0)
+            .map(|(&n, _)| n)
+            .collect_vec();
+        let mut rehashed = 0;
+        while let Some(node) = ready.pop() {
+            let hash = hash_node(circ, node, &mut self.state)?;
+            self.state.set_hash(node, hash);
+            rehashed += 1;
+            for succ in circ.output_neighbours(node) {
+                if let Some(count) = pending_preds.get_mut(&succ) {
+                    *count -= 1;
+                    if *count == 0 {
+                        ready.push(succ);
+                    }
+                }
+            }
+        }
+        if rehashed != cone.len() {
+            return Err(HashError::CyclicCircuit);
+        }
+
+        self.hash = self
+            .state
+            .node_hash(self.output)
+            .ok_or(HashError::CyclicCircuit)?;
+        Ok(self.hash)
+    }
+
+    /// Translate the node identifiers, e.g. after extracting the region into
+    /// a new HUGR.
+    pub(crate) fn map_nodes<M: HugrNode>(&self, mut map: impl FnMut(N) -> M) -> IncrementalHash<M> {
+        IncrementalHash {
+            parent: map(self.parent),
+            output: map(self.output),
+            state: HashState {
+                hashes: self
+                    .state
+                    .hashes
+                    .iter()
+                    .map(|(&n, &hash)| (map(n), hash))
+                    .collect(),
+            },
+            hash: self.hash,
+        }
     }
 }
 
@@ -65,7 +203,6 @@ where
 ///
 /// Contains previously computed hashes.
 #[derive(Clone, Debug)]
-
 struct HashState<N = Node> {
     /// Computed node hashes.
     pub hashes: FxHashMap<N, u64>,
@@ -175,7 +312,7 @@ mod test {
     use crate::serialize::pytket::DecodeOptions;
     use crate::serialize::TKETDecode;
     use crate::utils::build_simple_circuit;
-    use crate::TketOp;
+    use crate::{op_matches, TketOp};
 
     use super::*;
 
@@ -215,6 +352,36 @@ mod test {
         assert_ne!(hash1, hash3);
     }
 
+    #[test]
+    fn hash_incremental_update() {
+        let mut circ = build_simple_circuit(2, |circ| {
+            circ.append(TketOp::H, [0])?;
+            circ.append(TketOp::T, [1])?;
+            circ.append(TketOp::CX, [0, 1])?;
+            circ.append(TketOp::H, [1])?;
+            Ok(())
+        })
+        .unwrap();
+        let parent = circ.parent();
+        let mut hash = IncrementalHash::new(circ.hugr(), parent).unwrap();
+        assert_eq!(hash.hash(), circ.circuit_hash(parent).unwrap());
+
+        // Replace the T gate, and only rehash from there.
+        let t_node = circ
+            .commands()
+            .find(|cmd| op_matches(cmd.optype(), TketOp::T))
+            .unwrap()
+            .node();
+        circ.hugr_mut().replace_op(t_node, TketOp::Tdg);
+        let updated = hash.update(circ.hugr(), [t_node], []).unwrap();
+
+        assert_eq!(updated, circ.circuit_hash(parent).unwrap());
+        assert_eq!(
+            updated,
+            IncrementalHash::new(circ.hugr(), parent).unwrap().hash()
+        );
+    }
+
     #[test]
     fn hash_constants() {
         let c_str = r#"{"bits": [], "commands": [{"args": [["q", [0]]], "op": {"params": ["0.5"], "type": "Rz"}}], "created_qubits": [], "discarded_qubits": [], "implicit_permutation": [[["q", [0]], ["q", [0]]]], "phase": "0.0", "qubits": [["q", [0]]]}"#;
@@ -10,6 +10,8 @@ mod pqueue_worker;
 pub mod seadog;
 
 use std::fmt::Debug;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::Arc;
 
 #[cfg(feature = "portmatching")]
 pub use badger::ECCBadgerOptimiser;
@@ -27,6 +29,8 @@ pub use backtracking::BacktrackingOptimiser;
 ///   Badger optimiser.
 /// - `track_n_best`: Instead of returning only the state minimising the cost
 ///   function, return the `n` best candidates.
+/// - `stop_signal`: A signal that can be used to stop the optimisation early
+///   from another thread.
 ///
 /// See [Optimiser::optimise_with_options] for more details.
 #[derive(Default)]
@@ -36,6 +40,34 @@ pub struct OptimiserOptions<'w> {
     pub badger_logger: BadgerLogger<'w>,
     /// The number of best states to track.
     pub track_n_best: Option<usize>,
+    /// A signal to stop the optimisation before any of the timeouts are
+    /// reached.
+    pub stop_signal: Option<StopSignal>,
+}
+
+/// A shared flag used to request that a running optimisation stops.
+///
+/// Cloning the signal returns a handle to the same flag. Once
+/// [`StopSignal::stop`] has been called, optimisers observing the signal
+/// terminate at the next opportunity and return the best state found so far.
+#[derive(Clone, Debug, Default)]
+pub struct StopSignal(Arc<AtomicBool>);
+
+impl StopSignal {
+    /// Create a new signal, initially unset.
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Request that the optimisation stops.
+    pub fn stop(&self) {
+        self.0.store(true, Ordering::Relaxed);
+    }
+
+    /// Whether a stop has been requested.
+    pub fn is_stopped(&self) -> bool {
+        self.0.load(Ordering::Relaxed)
+    }
 }
 
 impl<'w> From<BadgerLogger<'w>> for OptimiserOptions<'w> {
@@ -55,6 +87,10 @@ pub struct OptimiserResult<S> {
     ///
     /// Not `None` iff the `track_n_best` option is set.
     pub n_best_states: Option<Vec<S>>,
+    /// The number of states processed during the search.
+    pub visited_count: usize,
+    /// The number of distinct states seen during the search.
+    pub seen_count: usize,
 }
 
 /// An optimiser exploring a discrete search space, in search for the lowest
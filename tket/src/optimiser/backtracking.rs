@@ -3,11 +3,13 @@
 //! Will greedily explore the best states in the search space, and backtrack
 //! when a state is found that is worse than the best state in the queue.
 
-use std::time::Instant;
+use std::time::{Duration, Instant};
 
 #[cfg(feature = "badgerv2_unstable")]
 use crate::optimiser::seadog::SeadogOptions;
 
+use crate::optimiser::badger::checkpoint::CheckpointError;
+use crate::optimiser::badger::BadgerLogger;
 use crate::optimiser::{
     badger::BadgerOptions, pqueue::Entry, Optimiser, OptimiserOptions, OptimiserResult, State,
     StatePQueue,
@@ -76,23 +78,64 @@ impl Optimiser for BacktrackingOptimiser {
     fn optimise_with_options<C, S>(
         &self,
         start_state: S,
+        context: C,
+        options: OptimiserOptions,
+    ) -> Option<OptimiserResult<S>>
+    where
+        S: State<C>,
+    {
+        self.optimise_with_callback(start_state, context, options, |_, _| {})
+    }
+}
+
+impl BacktrackingOptimiser {
+    /// Start optimisation from the given state, using the given context and
+    /// options.
+    ///
+    /// `on_best` is called with the initial state and then with every new
+    /// best state found, along with its cost.
+    pub fn optimise_with_callback<C, S>(
+        &self,
+        start_state: S,
+        context: C,
+        options: OptimiserOptions,
+        on_best: impl FnMut(&S, &S::Cost),
+    ) -> Option<OptimiserResult<S>>
+    where
+        S: State<C>,
+    {
+        let mut pq = StatePQueue::new(self.queue_size, options.track_n_best);
+        pq.push(start_state.clone(), &context)?;
+        self.resume(pq, start_state, context, options, on_best, None)
+    }
+
+    /// Continue an optimisation from a pre-populated priority queue.
+    ///
+    /// `best_state` is the best state found so far. If a [`SearchCheckpoint`]
+    /// is given, its callback is called with the current search state every
+    /// `interval`, and once more when the optimisation terminates.
+    pub(super) fn resume<C, S>(
+        &self,
+        mut pq: StatePQueue<S, S::Cost>,
+        best_state: S,
         mut context: C,
         options: OptimiserOptions,
+        mut on_best: impl FnMut(&S, &S::Cost),
+        mut checkpoint: Option<SearchCheckpoint<'_, S, S::Cost>>,
     ) -> Option<OptimiserResult<S>>
     where
         S: State<C>,
     {
         let start_time = Instant::now();
         let mut last_best_time = Instant::now();
+        let mut last_checkpoint_time = Instant::now();
         let mut logger = options.badger_logger;
+        let stop_signal = options.stop_signal;
 
-        let mut best_state = start_state.clone();
+        let mut best_state = best_state;
         let mut best_cost = best_state.cost(&context)?;
         logger.log_best(&best_cost, None);
-
-        // Priority queue of states to be processed
-        let mut pq = StatePQueue::new(self.queue_size, options.track_n_best);
-        pq.push(start_state, &context)?;
+        on_best(&best_state, &best_cost);
 
         let mut visited_count = 0;
         let mut timeout_flag = false;
@@ -103,6 +146,7 @@ impl Optimiser for BacktrackingOptimiser {
                 // let num_rewrites = best_state.rewrite_trace().map(|rs| rs.count());
                 // TODO: retrieve num_rewrites from context
                 logger.log_best(&best_cost, None);
+                on_best(&best_state, &best_cost);
                 last_best_time = Instant::now();
             }
             visited_count += 1;
@@ -116,6 +160,13 @@ impl Optimiser for BacktrackingOptimiser {
                 }
             }
 
+            if let Some(checkpoint) = checkpoint.as_mut() {
+                if last_checkpoint_time.elapsed() >= checkpoint.interval {
+                    checkpoint.save(&pq, &best_state, &logger);
+                    last_checkpoint_time = Instant::now();
+                }
+            }
+
             if let Some(timeout) = self.timeout {
                 if start_time.elapsed().as_secs_f64() > (timeout as f64) {
                     timeout_flag = true;
@@ -134,6 +185,14 @@ impl Optimiser for BacktrackingOptimiser {
                     break;
                 }
             }
+            if stop_signal.as_ref().is_some_and(|s| s.is_stopped()) {
+                timeout_flag = true;
+                break;
+            }
+        }
+
+        if let Some(checkpoint) = checkpoint.as_mut() {
+            checkpoint.save(&pq, &best_state, &logger);
         }
 
         logger.log_processing_end(
@@ -145,9 +204,28 @@ impl Optimiser for BacktrackingOptimiser {
             start_time.elapsed(),
         );
 
+        let seen_count = pq.num_seen_hashes();
         Some(OptimiserResult {
             best_state,
             n_best_states: pq.into_all_time_best(),
+            visited_count,
+            seen_count,
         })
     }
 }
+
+/// A hook to periodically snapshot the state of a backtracking search.
+pub(super) struct SearchCheckpoint<'a, S, P: Ord> {
+    /// The minimum time between two snapshots.
+    pub interval: Duration,
+    /// Persist the priority queue and the best state found so far.
+    pub save: &'a mut dyn FnMut(&StatePQueue<S, P>, &S) -> Result<(), CheckpointError>,
+}
+
+impl<S, P: Ord> SearchCheckpoint<'_, S, P> {
+    fn save(&mut self, pq: &StatePQueue<S, P>, best_state: &S, logger: &BadgerLogger) {
+        if let Err(e) = (self.save)(pq, best_state) {
+            logger.warn(format!("Failed to save checkpoint: {e}"));
+        }
+    }
+}
@@ -11,12 +11,18 @@
 //! stored to detect and ignore duplicates. The priority queue is truncated
 //! whenever it gets too large.
 
+pub mod checkpoint;
+#[cfg(feature = "distributed")]
+pub mod distributed;
 mod eq_circ_class;
 pub mod log;
 mod qtz_circuit;
 mod worker;
 
+pub use checkpoint::{BadgerCheckpoint, CheckpointError, CheckpointOptions};
 use crossbeam_channel::select;
+#[cfg(feature = "distributed")]
+pub use distributed::DistributedError;
 pub use eq_circ_class::{load_eccs_json_file, EqCircClass};
 use hugr::hugr::views::sibling_subgraph::InvalidSubgraph;
 use hugr::hugr::HugrError;
@@ -30,9 +36,13 @@ use std::{mem, thread};
 
 use crate::circuit::cost::CircuitCost;
 use crate::circuit::CircuitHash;
+use crate::optimiser::backtracking::SearchCheckpoint;
 use crate::optimiser::badger::worker::BadgerWorker;
-use crate::optimiser::{pqueue_worker, BacktrackingOptimiser, Optimiser, State, StatePQWorker};
-use crate::passes::CircuitChunks;
+use crate::optimiser::{
+    pqueue_worker, BacktrackingOptimiser, OptimiserOptions, State, StatePQWorker, StatePQueue,
+    StopSignal,
+};
+use crate::passes::{CircuitChunks, SplitOptions, SplitStrategy};
 use crate::resource::ResourceScope;
 use crate::rewrite::strategy::{RewriteResult, RewriteStrategy};
 use crate::rewrite::{CircuitRewrite, Rewriter};
@@ -73,6 +83,30 @@ pub struct BadgerOptions {
     ///
     /// Defaults to `false`.
     pub split_circuit: bool,
+    /// How to choose the chunk boundaries when `split_circuit` is set.
+    ///
+    /// Defaults to [`SplitStrategy::Greedy`].
+    pub split_strategy: SplitStrategy,
+    /// Whether to shift the chunk boundaries by half a chunk when
+    /// `split_circuit` is set.
+    ///
+    /// Alternating this option between successive runs lets patterns that
+    /// straddle a chunk boundary in one run be found in the next.
+    ///
+    /// Defaults to `false`.
+    pub split_shift: bool,
+    /// When `split_circuit` is set, the number of commands by which each
+    /// chunk is extended into its neighbours.
+    ///
+    /// If non-zero, the circuit is optimised in two phases, each with half
+    /// of the time budget. Each phase optimises every other chunk, extended
+    /// by this many commands on each side, while the commands in between are
+    /// left unchanged. The second phase swaps the two sets, so every chunk
+    /// boundary is optimised with context on both sides. See
+    /// [`SplitOptions::with_halo`].
+    ///
+    /// Defaults to `0`.
+    pub split_halo: usize,
     /// The maximum size of the circuit candidates priority queue.
     ///
     /// Defaults to `20`.
@@ -86,12 +120,31 @@ impl Default for BadgerOptions {
             progress_timeout: Default::default(),
             n_threads: NonZeroUsize::new(1).unwrap(),
             split_circuit: Default::default(),
+            split_strategy: Default::default(),
+            split_shift: false,
+            split_halo: 0,
             queue_size: 20,
             max_circuit_count: None,
         }
     }
 }
 
+/// Statistics about a single-threaded Badger optimisation.
+///
+/// Returned by [`BadgerOptimiser::optimise_with_stats`].
+#[derive(Debug, Clone, PartialEq, Eq)]
+#[non_exhaustive]
+pub struct BadgerStats<C> {
+    /// The cost of the input circuit.
+    pub initial_cost: C,
+    /// The cost of the optimised circuit.
+    pub final_cost: C,
+    /// The number of circuits processed.
+    pub circuits_processed: usize,
+    /// The number of distinct circuits seen.
+    pub circuits_seen: usize,
+}
+
 /// The Badger optimiser.
 ///
 /// Adapted from [Quartz][], and originally [TASO][].
@@ -139,6 +192,11 @@ impl<R, S> BadgerOptimiser<R, S> {
         Self { rewriter, strategy }
     }
 
+    /// The rewriter used by the optimiser.
+    pub fn rewriter(&self) -> &R {
+        &self.rewriter
+    }
+
     fn cost(&self, circ: &ResourceScope<impl HugrView<Node = Node>>) -> S::Cost
     where
         S: RewriteStrategy,
@@ -209,15 +267,43 @@ where
         circ: &Circuit<impl HugrView<Node = Node>>,
         log_config: BadgerLogger,
         options: BadgerOptions,
+    ) -> Circuit {
+        self.optimise_with_callback(circ, log_config, options, &StopSignal::new(), |_, _| {})
+    }
+
+    /// Run the Badger optimiser on a circuit, reporting intermediate results.
+    ///
+    /// `on_best` is called with the input circuit and then with every new
+    /// best circuit found, along with its cost. When splitting the circuit
+    /// into chunks, only the reassembled circuit is reported.
+    ///
+    /// The optimisation terminates early, returning the best circuit found so
+    /// far, once `stop_signal` is set.
+    pub fn optimise_with_callback(
+        &self,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        log_config: BadgerLogger,
+        options: BadgerOptions,
+        stop_signal: &StopSignal,
+        mut on_best: impl FnMut(&ResourceScope, &S::Cost),
     ) -> Circuit {
         let h = match options.n_threads.get() {
-            1 => self.badger(circ, log_config, options),
+            1 => {
+                self.badger(circ, log_config, options, stop_signal, &mut on_best)
+                    .0
+            }
             _ => {
                 if options.split_circuit {
-                    self.badger_split_multithreaded(circ, log_config, options)
-                        .unwrap()
+                    self.badger_split_multithreaded(
+                        circ,
+                        log_config,
+                        options,
+                        stop_signal,
+                        &mut on_best,
+                    )
+                    .unwrap()
                 } else {
-                    self.badger_multithreaded(circ, log_config, options)
+                    self.badger_multithreaded(circ, log_config, options, stop_signal, &mut on_best)
                 }
             }
         }
@@ -225,14 +311,167 @@ where
         Circuit::new(h)
     }
 
+    /// Run the single-threaded Badger optimiser on a circuit, returning
+    /// statistics about the search along with the optimised circuit.
+    ///
+    /// [`BadgerOptions::n_threads`] and [`BadgerOptions::split_circuit`] are
+    /// ignored. To optimise many circuits in parallel, call this method from
+    /// multiple threads instead.
+    pub fn optimise_with_stats(
+        &self,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        log_config: BadgerLogger,
+        options: BadgerOptions,
+    ) -> (Circuit, BadgerStats<S::Cost>) {
+        let (h, stats) = self.badger(
+            circ,
+            log_config,
+            options,
+            &StopSignal::new(),
+            &mut |_, _| {},
+        );
+        (Circuit::new(h.into_hugr()), stats)
+    }
+
+    /// Run the Badger optimiser on a circuit, periodically saving the search
+    /// state to disk.
+    ///
+    /// Checkpoints are written according to `checkpoint`, and can be passed
+    /// to [`Self::resume_from_checkpoint`] to continue an interrupted
+    /// optimisation.
+    ///
+    /// Checkpointing is only supported by the single-threaded optimiser;
+    /// [`BadgerOptions::n_threads`] and [`BadgerOptions::split_circuit`] are
+    /// ignored.
+    pub fn optimise_with_checkpoints(
+        &self,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        log_config: BadgerLogger,
+        options: BadgerOptions,
+        checkpoint: &CheckpointOptions,
+    ) -> Circuit {
+        let circ = circ.to_owned();
+        if circ.subgraph() == Err(InvalidSubgraph::EmptySubgraph) {
+            // No rewrites possible in an empty circuit
+            panic!("Empty circuit input not supported; no optimisation possible");
+        }
+        let input_hash = checkpoint::input_hash(&circ);
+        let init_state = self.init_state(circ);
+        let mut pq = StatePQueue::new(options.queue_size, None);
+        pq.push(init_state.clone(), &self);
+        let h = self
+            .badger_checkpointed(
+                pq,
+                init_state,
+                log_config,
+                options,
+                Some(checkpoint),
+                input_hash,
+            )
+            .into_hugr();
+        Circuit::new(h)
+    }
+
+    /// Resume a Badger optimisation from a checkpoint.
+    ///
+    /// The circuits queued for processing and the set of circuits already
+    /// explored are restored from `checkpoint`. Timeouts and circuit counts in
+    /// `options` apply to the resumed run only. If `save` is given, new
+    /// checkpoints keep being written as in [`Self::optimise_with_checkpoints`].
+    ///
+    /// Use [`BadgerCheckpoint::check_input`] to make sure the checkpoint
+    /// belongs to the circuit being optimised.
+    pub fn resume_from_checkpoint(
+        &self,
+        checkpoint: &BadgerCheckpoint,
+        log_config: BadgerLogger,
+        options: BadgerOptions,
+        save: Option<&CheckpointOptions>,
+    ) -> Circuit {
+        let best_state = self.init_state(checkpoint.best_circuit());
+        let mut pq = StatePQueue::new(options.queue_size, None);
+        for circ in checkpoint.queued_circuits() {
+            pq.push(self.init_state(circ), &self);
+        }
+        // Must come after the queue is restored, as seen states are rejected.
+        pq.extend_seen_hashes(checkpoint.seen_hashes().iter().copied());
+        let h = self
+            .badger_checkpointed(
+                pq,
+                best_state,
+                log_config,
+                options,
+                save,
+                checkpoint.input_hash(),
+            )
+            .into_hugr();
+        Circuit::new(h)
+    }
+
+    /// Wrap a circuit into a search state.
+    fn init_state(&self, circ: Circuit) -> BadgerState<S::Cost> {
+        let circ = ResourceScope::from_circuit(circ);
+        let cost = self.cost(&circ);
+        BadgerState { circ, cost }
+    }
+
+    /// Run the single-threaded Badger optimiser from a pre-populated queue,
+    /// optionally saving checkpoints.
+    ///
+    /// `input_hash` identifies the circuit the optimisation started from, and
+    /// is recorded in the checkpoints.
+    #[tracing::instrument(target = "badger::metrics", skip(self, pq, best_state, logger))]
+    fn badger_checkpointed(
+        &self,
+        pq: StatePQueue<BadgerState<S::Cost>, S::Cost>,
+        best_state: BadgerState<S::Cost>,
+        logger: BadgerLogger,
+        opt: BadgerOptions,
+        checkpoint: Option<&CheckpointOptions>,
+        input_hash: Option<u64>,
+    ) -> ResourceScope {
+        if opt.n_threads.get() > 1 {
+            logger
+                .warn("Checkpointing is only supported on a single thread. Ignoring `n_threads`.");
+        }
+        let backtracking = BacktrackingOptimiser::with_badger_options(&opt);
+        let options = OptimiserOptions {
+            badger_logger: logger,
+            ..Default::default()
+        };
+
+        let mut save_fn;
+        let search_checkpoint = match checkpoint {
+            Some(checkpoint) => {
+                save_fn = |pq: &StatePQueue<BadgerState<S::Cost>, S::Cost>,
+                           best: &BadgerState<S::Cost>| {
+                    BadgerCheckpoint::from_search(pq, best, input_hash).save(&checkpoint.path)
+                };
+                Some(SearchCheckpoint {
+                    interval: checkpoint.interval,
+                    save: &mut save_fn,
+                })
+            }
+            None => None,
+        };
+
+        backtracking
+            .resume(pq, best_state, self, options, |_, _| {}, search_checkpoint)
+            .expect("optimisation failed")
+            .best_state
+            .circ
+    }
+
     /// Run the Badger optimiser on a circuit, using a single thread.
-    #[tracing::instrument(target = "badger::metrics", skip(self, circ, logger))]
+    #[tracing::instrument(target = "badger::metrics", skip(self, circ, logger, on_best))]
     fn badger(
         &self,
         circ: &Circuit<impl HugrView<Node = Node>>,
         logger: BadgerLogger,
         opt: BadgerOptions,
-    ) -> ResourceScope {
+        stop_signal: &StopSignal,
+        on_best: &mut dyn FnMut(&ResourceScope, &S::Cost),
+    ) -> (ResourceScope, BadgerStats<S::Cost>) {
         let backtracking = BacktrackingOptimiser::with_badger_options(&opt);
         let circ = circ.to_owned();
         if circ.subgraph() == Err(InvalidSubgraph::EmptySubgraph) {
@@ -242,24 +481,39 @@ where
 
         let circ = ResourceScope::from_circuit(circ);
         let cost = self.cost(&circ);
+        let initial_cost = cost.clone();
         let init_state = BadgerState { circ, cost };
-        backtracking
-            .optimise_with_options(init_state, self, logger.into())
-            .expect("optimisation failed")
-            .best_state
-            .circ
+        let options = OptimiserOptions {
+            badger_logger: logger,
+            stop_signal: Some(stop_signal.clone()),
+            ..Default::default()
+        };
+        let res = backtracking
+            .optimise_with_callback(init_state, self, options, |state, cost| {
+                on_best(&state.circ, cost)
+            })
+            .expect("optimisation failed");
+        let stats = BadgerStats {
+            initial_cost,
+            final_cost: res.best_state.cost,
+            circuits_processed: res.visited_count,
+            circuits_seen: res.seen_count,
+        };
+        (res.best_state.circ, stats)
     }
 
     /// Run the Badger optimiser on a circuit, using multiple threads.
     ///
     /// This is the multi-threaded version of [`Self::badger`], using a single
     /// priority queue and multiple workers to process the circuits in parallel.
-    #[tracing::instrument(target = "badger::metrics", skip(self, circ, logger))]
+    #[tracing::instrument(target = "badger::metrics", skip(self, circ, logger, on_best))]
     fn badger_multithreaded(
         &self,
         circ: &Circuit<impl HugrView<Node = Node>>,
         mut logger: BadgerLogger,
         opt: BadgerOptions,
+        stop_signal: &StopSignal,
+        on_best: &mut dyn FnMut(&ResourceScope, &S::Cost),
     ) -> ResourceScope {
         let start_time = Instant::now();
         let n_threads: usize = opt.n_threads.get();
@@ -279,6 +533,7 @@ where
         let initial_circ_hash = circ.circuit_hash(circ.parent()).unwrap();
         let mut best_circ = circ.clone();
         let mut best_circ_cost = self.cost(&best_circ);
+        on_best(&best_circ, &best_circ_cost);
 
         // Initialise the work channels and send the initial circuit.
         pq.send(vec![pqueue_worker::Work {
@@ -308,6 +563,9 @@ where
             Some(t) => crossbeam_channel::at(Instant::now() + Duration::from_secs(t)),
         };
 
+        // Periodically check whether we have been asked to stop.
+        let stop_check_event = crossbeam_channel::tick(Duration::from_millis(50));
+
         // Main loop: log best circuits as they come in from the priority queue,
         // until the timeout is reached.
         let mut timeout_flag = false;
@@ -323,6 +581,7 @@ where
                                 best_circ_cost = cost;
                                 let num_rewrites = best_circ.rewrite_trace().map(|rs| rs.count());
                                 logger.log_best(&best_circ_cost, num_rewrites);
+                                on_best(&best_circ, &best_circ_cost);
                                 if let Some(t) = opt.progress_timeout {
                                     progress_timeout_event = crossbeam_channel::at(Instant::now() + Duration::from_secs(t));
                                 }
@@ -360,6 +619,14 @@ where
                     let _ = pq.close();
                     break;
                 }
+                recv(stop_check_event) -> _ => {
+                    if stop_signal.is_stopped() {
+                        timeout_flag = true;
+                        // Signal the workers to stop.
+                        let _ = pq.close();
+                        break;
+                    }
+                }
             }
         }
 
@@ -372,6 +639,7 @@ where
                         best_circ_cost = cost;
                         let num_rewrites = best_circ.rewrite_trace().map(|rs| rs.count());
                         logger.log_best(&best_circ_cost, num_rewrites);
+                        on_best(&best_circ, &best_circ_cost);
                     }
                 }
                 pqueue_worker::LogMessage::StateCount {
@@ -403,12 +671,16 @@ where
     /// multithreading.
     ///
     /// Split the circuit into chunks and process each in a separate thread.
-    #[tracing::instrument(target = "badger::metrics", skip(self, circ, logger))]
+    /// With [`BadgerOptions::split_halo`], this is done twice, on alternating
+    /// halo windows.
+    #[tracing::instrument(target = "badger::metrics", skip(self, circ, logger, on_best))]
     fn badger_split_multithreaded(
         &self,
         circ: &Circuit<impl HugrView<Node = Node>>,
         mut logger: BadgerLogger,
         opt: BadgerOptions,
+        stop_signal: &StopSignal,
+        on_best: &mut dyn FnMut(&ResourceScope, &S::Cost),
     ) -> Result<ResourceScope, HugrError> {
         let start_time = Instant::now();
         let circ = circ.to_owned();
@@ -420,70 +692,123 @@ where
 
         let circ = ResourceScope::from_circuit(circ);
         let circ_cost = self.cost(&circ);
-        let max_chunk_cost = circ_cost.clone().div_cost(opt.n_threads);
-        logger.log(format!(
-            "Splitting circuit with cost {:?} into chunks of at most {max_chunk_cost:?}.",
-            circ_cost.clone()
-        ));
-        let mut chunks = CircuitChunks::split_with_cost(&circ.as_circuit(), max_chunk_cost, |op| {
-            self.strategy.op_cost(op)
-        });
-
         let num_rewrites = circ.rewrite_trace().map(|rs| rs.count());
         logger.log_best(circ_cost.clone(), num_rewrites);
+        on_best(&circ, &circ_cost);
+
+        let split_options = SplitOptions::new()
+            .with_strategy(opt.split_strategy)
+            .with_shift(opt.split_shift);
+        let (phases, phase_opt, n_chunks) = match opt.split_halo {
+            0 => (vec![split_options], opt, opt.n_threads),
+            halo => {
+                // Only every other chunk is optimised, so we split in twice
+                // as many chunks to keep all threads busy.
+                let phases = vec![
+                    split_options.with_halo(halo, false),
+                    split_options.with_halo(halo, true),
+                ];
+                let phase_opt = BadgerOptions {
+                    timeout: opt.timeout.map(|t| t.div_ceil(2)),
+                    progress_timeout: opt.progress_timeout.map(|t| t.div_ceil(2)),
+                    ..opt
+                };
+                (
+                    phases,
+                    phase_opt,
+                    opt.n_threads.saturating_mul(NonZeroUsize::new(2).unwrap()),
+                )
+            }
+        };
+
+        let mut best_circ = circ;
+        for split_options in phases {
+            let phase_cost = self.cost(&best_circ);
+            let max_chunk_cost = phase_cost.clone().div_cost(n_chunks);
+            logger.log(format!(
+                "Splitting circuit with cost {phase_cost:?} into chunks of at most {max_chunk_cost:?}.",
+            ));
+            let mut chunks = CircuitChunks::split_with_options(
+                &best_circ.as_circuit(),
+                max_chunk_cost,
+                |op| self.strategy.op_cost(op),
+                split_options,
+            );
+            self.optimise_chunks(&mut chunks, &logger, phase_opt, stop_signal);
+            best_circ = ResourceScope::from_circuit(chunks.reassemble()?);
+        }
+
+        let best_circ_cost = self.cost(&best_circ);
+        if best_circ_cost.clone() < circ_cost {
+            let num_rewrites = best_circ.rewrite_trace().map(|rs| rs.count());
+            logger.log_best(best_circ_cost.clone(), num_rewrites);
+            on_best(&best_circ, &best_circ_cost);
+        }
+
+        logger.log_processing_end(
+            opt.n_threads.get(),
+            None,
+            best_circ_cost,
+            true,
+            false,
+            start_time.elapsed(),
+        );
+
+        Ok(best_circ)
+    }
 
+    /// Optimise each chunk in a separate thread, replacing it with the result.
+    ///
+    /// Spacer chunks are left unchanged.
+    fn optimise_chunks(
+        &self,
+        chunks: &mut CircuitChunks,
+        logger: &BadgerLogger,
+        opt: BadgerOptions,
+        stop_signal: &StopSignal,
+    ) {
+        let spacers = (0..chunks.len())
+            .map(|i| chunks.is_spacer(i))
+            .collect::<Vec<_>>();
         let (joins, rx_work): (Vec<_>, Vec<_>) = chunks
             .par_iter_mut()
             .enumerate()
+            .filter(|(i, _)| !spacers[*i])
             .map(|(i, chunk)| {
                 let (tx, rx) = crossbeam_channel::unbounded();
                 let badger = self.clone();
+                let stop_signal = stop_signal.clone();
                 let chunk = mem::take(chunk);
                 let chunk_cx_cost = chunk.circuit_cost(|op| self.strategy.op_cost(op));
                 logger.log(format!("Chunk {i} has {chunk_cx_cost:?} CX gates",));
                 let join = thread::Builder::new()
                     .name(format!("chunk-{i}"))
                     .spawn(move || {
-                        let res = badger.optimise(
+                        let res = badger.optimise_with_callback(
                             &chunk,
+                            Default::default(),
                             BadgerOptions {
                                 n_threads: NonZeroUsize::new(1).unwrap(),
                                 split_circuit: false,
                                 ..opt
                             },
+                            &stop_signal,
+                            |_, _| {},
                         );
-                        tx.send(res).unwrap();
+                        tx.send((i, res)).unwrap();
                     })
                     .unwrap();
                 (join, rx)
             })
             .unzip();
 
-        for i in 0..chunks.len() {
-            let res = rx_work[i]
+        for rx in rx_work {
+            let (i, res) = rx
                 .recv()
                 .unwrap_or_else(|_| panic!("Worker thread panicked"));
             chunks[i] = res;
         }
-
-        let best_circ = ResourceScope::from_circuit(chunks.reassemble()?);
-        let best_circ_cost = self.cost(&best_circ);
-        if best_circ_cost.clone() < circ_cost {
-            let num_rewrites = best_circ.rewrite_trace().map(|rs| rs.count());
-            logger.log_best(best_circ_cost.clone(), num_rewrites);
-        }
-
-        logger.log_processing_end(
-            opt.n_threads.get(),
-            None,
-            best_circ_cost,
-            true,
-            false,
-            start_time.elapsed(),
-        );
         joins.into_iter().for_each(|j| j.join().unwrap());
-
-        Ok(best_circ)
     }
 }
 
@@ -574,6 +899,8 @@ pub use badger_default::{DefaultBadgerStrategy, ECCBadgerOptimiser};
 #[cfg(test)]
 #[cfg(feature = "portmatching")]
 mod tests {
+    use std::time::Duration;
+
     use hugr::{
         builder::{DFGBuilder, Dataflow, DataflowHugr},
         extension::prelude::qb_t,
@@ -582,12 +909,15 @@ mod tests {
     };
     use rstest::{fixture, rstest};
 
+    use crate::optimiser::StopSignal;
     use crate::serialize::load_tk1_json_str;
     use crate::serialize::pytket::DecodeOptions;
     use crate::{extension::rotation::rotation_type, optimiser::badger::BadgerOptions};
     use crate::{Circuit, TketOp};
 
-    use super::{BadgerOptimiser, ECCBadgerOptimiser};
+    use super::{
+        BadgerCheckpoint, BadgerOptimiser, CheckpointError, CheckpointOptions, ECCBadgerOptimiser,
+    };
 
     #[fixture]
     fn rz_rz() -> Circuit {
@@ -681,6 +1011,22 @@ mod tests {
         assert!(op_matches(op2, TketOp::Rz));
     }
 
+    #[rstest]
+    fn rz_rz_cancellation_stats(rz_rz: Circuit, badger_opt_compiled: ECCBadgerOptimiser) {
+        let (opt_rz, stats) = badger_opt_compiled.optimise_with_stats(
+            &rz_rz,
+            Default::default(),
+            BadgerOptions {
+                queue_size: 4,
+                ..Default::default()
+            },
+        );
+        assert_eq!(opt_rz.num_operations(), 2);
+        assert!(stats.final_cost < stats.initial_cost);
+        assert!(stats.circuits_processed >= 1);
+        assert!(stats.circuits_seen >= stats.circuits_processed);
+    }
+
     #[rstest]
     #[case::compiled(badger_opt_compiled())]
     #[case::json(badger_opt_json())]
@@ -715,6 +1061,24 @@ mod tests {
         assert_eq!(opt_rz.commands().count(), 2);
     }
 
+    #[rstest]
+    fn rz_rz_cancellation_split_halo(rz_rz: Circuit, badger_opt_json: ECCBadgerOptimiser) {
+        let opt_rz = badger_opt_json.optimise(
+            &rz_rz,
+            BadgerOptions {
+                timeout: Some(0),
+                n_threads: 2.try_into().unwrap(),
+                queue_size: 4,
+                split_circuit: true,
+                split_shift: true,
+                split_halo: 1,
+                ..Default::default()
+            },
+        );
+        opt_rz.hugr().validate().unwrap();
+        assert!(opt_rz.commands().count() <= 2);
+    }
+
     #[rstest]
     #[ignore = "Loading the ECC set is really slow (~5 seconds)"]
     fn non_composable_rewrites(
@@ -733,6 +1097,108 @@ mod tests {
         opt.hugr().validate().unwrap();
     }
 
+    #[rstest]
+    fn stopped_optimisation(rz_rz: Circuit, badger_opt_compiled: ECCBadgerOptimiser) {
+        let stop_signal = StopSignal::new();
+        stop_signal.stop();
+
+        let mut n_reported = 0;
+        let opt_rz = badger_opt_compiled.optimise_with_callback(
+            &rz_rz,
+            Default::default(),
+            BadgerOptions::default(),
+            &stop_signal,
+            |_, _| n_reported += 1,
+        );
+        opt_rz.hugr().validate().unwrap();
+        // At least the initial circuit is reported.
+        assert!(n_reported >= 1);
+    }
+
+    #[rstest]
+    #[cfg(feature = "distributed")]
+    fn rz_rz_cancellation_distributed(rz_rz: Circuit, badger_opt_compiled: ECCBadgerOptimiser) {
+        use std::net::TcpListener;
+
+        use super::DistributedError;
+
+        let listener = TcpListener::bind("127.0.0.1:0").unwrap();
+        let addr = listener.local_addr().unwrap();
+        let workers: Vec<_> = (0..2)
+            .map(|_| {
+                let opt = badger_opt_compiled.clone();
+                std::thread::spawn(move || opt.run_distributed_worker(addr))
+            })
+            .collect();
+
+        let opt_rz = badger_opt_compiled
+            .optimise_distributed(
+                &rz_rz,
+                listener,
+                Default::default(),
+                BadgerOptions {
+                    timeout: Some(10),
+                    queue_size: 4,
+                    ..Default::default()
+                },
+                &StopSignal::new(),
+            )
+            .unwrap();
+        opt_rz.hugr().validate().unwrap();
+        assert_eq!(opt_rz.commands().count(), 2);
+
+        // A worker may only connect once the search space is already
+        // exhausted, and then finds the coordinator gone.
+        let results: Vec<_> = workers.into_iter().map(|w| w.join().unwrap()).collect();
+        assert!(results.iter().any(|res| res.is_ok()));
+        assert!(results
+            .iter()
+            .all(|res| matches!(res, Ok(()) | Err(DistributedError::Io(_)))));
+    }
+
+    #[rstest]
+    fn checkpoint_resume(rz_rz: Circuit, badger_opt_compiled: ECCBadgerOptimiser) {
+        let path = std::env::temp_dir().join(format!("badger-ckpt-{}.json", std::process::id()));
+        let checkpoint_opts = CheckpointOptions::new(&path).with_interval(Duration::ZERO);
+        let options = BadgerOptions {
+            queue_size: 4,
+            max_circuit_count: Some(1),
+            ..Default::default()
+        };
+
+        badger_opt_compiled.optimise_with_checkpoints(
+            &rz_rz,
+            Default::default(),
+            options,
+            &checkpoint_opts,
+        );
+        let checkpoint = BadgerCheckpoint::load(&path).unwrap();
+        std::fs::remove_file(&path).unwrap();
+        checkpoint.best_circuit().hugr().validate().unwrap();
+        checkpoint.check_input(&rz_rz).unwrap();
+        let other = crate::utils::build_simple_circuit(1, |circ| {
+            circ.append(TketOp::H, [0])?;
+            Ok(())
+        })
+        .unwrap();
+        assert!(matches!(
+            checkpoint.check_input(&other),
+            Err(CheckpointError::InputMismatch)
+        ));
+
+        let opt_rz = badger_opt_compiled.resume_from_checkpoint(
+            &checkpoint,
+            Default::default(),
+            BadgerOptions {
+                queue_size: 4,
+                ..Default::default()
+            },
+            None,
+        );
+        opt_rz.hugr().validate().unwrap();
+        assert_eq!(opt_rz.commands().count(), 2);
+    }
+
     #[test]
     fn load_precompiled_bin() {
         let opt =
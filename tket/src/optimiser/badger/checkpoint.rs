@@ -0,0 +1,172 @@
+//! Checkpoints of the Badger search state.
+//!
+//! A checkpoint records the best circuit found so far, the circuits waiting in
+//! the priority queue and the hashes of every circuit already explored. It can
+//! be used to resume a long-running optimisation after it was interrupted.
+
+use std::fs;
+use std::io::{self, BufReader, BufWriter, Write};
+use std::path::{Path, PathBuf};
+use std::time::Duration;
+
+use derive_more::{Display, Error, From};
+use hugr::{Hugr, HugrView, Node};
+
+use crate::circuit::CircuitHash;
+use crate::optimiser::StatePQueue;
+use crate::resource::ResourceScope;
+use crate::serialize::HugrWithExts;
+use crate::Circuit;
+
+use super::BadgerState;
+
+/// A snapshot of a single-threaded Badger optimisation.
+#[derive(Debug, Clone, serde::Serialize, serde::Deserialize)]
+pub struct BadgerCheckpoint {
+    /// The hash of the circuit the optimisation started from, if it could be
+    /// computed.
+    input_hash: Option<u64>,
+    /// The best circuit found so far.
+    best_circ: HugrWithExts,
+    /// The circuits in the priority queue.
+    queue: Vec<HugrWithExts>,
+    /// The hashes of all the circuits seen so far.
+    seen_hashes: Vec<u64>,
+}
+
+/// Options controlling when and where Badger checkpoints are written.
+#[derive(Debug, Clone)]
+pub struct CheckpointOptions {
+    /// The file the checkpoint is written to.
+    ///
+    /// The file is replaced atomically on every save.
+    pub path: PathBuf,
+    /// The minimum time between two checkpoints.
+    ///
+    /// A final checkpoint is always written when the optimisation terminates.
+    ///
+    /// Defaults to 60 seconds.
+    pub interval: Duration,
+}
+
+impl CheckpointOptions {
+    /// Write checkpoints to `path`, using the default interval.
+    pub fn new(path: impl Into<PathBuf>) -> Self {
+        Self {
+            path: path.into(),
+            interval: Duration::from_secs(60),
+        }
+    }
+
+    /// Set the minimum time between two checkpoints.
+    pub fn with_interval(mut self, interval: Duration) -> Self {
+        self.interval = interval;
+        self
+    }
+}
+
+impl BadgerCheckpoint {
+    /// Snapshot the priority queue of a running optimisation.
+    pub(super) fn from_search<C: Clone + Ord>(
+        pq: &StatePQueue<BadgerState<C>, C>,
+        best_state: &BadgerState<C>,
+        input_hash: Option<u64>,
+    ) -> Self {
+        let to_hugr = |circ: &ResourceScope| HugrWithExts::from(circ.hugr().clone());
+        Self {
+            input_hash,
+            best_circ: to_hugr(&best_state.circ),
+            queue: pq.iter().map(|entry| to_hugr(&entry.state.circ)).collect(),
+            seen_hashes: pq.seen_hashes().collect(),
+        }
+    }
+
+    /// The hash of the circuit the optimisation started from.
+    ///
+    /// Returns `None` if the circuit could not be hashed.
+    pub fn input_hash(&self) -> Option<u64> {
+        self.input_hash
+    }
+
+    /// Check that the checkpoint was taken while optimising `circ`.
+    ///
+    /// Returns [`CheckpointError::InputMismatch`] if the optimisation started
+    /// from a different circuit.
+    pub fn check_input(
+        &self,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+    ) -> Result<(), CheckpointError> {
+        match input_hash(circ) == self.input_hash {
+            true => Ok(()),
+            false => Err(CheckpointError::InputMismatch),
+        }
+    }
+
+    /// The best circuit found before the checkpoint was taken.
+    pub fn best_circuit(&self) -> Circuit {
+        Circuit::new(Hugr::from(self.best_circ.clone()))
+    }
+
+    /// The circuits that were waiting to be processed.
+    pub(super) fn queued_circuits(&self) -> impl Iterator<Item = Circuit> + '_ {
+        self.queue
+            .iter()
+            .map(|h| Circuit::new(Hugr::from(h.clone())))
+    }
+
+    /// The hashes of all the circuits seen before the checkpoint was taken.
+    pub(super) fn seen_hashes(&self) -> &[u64] {
+        &self.seen_hashes
+    }
+
+    /// The number of circuits that were waiting to be processed.
+    pub fn queue_len(&self) -> usize {
+        self.queue.len()
+    }
+
+    /// Save the checkpoint to a file.
+    ///
+    /// The checkpoint is first written to a temporary file next to `path`,
+    /// which then replaces `path`. An interrupted save never leaves a
+    /// truncated checkpoint behind.
+    pub fn save(&self, path: impl AsRef<Path>) -> Result<(), CheckpointError> {
+        let path = path.as_ref();
+        let mut tmp_path = path.as_os_str().to_owned();
+        tmp_path.push(".tmp");
+        let tmp_path = PathBuf::from(tmp_path);
+
+        let mut writer = BufWriter::new(fs::File::create(&tmp_path)?);
+        serde_json::to_writer(&mut writer, self)?;
+        writer.flush()?;
+        drop(writer);
+        fs::rename(&tmp_path, path)?;
+        Ok(())
+    }
+
+    /// Load a checkpoint from a file.
+    pub fn load(path: impl AsRef<Path>) -> Result<Self, CheckpointError> {
+        let reader = BufReader::new(fs::File::open(path)?);
+        Ok(serde_json::from_reader(reader)?)
+    }
+}
+
+/// The hash identifying the input circuit of a checkpointed optimisation.
+pub(super) fn input_hash(circ: &Circuit<impl HugrView<Node = Node>>) -> Option<u64> {
+    circ.circuit_hash(circ.parent()).ok()
+}
+
+/// Errors that can occur when saving or loading a [`BadgerCheckpoint`].
+#[derive(Debug, Display, Error, From)]
+#[non_exhaustive]
+pub enum CheckpointError {
+    /// An IO error occurred.
+    #[display("IO error: {_0}")]
+    Io(io::Error),
+    /// The checkpoint could not be (de)serialised.
+    #[display("Checkpoint serialisation error: {_0}")]
+    Serialisation(serde_json::Error),
+    /// The checkpoint was taken while optimising a different circuit.
+    #[display("The checkpoint was taken while optimising a different circuit.")]
+    #[from(ignore)]
+    InputMismatch,
+}
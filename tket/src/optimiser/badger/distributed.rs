@@ -0,0 +1,586 @@
+//! Distributed Badger optimisation across processes and machines.
+//!
+//! A coordinator owns the priority queue of circuits and the set of hashes of
+//! every circuit seen so far. Workers, possibly running on other machines,
+//! connect to it over TCP. They repeatedly request a circuit, compute its
+//! rewrites and send the resulting circuits back to the coordinator.
+//!
+//! Circuits are exchanged as binary HUGR envelopes, and only decoded by the
+//! workers. Before sending new circuits, a worker sends their hashes and costs
+//! to the coordinator, so that circuits that were already seen or that would
+//! not make it into the queue are never encoded.
+//!
+//! See [`BadgerOptimiser::optimise_distributed`] and
+//! [`BadgerOptimiser::run_distributed_worker`].
+
+use std::io::{self, BufReader, BufWriter, Read, Write};
+use std::net::{TcpListener, TcpStream, ToSocketAddrs};
+use std::sync::{Arc, Mutex};
+use std::thread::{self, JoinHandle};
+use std::time::{Duration, Instant};
+
+use derive_more::{Display, Error, From};
+use hugr::hugr::views::sibling_subgraph::InvalidSubgraph;
+use hugr::{HugrView, Node};
+use serde::de::DeserializeOwned;
+use serde::{Deserialize, Serialize};
+
+use crate::circuit::cost::CircuitCost;
+use crate::circuit::CircuitHash;
+use crate::optimiser::{StatePQueue, StopSignal};
+use crate::resource::ResourceScope;
+use crate::rewrite::Rewriter;
+use crate::serialize::{CircuitLoadError, EnvelopeConfig, EnvelopeError};
+use crate::Circuit;
+
+use super::log::LOG_TARGET;
+use super::{BadgerLogger, BadgerOptimiser, BadgerOptions, BadgerRewriteStrategy, BadgerRewriter};
+
+/// How long workers wait before asking again when the queue is empty.
+const WORKER_RETRY_INTERVAL: Duration = Duration::from_millis(10);
+
+/// How often the coordinator checks for new workers and stopping conditions.
+const COORDINATOR_POLL_INTERVAL: Duration = Duration::from_millis(10);
+
+/// How long to wait on a silent peer before dropping the connection.
+///
+/// Workers do not send anything while they process a circuit, so this must
+/// be larger than the time it takes to process one.
+const PEER_TIMEOUT: Duration = Duration::from_secs(600);
+
+/// The largest message accepted from a peer, in bytes.
+const MAX_MESSAGE_LEN: u64 = 1 << 30;
+
+/// A message sent by a worker to the coordinator.
+#[derive(Debug, Serialize, Deserialize)]
+enum Request<C> {
+    /// Request a circuit to process.
+    Pop,
+    /// Ask which of the candidate circuits, given by their hash and cost,
+    /// should be sent to the coordinator.
+    Filter(Vec<(u64, C)>),
+    /// The new circuits obtained from the last circuit received.
+    ///
+    /// Must be sent exactly once for each circuit received, even if empty.
+    Push(Vec<EncodedState<C>>),
+}
+
+/// A message sent by the coordinator to a worker.
+#[derive(Debug, Serialize, Deserialize)]
+enum Response<C> {
+    /// A circuit to process.
+    Work(EncodedState<C>),
+    /// The queue is currently empty. Try again later.
+    Wait,
+    /// For each candidate in a [`Request::Filter`], whether to send it.
+    Accepted(Vec<bool>),
+    /// The circuits were received.
+    Ack,
+    /// The optimisation is over.
+    Stop,
+}
+
+/// A circuit in transit, encoded as a binary HUGR envelope.
+#[derive(Debug, Clone, Serialize, Deserialize)]
+struct EncodedState<C> {
+    hash: u64,
+    cost: C,
+    envelope: Vec<u8>,
+}
+
+/// The state of the search, shared by all the connections of the coordinator.
+struct SearchState<C: Ord> {
+    /// The circuits waiting to be processed, and the hashes of all the
+    /// circuits seen so far.
+    pq: StatePQueue<Vec<u8>, C>,
+    /// The best circuit seen so far, and its cost.
+    best: (C, Vec<u8>),
+    /// The number of circuits sent to workers that have not been processed
+    /// yet.
+    in_flight: usize,
+    /// The number of circuits sent to workers.
+    processed_count: usize,
+    /// When the best circuit was last improved.
+    last_best_time: Instant,
+    /// Whether the workers should stop.
+    stop: bool,
+}
+
+impl<C: Clone + Ord> SearchState<C> {
+    /// Whether the search space has been exhausted.
+    fn is_exhausted(&self) -> bool {
+        self.pq.is_empty() && self.in_flight == 0
+    }
+
+    fn handle(&mut self, request: Request<C>, holding_work: &mut bool) -> Response<C> {
+        match request {
+            Request::Pop if self.stop => Response::Stop,
+            Request::Pop => match self.pq.pop() {
+                Some(entry) => {
+                    self.in_flight += 1;
+                    self.processed_count += 1;
+                    *holding_work = true;
+                    Response::Work(EncodedState {
+                        hash: entry.hash,
+                        cost: entry.cost,
+                        envelope: entry.state,
+                    })
+                }
+                None => Response::Wait,
+            },
+            Request::Filter(candidates) => Response::Accepted(
+                candidates
+                    .iter()
+                    .map(|(hash, cost)| !self.pq.is_seen(*hash) && self.pq.check_accepted(cost))
+                    .collect(),
+            ),
+            Request::Push(states) => {
+                for EncodedState {
+                    hash,
+                    cost,
+                    envelope,
+                } in states
+                {
+                    if cost < self.best.0 {
+                        self.best = (cost.clone(), envelope.clone());
+                        self.last_best_time = Instant::now();
+                    }
+                    self.pq.push_unchecked(envelope, hash, cost);
+                }
+                if *holding_work {
+                    self.in_flight -= 1;
+                    *holding_work = false;
+                }
+                Response::Ack
+            }
+        }
+    }
+}
+
+impl<R, S> BadgerOptimiser<R, S>
+where
+    R: BadgerRewriter,
+    S: BadgerRewriteStrategy,
+    S::Cost: Serialize + DeserializeOwned + Send + Sync + 'static,
+{
+    /// Run a distributed Badger optimisation, coordinating workers that
+    /// connect to `listener`.
+    ///
+    /// This process owns the priority queue and the set of seen circuits, and
+    /// does not process any circuit itself. Workers are started with
+    /// [`Self::run_distributed_worker`], in this or other processes, and may
+    /// join at any time.
+    ///
+    /// The optimisation stops when one of the limits in `options` is reached,
+    /// when `stop_signal` is set or when all circuits have been processed.
+    /// [`BadgerOptions::n_threads`] and [`BadgerOptions::split_circuit`] are
+    /// ignored, and [`BadgerOptions::max_circuit_count`] applies to the number
+    /// of circuits seen by the coordinator.
+    ///
+    /// Workers that stay silent for more than 10 minutes are disconnected, and
+    /// the circuit they were processing is lost.
+    pub fn optimise_distributed(
+        &self,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        listener: TcpListener,
+        mut logger: BadgerLogger,
+        options: BadgerOptions,
+        stop_signal: &StopSignal,
+    ) -> Result<Circuit, DistributedError> {
+        let start_time = Instant::now();
+        let circ = circ.to_owned();
+        if circ.subgraph() == Err(InvalidSubgraph::EmptySubgraph) {
+            // No rewrites possible in an empty circuit
+            panic!("Empty circuit input not supported; no optimisation possible");
+        }
+
+        let circ = ResourceScope::from_circuit(circ);
+        let cost = self.cost(&circ);
+        let hash = circ
+            .circuit_hash(circ.parent())
+            .expect("Could not hash the input circuit");
+        let envelope = encode(&circ)?;
+        logger.log_best(&cost, None);
+
+        let mut pq = StatePQueue::new(options.queue_size, None);
+        pq.push_unchecked(envelope.clone(), hash, cost.clone());
+        let state = Arc::new(Mutex::new(SearchState {
+            pq,
+            best: (cost.clone(), envelope),
+            in_flight: 0,
+            processed_count: 0,
+            last_best_time: Instant::now(),
+            stop: false,
+        }));
+
+        listener.set_nonblocking(true)?;
+        let mut connections: Vec<JoinHandle<()>> = Vec::new();
+        let mut best_cost = cost;
+        let mut timeout_flag = false;
+        loop {
+            accept_workers(&listener, &state, &mut connections, &logger)?;
+
+            let mut st = state.lock().unwrap();
+            if st.best.0 < best_cost {
+                best_cost = st.best.0.clone();
+                logger.log_best(&best_cost, None);
+            }
+            logger.log_progress(
+                st.processed_count,
+                Some(st.pq.len()),
+                st.pq.num_seen_hashes(),
+            );
+
+            let timed_out = options
+                .timeout
+                .is_some_and(|t| start_time.elapsed().as_secs() >= t)
+                || options
+                    .progress_timeout
+                    .is_some_and(|t| st.last_best_time.elapsed().as_secs() >= t)
+                || options
+                    .max_circuit_count
+                    .is_some_and(|max| st.pq.num_seen_hashes() > max)
+                || stop_signal.is_stopped();
+            if timed_out || st.is_exhausted() {
+                timeout_flag = timed_out;
+                st.stop = true;
+                break;
+            }
+            drop(st);
+            thread::sleep(COORDINATOR_POLL_INTERVAL);
+        }
+
+        // Workers still waiting to connect get a stop message too.
+        accept_workers(&listener, &state, &mut connections, &logger)?;
+        // Wait for the workers to receive the stop message.
+        connections.into_iter().for_each(|j| j.join().unwrap());
+
+        let st = state.lock().unwrap();
+        logger.log_processing_end(
+            st.processed_count,
+            Some(st.pq.num_seen_hashes()),
+            st.best.0.clone(),
+            true,
+            timeout_flag,
+            start_time.elapsed(),
+        );
+        Ok(Circuit::load(&st.best.1[..], None)?)
+    }
+
+    /// Run a worker for a distributed Badger optimisation.
+    ///
+    /// Connects to the coordinator at `addr`, started with
+    /// [`Self::optimise_distributed`], and processes circuits until the
+    /// coordinator stops the optimisation.
+    ///
+    /// All workers and the coordinator must use the same rewriter and
+    /// strategy.
+    pub fn run_distributed_worker(&self, addr: impl ToSocketAddrs) -> Result<(), DistributedError> {
+        let stream = TcpStream::connect(addr)?;
+        set_stream_options(&stream)?;
+        let mut reader = BufReader::new(stream.try_clone()?);
+        let mut writer = BufWriter::new(stream);
+
+        loop {
+            send(&mut writer, &Request::<S::Cost>::Pop)?;
+            let work = match recv::<Response<S::Cost>>(&mut reader)? {
+                Response::Work(work) => work,
+                Response::Wait => {
+                    thread::sleep(WORKER_RETRY_INTERVAL);
+                    continue;
+                }
+                Response::Stop => return Ok(()),
+                Response::Accepted(_) | Response::Ack => {
+                    return Err(DistributedError::UnexpectedMessage)
+                }
+            };
+
+            let circ = ResourceScope::from_circuit(Circuit::load(&work.envelope[..], None)?);
+            let rewrites = self.rewriter.get_all_rewrites(&circ);
+            let candidates: Vec<_> = self
+                .strategy
+                .apply_rewrites(rewrites, &circ)
+                .filter_map(|r| {
+                    // Invalid compositions of rewrites cannot be hashed.
+                    let hash = r.circ.circuit_hash(r.circ.parent()).ok()?;
+                    Some((hash, work.cost.add_delta(&r.cost_delta), r.circ))
+                })
+                .collect();
+
+            let filter = candidates
+                .iter()
+                .map(|(hash, cost, _)| (*hash, cost.clone()))
+                .collect();
+            send(&mut writer, &Request::Filter(filter))?;
+            let Response::Accepted(accepted) = recv::<Response<S::Cost>>(&mut reader)? else {
+                return Err(DistributedError::UnexpectedMessage);
+            };
+
+            let new_states = candidates
+                .into_iter()
+                .zip(accepted)
+                .filter(|(_, accepted)| *accepted)
+                .map(|((hash, cost, circ), _)| {
+                    Ok(EncodedState {
+                        hash,
+                        cost,
+                        envelope: encode(&circ)?,
+                    })
+                })
+                .collect::<Result<Vec<_>, DistributedError>>()?;
+            send(&mut writer, &Request::Push(new_states))?;
+            let Response::Ack = recv::<Response<S::Cost>>(&mut reader)? else {
+                return Err(DistributedError::UnexpectedMessage);
+            };
+        }
+    }
+}
+
+/// Accept all pending worker connections, serving each in a new thread.
+fn accept_workers<C>(
+    listener: &TcpListener,
+    state: &Arc<Mutex<SearchState<C>>>,
+    connections: &mut Vec<JoinHandle<()>>,
+    logger: &BadgerLogger,
+) -> io::Result<()>
+where
+    C: Clone + Ord + Serialize + DeserializeOwned + Send + 'static,
+{
+    loop {
+        let (stream, addr) = match listener.accept() {
+            Ok(conn) => conn,
+            Err(e) if e.kind() == io::ErrorKind::WouldBlock => return Ok(()),
+            Err(e) => return Err(e),
+        };
+        logger.log(format!("Worker connected from {addr}."));
+        stream.set_nonblocking(false)?;
+        set_stream_options(&stream)?;
+        let state = state.clone();
+        let join = thread::Builder::new()
+            .name(format!("badger-coordinator-{addr}"))
+            .spawn(move || {
+                if let Err(e) = serve_worker(stream, state) {
+                    tracing::warn!(target: LOG_TARGET, "Worker {addr} disconnected: {e}");
+                }
+            })?;
+        connections.push(join);
+    }
+}
+
+/// Answer the requests of a single worker until it disconnects.
+///
+/// If the worker disconnects while processing a circuit, the circuit is lost.
+fn serve_worker<C>(
+    stream: TcpStream,
+    state: Arc<Mutex<SearchState<C>>>,
+) -> Result<(), DistributedError>
+where
+    C: Clone + Ord + Serialize + DeserializeOwned,
+{
+    let mut reader = BufReader::new(stream.try_clone()?);
+    let mut writer = BufWriter::new(stream);
+    let mut holding_work = false;
+    let res = loop {
+        let request = match recv(&mut reader) {
+            Ok(request) => request,
+            Err(DistributedError::Io(e)) if e.kind() == io::ErrorKind::UnexpectedEof => {
+                break Ok(());
+            }
+            Err(e) => break Err(e),
+        };
+        let response = state.lock().unwrap().handle(request, &mut holding_work);
+        let stop = matches!(response, Response::Stop);
+        if let Err(e) = send(&mut writer, &response) {
+            break Err(e);
+        }
+        if stop {
+            break Ok(());
+        }
+    };
+    if holding_work {
+        state.lock().unwrap().in_flight -= 1;
+    }
+    res
+}
+
+/// Configure a connection between a worker and the coordinator.
+fn set_stream_options(stream: &TcpStream) -> io::Result<()> {
+    stream.set_nodelay(true)?;
+    stream.set_read_timeout(Some(PEER_TIMEOUT))?;
+    stream.set_write_timeout(Some(PEER_TIMEOUT))
+}
+
+/// Encode a circuit as a binary envelope.
+fn encode(circ: &ResourceScope) -> Result<Vec<u8>, EnvelopeError> {
+    let mut envelope = Vec::new();
+    circ.as_circuit()
+        .store(&mut envelope, EnvelopeConfig::binary())?;
+    Ok(envelope)
+}
+
+/// Send a length-prefixed message.
+fn send(writer: &mut impl Write, msg: &impl Serialize) -> Result<(), DistributedError> {
+    let bytes = rmp_serde::to_vec(msg)?;
+    writer.write_all(&(bytes.len() as u64).to_le_bytes())?;
+    writer.write_all(&bytes)?;
+    writer.flush()?;
+    Ok(())
+}
+
+/// Receive a length-prefixed message.
+///
+/// Messages longer than [`MAX_MESSAGE_LEN`] are rejected before being read.
+fn recv<T: DeserializeOwned>(reader: &mut impl Read) -> Result<T, DistributedError> {
+    let mut len = [0; 8];
+    reader.read_exact(&mut len)?;
+    let len = u64::from_le_bytes(len);
+    if len > MAX_MESSAGE_LEN {
+        return Err(DistributedError::MessageTooLarge { len });
+    }
+    // Only allocate as much as the peer actually sends.
+    let mut bytes = Vec::new();
+    reader.take(len).read_to_end(&mut bytes)?;
+    if bytes.len() as u64 != len {
+        return Err(io::Error::from(io::ErrorKind::UnexpectedEof).into());
+    }
+    Ok(rmp_serde::from_slice(&bytes)?)
+}
+
+/// Errors that can occur during a distributed Badger optimisation.
+#[derive(Debug, Display, Error, From)]
+#[non_exhaustive]
+pub enum DistributedError {
+    /// A network error occurred.
+    #[display("IO error: {_0}")]
+    Io(io::Error),
+    /// A message could not be encoded.
+    #[display("Message encoding error: {_0}")]
+    Encode(rmp_serde::encode::Error),
+    /// A message could not be decoded.
+    #[display("Message decoding error: {_0}")]
+    Decode(rmp_serde::decode::Error),
+    /// A circuit could not be encoded.
+    #[display("Circuit encoding error: {_0}")]
+    Envelope(EnvelopeError),
+    /// A circuit could not be decoded.
+    #[display("Circuit decoding error: {_0}")]
+    CircuitLoad(CircuitLoadError),
+    /// The peer sent a message that does not follow the protocol.
+    #[display("Unexpected message from the peer")]
+    #[from(ignore)]
+    UnexpectedMessage,
+    /// The peer announced a message larger than the maximum allowed size.
+    #[display("Message of {len} bytes exceeds the maximum size")]
+    #[from(ignore)]
+    MessageTooLarge {
+        /// The announced length of the message.
+        len: u64,
+    },
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    use rstest::rstest;
+
+    #[rstest]
+    fn recv_checks_message_length() {
+        let mut bytes = Vec::new();
+        send(&mut bytes, &Request::<usize>::Pop).unwrap();
+        assert!(matches!(
+            recv(&mut bytes.as_slice()).unwrap(),
+            Request::<usize>::Pop
+        ));
+
+        // A truncated message is an IO error.
+        let truncated = &bytes[..bytes.len() - 1];
+        assert!(matches!(
+            recv::<Request<usize>>(&mut &truncated[..]),
+            Err(DistributedError::Io(_))
+        ));
+
+        // Oversized messages are rejected without reading them.
+        let huge = (MAX_MESSAGE_LEN + 1).to_le_bytes();
+        assert!(matches!(
+            recv::<Request<usize>>(&mut &huge[..]),
+            Err(DistributedError::MessageTooLarge { .. })
+        ));
+    }
+
+    #[rstest]
+    #[cfg(feature = "portmatching")]
+    fn worker_disconnects_mid_run() {
+        use crate::optimiser::badger::{DefaultBadgerStrategy, ECCBadgerOptimiser};
+        use crate::rewrite::strategy::RewriteStrategy;
+        use crate::utils::build_simple_circuit;
+        use crate::TketOp;
+
+        type Cost = <DefaultBadgerStrategy as RewriteStrategy>::Cost;
+
+        fn pop(reader: &mut impl Read, writer: &mut impl Write) -> Response<Cost> {
+            send(writer, &Request::<Cost>::Pop).unwrap();
+            recv(reader).unwrap()
+        }
+
+        let optimiser =
+            ECCBadgerOptimiser::default_with_eccs_json_file("../test_files/eccs/small_eccs.json")
+                .unwrap();
+        let circ = build_simple_circuit(2, |circ| {
+            circ.append(TketOp::CX, [0, 1])?;
+            circ.append(TketOp::CX, [0, 1])?;
+            Ok(())
+        })
+        .unwrap();
+
+        let listener = TcpListener::bind("127.0.0.1:0").unwrap();
+        let addr = listener.local_addr().unwrap();
+        let timeout = 60;
+        let options = BadgerOptions {
+            timeout: Some(timeout),
+            queue_size: 4,
+            ..Default::default()
+        };
+        let start = Instant::now();
+        let coordinator = thread::spawn(move || {
+            optimiser.optimise_distributed(
+                &circ,
+                listener,
+                Default::default(),
+                options,
+                &StopSignal::new(),
+            )
+        });
+
+        // A worker takes the input circuit, the only one in the queue.
+        let stream = TcpStream::connect(addr).unwrap();
+        let mut lost_reader = BufReader::new(stream.try_clone().unwrap());
+        let mut lost_writer = BufWriter::new(stream);
+        assert!(matches!(
+            pop(&mut lost_reader, &mut lost_writer),
+            Response::Work(_)
+        ));
+
+        // Another worker waits for work, until the first one disconnects
+        // without sending anything back.
+        let stream = TcpStream::connect(addr).unwrap();
+        let mut reader = BufReader::new(stream.try_clone().unwrap());
+        let mut writer = BufWriter::new(stream);
+        assert!(matches!(pop(&mut reader, &mut writer), Response::Wait));
+        drop((lost_reader, lost_writer));
+        loop {
+            match pop(&mut reader, &mut writer) {
+                Response::Wait => thread::sleep(WORKER_RETRY_INTERVAL),
+                Response::Stop => break,
+                _ => panic!("unexpected response from the coordinator"),
+            }
+        }
+
+        // The lost circuit is no longer in flight, so the search ends without
+        // waiting for the timeout, with the input circuit.
+        let opt_circ = coordinator.join().unwrap().unwrap();
+        assert!(start.elapsed().as_secs() < timeout);
+        opt_circ.hugr().validate().unwrap();
+        assert_eq!(opt_circ.num_operations(), 2);
+    }
+}
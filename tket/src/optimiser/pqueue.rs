@@ -175,6 +175,33 @@ impl<S: Clone, P: Clone + Ord> StatePQueue<S, P> {
         self.seen_hashes.len()
     }
 
+    /// Iterate over the states currently in the queue, in no particular order.
+    pub fn iter(&self) -> impl Iterator<Item = Entry<&S, &P, u64>> + '_ {
+        self.queue.iter().map(|(&hash, cost)| Entry {
+            state: &self.hash_lookup[&hash],
+            cost,
+            hash,
+        })
+    }
+
+    /// Returns `true` if a state with the given hash was already pushed to the
+    /// queue.
+    pub fn is_seen(&self, hash: u64) -> bool {
+        self.seen_hashes.contains(&hash)
+    }
+
+    /// Iterate over the hashes of all the states ever pushed to the queue.
+    pub fn seen_hashes(&self) -> impl Iterator<Item = u64> + '_ {
+        self.seen_hashes.iter().copied()
+    }
+
+    /// Mark the given hashes as seen.
+    ///
+    /// Any later attempt to push a state with one of these hashes will fail.
+    pub fn extend_seen_hashes(&mut self, hashes: impl IntoIterator<Item = u64>) {
+        self.seen_hashes.extend(hashes);
+    }
+
     /// Returns `true` if an element with the given cost would be accepted.
     ///
     /// If `false`, the element will be dropped if passed to
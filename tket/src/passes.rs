@@ -8,7 +8,7 @@ pub mod borrow_squash;
 pub use borrow_squash::BorrowSquashPass;
 
 pub mod chunks;
-pub use chunks::CircuitChunks;
+pub use chunks::{CircuitChunks, SplitOptions, SplitStrategy};
 
 pub mod guppy;
 pub use guppy::NormalizeGuppy;
@@ -4,6 +4,7 @@
 
 use std::collections::HashMap;
 use std::mem;
+use std::num::NonZeroUsize;
 use std::ops::{Index, IndexMut};
 
 use derive_more::From;
@@ -43,6 +44,8 @@ pub struct Chunk {
     inputs: Vec<ChunkConnection>,
     /// The original wires connected to the output.
     outputs: Vec<ChunkConnection>,
+    /// Whether the chunk is a spacer between two halo windows.
+    spacer: bool,
 }
 
 impl Chunk {
@@ -89,6 +92,7 @@ impl Chunk {
             circ: extracted,
             inputs,
             outputs,
+            spacer: false,
         }
     }
 
@@ -224,6 +228,214 @@ enum ConnectionTarget {
     TransitiveConnection(ChunkConnection),
 }
 
+/// The strategy used to choose the chunk boundaries when splitting a circuit.
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq, Hash)]
+#[non_exhaustive]
+pub enum SplitStrategy {
+    /// Cut the command stream greedily, starting a new chunk whenever the
+    /// accumulated cost would exceed the maximum.
+    #[default]
+    Greedy,
+    /// Grow each chunk along the circuit, always adding the available gate
+    /// that introduces the fewest new input wires to the chunk.
+    ///
+    /// Densely interacting regions are kept in the same chunk, so fewer
+    /// wires are cut between chunks. Slower to compute than
+    /// [`SplitStrategy::Greedy`].
+    MinBoundary,
+}
+
+/// Options for [`CircuitChunks::split_with_options`].
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq, Hash)]
+#[non_exhaustive]
+pub struct SplitOptions {
+    /// How to choose the chunk boundaries.
+    pub strategy: SplitStrategy,
+    /// Whether to shift the chunk boundaries by half a chunk, by limiting the
+    /// first chunk to half the maximum cost.
+    pub shift: bool,
+    /// The number of commands by which halo windows extend into their
+    /// neighbouring chunks. Zero disables halo windows.
+    pub halo: usize,
+    /// Whether the halo windows are the odd-numbered chunks, rather than the
+    /// even-numbered ones.
+    pub halo_odd: bool,
+}
+
+impl SplitOptions {
+    /// Default split options, cutting the circuit greedily.
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Set the strategy used to choose the chunk boundaries.
+    pub fn with_strategy(mut self, strategy: SplitStrategy) -> Self {
+        self.strategy = strategy;
+        self
+    }
+
+    /// Shift the chunk boundaries by half a chunk.
+    ///
+    /// Splitting alternately with and without a shift lets patterns that
+    /// straddle a boundary in one split be found in the next.
+    pub fn with_shift(mut self, shift: bool) -> Self {
+        self.shift = shift;
+        self
+    }
+
+    /// Extend every other chunk by up to `halo` commands on each side,
+    /// taken from its neighbours.
+    ///
+    /// The extended chunks are halo windows, and what remains of the other
+    /// chunks are spacers, see [`CircuitChunks::is_spacer`]. Optimising the
+    /// windows while leaving the spacers unchanged, and then doing the same
+    /// with `odd` flipped, covers every boundary with context on both sides.
+    /// Each neighbour gives at most half of its commands to each side, and
+    /// empty spacers are dropped.
+    pub fn with_halo(mut self, halo: usize, odd: bool) -> Self {
+        self.halo = halo;
+        self.halo_odd = odd;
+        self
+    }
+}
+
+/// Group the commands of a circuit into consecutive runs, the `i`-th of cost
+/// at most `max_cost(i)`.
+fn greedy_groups<C: CircuitCost>(
+    circ: &Circuit<impl HugrView<Node = Node>>,
+    max_cost: impl Fn(usize) -> C,
+    op_cost: impl Fn(&OpType) -> C,
+) -> Vec<Vec<Node>> {
+    let hugr = circ.hugr();
+    let mut running_cost = C::default();
+    let mut current_group = 0;
+    let mut groups = Vec::new();
+    for (_, nodes) in &circ.commands().map(|cmd| cmd.node()).chunk_by(|&node| {
+        let new_cost = running_cost.clone() + op_cost(hugr.get_optype(node));
+        if new_cost.sub_cost(&max_cost(current_group)).as_isize() > 0 {
+            running_cost = C::default();
+            current_group += 1;
+        } else {
+            running_cost = new_cost;
+        }
+        current_group
+    }) {
+        groups.push(nodes.collect());
+    }
+    groups
+}
+
+/// Group the commands of a circuit into chunks, the `i`-th of cost at most
+/// `max_cost(i)`, minimising the number of wires entering each chunk.
+///
+/// The commands are scheduled in a new topological order, picking at each
+/// step the command whose predecessors have all been scheduled and which has
+/// the fewest inputs coming from outside the current chunk. Ties are broken
+/// by the original command order. Each chunk is a contiguous run of this
+/// order, and is therefore convex.
+fn min_boundary_groups<C: CircuitCost>(
+    circ: &Circuit<impl HugrView<Node = Node>>,
+    max_cost: impl Fn(usize) -> C,
+    op_cost: impl Fn(&OpType) -> C,
+) -> Vec<Vec<Node>> {
+    let hugr = circ.hugr();
+    let nodes = circ.commands().map(|cmd| cmd.node()).collect_vec();
+    let position: HashMap<Node, usize> = nodes.iter().enumerate().map(|(i, &n)| (n, i)).collect();
+    // The number of unscheduled predecessors of each command.
+    let mut pending = nodes
+        .iter()
+        .map(|&n| {
+            hugr.input_neighbours(n)
+                .filter(|m| position.contains_key(m))
+                .unique()
+                .count()
+        })
+        .collect_vec();
+    let mut ready = (0..nodes.len()).filter(|&i| pending[i] == 0).collect_vec();
+    let mut chunk_of = vec![None; nodes.len()];
+
+    let mut groups = Vec::new();
+    let mut current = Vec::new();
+    let mut running_cost = C::default();
+    while !ready.is_empty() {
+        let chunk = groups.len();
+        let outside_inputs = |i: usize| {
+            let node = nodes[i];
+            hugr.node_inputs(node)
+                .flat_map(|p| hugr.linked_outputs(node, p))
+                .filter(|(src, _)| {
+                    position
+                        .get(src)
+                        .is_none_or(|&j| chunk_of[j] != Some(chunk))
+                })
+                .count()
+        };
+        let (k, i) = ready
+            .iter()
+            .copied()
+            .enumerate()
+            .min_by_key(|&(_, i)| (outside_inputs(i), i))
+            .unwrap();
+        ready.swap_remove(k);
+
+        let node = nodes[i];
+        let cost = op_cost(hugr.get_optype(node));
+        let new_cost = running_cost.clone() + cost.clone();
+        if new_cost.sub_cost(&max_cost(groups.len())).as_isize() > 0 && !current.is_empty() {
+            groups.push(mem::take(&mut current));
+            running_cost = cost;
+        } else {
+            running_cost = new_cost;
+        }
+        chunk_of[i] = Some(groups.len());
+        current.push(node);
+
+        for succ in hugr.output_neighbours(node).unique() {
+            if let Some(&j) = position.get(&succ) {
+                pending[j] -= 1;
+                if pending[j] == 0 {
+                    ready.push(j);
+                }
+            }
+        }
+    }
+    if !current.is_empty() {
+        groups.push(current);
+    }
+    groups
+}
+
+/// Regroup consecutive groups into halo windows and spacers, as described in
+/// [`SplitOptions::with_halo`].
+///
+/// Returns each new group, with whether it is a spacer.
+fn halo_windows(groups: Vec<Vec<Node>>, halo: usize, odd: bool) -> Vec<(Vec<Node>, bool)> {
+    let n_groups = groups.len();
+    let mut windows = Vec::new();
+    // The tail of the last spacer, to prepend to the next window.
+    let mut carry = Vec::new();
+    for (i, mut group) in groups.into_iter().enumerate() {
+        if i % 2 == usize::from(odd) {
+            carry.append(&mut group);
+            windows.push((mem::take(&mut carry), false));
+            continue;
+        }
+        let side = halo.min(group.len() / 2);
+        if i > 0 {
+            // The previous group is a window.
+            let (window, _) = windows.last_mut().unwrap();
+            window.extend(group.drain(..side));
+        }
+        if i + 1 < n_groups {
+            carry = group.split_off(group.len() - side);
+        }
+        if !group.is_empty() {
+            windows.push((group, true));
+        }
+    }
+    windows
+}
+
 /// An utility for splitting a circuit into chunks, and reassembling them
 /// afterwards.
 ///
@@ -263,6 +475,38 @@ impl CircuitChunks {
         circ: &Circuit<impl HugrView<Node = Node>>,
         max_cost: C,
         op_cost: impl Fn(&OpType) -> C,
+    ) -> Self {
+        Self::split_with_strategy(circ, max_cost, op_cost, SplitStrategy::Greedy)
+    }
+
+    /// Split a circuit into chunks, choosing the chunk boundaries with the
+    /// given [`SplitStrategy`].
+    ///
+    /// The circuit is split into chunks of at most `max_cost`, using the provided cost function.
+    pub fn split_with_strategy<C: CircuitCost>(
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        max_cost: C,
+        op_cost: impl Fn(&OpType) -> C,
+        strategy: SplitStrategy,
+    ) -> Self {
+        Self::split_with_options(
+            circ,
+            max_cost,
+            op_cost,
+            SplitOptions::new().with_strategy(strategy),
+        )
+    }
+
+    /// Split a circuit into chunks, with the given [`SplitOptions`].
+    ///
+    /// The circuit is split into chunks of at most `max_cost`, using the
+    /// provided cost function, before being regrouped into halo windows if
+    /// requested.
+    pub fn split_with_options<C: CircuitCost>(
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        max_cost: C,
+        op_cost: impl Fn(&OpType) -> C,
+        options: SplitOptions,
     ) -> Self {
         let hugr = circ.hugr();
         let root_meta = hugr.node_metadata_map(circ.parent()).clone();
@@ -279,22 +523,27 @@ impl CircuitChunks {
             .map(|(n, p)| Wire::new(n, p).into())
             .collect();
 
-        let mut chunks = Vec::new();
+        let half_cost = max_cost.div_cost(NonZeroUsize::new(2).unwrap());
+        let chunk_cost = |i: usize| match i {
+            0 if options.shift => half_cost.clone(),
+            _ => max_cost.clone(),
+        };
+        let groups = match options.strategy {
+            SplitStrategy::Greedy => greedy_groups(circ, chunk_cost, op_cost),
+            SplitStrategy::MinBoundary => min_boundary_groups(circ, chunk_cost, op_cost),
+        };
+        let groups = match options.halo {
+            0 => groups.into_iter().map(|nodes| (nodes, false)).collect(),
+            halo => halo_windows(groups, halo, options.halo_odd),
+        };
         let convex_checker = TopoConvexChecker::new(circ.hugr(), circ.parent());
-        let mut running_cost = C::default();
-        let mut current_group = 0;
-        for (_, commands) in &circ.commands().map(|cmd| cmd.node()).chunk_by(|&node| {
-            let new_cost = running_cost.clone() + op_cost(hugr.get_optype(node));
-            if new_cost.sub_cost(&max_cost).as_isize() > 0 {
-                running_cost = C::default();
-                current_group += 1;
-            } else {
-                running_cost = new_cost;
-            }
-            current_group
-        }) {
-            chunks.push(Chunk::extract(circ, commands, &convex_checker));
-        }
+        let chunks = groups
+            .into_iter()
+            .map(|(nodes, spacer)| Chunk {
+                spacer,
+                ..Chunk::extract(circ, nodes, &convex_checker)
+            })
+            .collect();
         Self {
             signature: signature.into_owned(),
             root_meta: Some(root_meta),
@@ -447,6 +696,13 @@ impl CircuitChunks {
         self.chunks.is_empty()
     }
 
+    /// Whether the chunk at `index` is a spacer between two halo windows.
+    ///
+    /// Spacers are meant to be left unchanged, see [`SplitOptions::with_halo`].
+    pub fn is_spacer(&self, index: usize) -> bool {
+        self.chunks[index].spacer
+    }
+
     /// Supports implementation of rayon::iter::IntoParallelRefMutIterator
     pub(crate) fn par_iter_mut(
         &mut self,
@@ -523,6 +779,73 @@ mod test {
         );
     }
 
+    #[test]
+    fn split_min_boundary() {
+        // Two independent pairs of interacting qubits, with interleaved gates.
+        let circ = build_simple_circuit(4, |circ| {
+            for _ in 0..2 {
+                circ.append(TketOp::CX, [0, 1])?;
+                circ.append(TketOp::CX, [2, 3])?;
+                circ.append(TketOp::H, [0])?;
+                circ.append(TketOp::H, [2])?;
+            }
+            Ok(())
+        })
+        .unwrap();
+
+        let chunks =
+            CircuitChunks::split_with_strategy(&circ, 4, |_| 1, SplitStrategy::MinBoundary);
+
+        // Each chunk only acts on one of the pairs.
+        assert_eq!(chunks.len(), 2);
+        for chunk in chunks.iter() {
+            assert_eq!(chunk.num_operations(), 4);
+            assert_eq!(chunk.circuit_signature().input_count(), 2);
+        }
+
+        let mut reassembled = chunks.reassemble().unwrap();
+
+        reassembled.hugr_mut().validate().unwrap();
+        assert_eq!(
+            circ.circuit_hash(circ.parent()),
+            reassembled.circuit_hash(reassembled.parent())
+        );
+    }
+
+    #[test]
+    fn split_halo_windows() {
+        let circ = build_simple_circuit(1, |circ| {
+            for _ in 0..8 {
+                circ.append(TketOp::H, [0])?;
+            }
+            Ok(())
+        })
+        .unwrap();
+
+        let options = SplitOptions::new().with_halo(1, false);
+        let chunks = CircuitChunks::split_with_options(&circ, 2, |_| 1, options);
+
+        // Windows and spacers alternate, starting with a window.
+        let spacers = (0..chunks.len()).map(|i| chunks.is_spacer(i)).collect_vec();
+        assert_eq!(spacers, [false, true, false]);
+        let sizes = chunks.iter().map(|c| c.num_operations()).collect_vec();
+        assert_eq!(sizes, [3, 1, 4]);
+
+        // Shifting the windows to the odd chunks.
+        let options = SplitOptions::new().with_halo(1, true);
+        let chunks = CircuitChunks::split_with_options(&circ, 2, |_| 1, options);
+        let spacers = (0..chunks.len()).map(|i| chunks.is_spacer(i)).collect_vec();
+        assert_eq!(spacers, [true, false, true]);
+
+        let mut reassembled = chunks.reassemble().unwrap();
+
+        reassembled.hugr_mut().validate().unwrap();
+        assert_eq!(
+            circ.circuit_hash(circ.parent()),
+            reassembled.circuit_hash(reassembled.parent())
+        );
+    }
+
     #[test]
     fn reassemble_empty() {
         let circ = build_simple_circuit(3, |circ| {
@@ -53,11 +53,13 @@
 //! # }
 //! ```
 
+pub mod incremental;
 pub mod matcher;
 pub mod pattern;
 
 use hugr::types::EdgeKind;
 use hugr::{HugrView, OutgoingPort};
+pub use incremental::IncrementalMatcher;
 use itertools::Itertools;
 pub use matcher::{PatternMatch, PatternMatcher};
 pub use pattern::CircuitPattern;
@@ -0,0 +1,589 @@
+//! Incremental pattern matching on circuits that are being rewritten.
+
+use std::collections::{BTreeMap, VecDeque};
+
+use fxhash::{FxHashMap, FxHashSet};
+use hugr::hugr::hugrmut::HugrMut;
+use hugr::hugr::patch::simple_replace;
+use hugr::hugr::Patch;
+use hugr::{HugrView, Node};
+use itertools::Itertools;
+
+use super::matcher::handle_match_error;
+use super::{PatternMatch, PatternMatcher};
+use crate::circuit::Circuit;
+use crate::resource::CircuitRewriteError;
+use crate::rewrite::{CircuitRewrite, OldCircuitRewrite};
+
+/// The gap between the positions of consecutive commands when the circuit is
+/// numbered, leaving room for the commands added by later rewrites.
+const POSITION_SPACING: u64 = 1 << 16;
+
+/// The pattern matches of a circuit, kept up to date as the circuit is
+/// rewritten.
+///
+/// [`PatternMatcher::find_matches`] runs the matching automaton from every
+/// node of the circuit. After a rewrite, only the matches rooted close to the
+/// modified nodes can appear or disappear, so [`IncrementalMatcher::update`]
+/// only runs the automaton from the roots within
+/// [`PatternMatcher::pattern_radius`] of them.
+///
+/// A rewrite may also create or remove paths between distant nodes, changing
+/// the convexity of matches away from it. Such a path goes through the
+/// rewritten nodes, so the matcher keeps a topological order of the circuit
+/// and only checks again the matches that span the position of a rewritten
+/// node. Convexity is checked by a search bounded by the positions of the
+/// matched nodes, rather than over the whole circuit.
+#[derive(Debug, Clone)]
+pub struct IncrementalMatcher<'m> {
+    matcher: &'m PatternMatcher,
+    /// The patterns found at each root.
+    roots: BTreeMap<Node, RootMatches>,
+    /// The position of each command in a topological order of the circuit.
+    positions: FxHashMap<Node, u64>,
+    /// The roots indexed by the lowest position of their matched nodes.
+    starts: BTreeMap<u64, Vec<Node>>,
+    /// An upper bound on the span of the positions matched at any root.
+    max_span: u64,
+}
+
+/// The patterns found at a root.
+#[derive(Debug, Clone)]
+struct RootMatches {
+    /// The matches, along with whether they are convex.
+    matches: Vec<(PatternMatch, bool)>,
+    /// The lowest and highest positions of the matched nodes.
+    span: (u64, u64),
+}
+
+impl<'m> IncrementalMatcher<'m> {
+    /// Find all the matches in a circuit.
+    pub fn new(matcher: &'m PatternMatcher, circ: &Circuit<impl HugrView<Node = Node>>) -> Self {
+        let mut incremental = Self {
+            matcher,
+            roots: BTreeMap::new(),
+            positions: FxHashMap::default(),
+            starts: BTreeMap::new(),
+            max_span: 0,
+        };
+        incremental.renumber(circ);
+        for cmd in circ.commands() {
+            incremental.match_root(circ, cmd.node());
+        }
+        incremental
+    }
+
+    /// The pattern matcher.
+    pub fn matcher(&self) -> &'m PatternMatcher {
+        self.matcher
+    }
+
+    /// All the convex pattern matches in the circuit, ordered by root.
+    pub fn matches(&self) -> impl Iterator<Item = &PatternMatch> + '_ {
+        self.roots.values().flat_map(RootMatches::convex)
+    }
+
+    /// The convex pattern matches in the circuit rooted at a given node.
+    pub fn rooted_matches(&self, root: Node) -> impl Iterator<Item = &PatternMatch> + '_ {
+        self.roots
+            .get(&root)
+            .into_iter()
+            .flat_map(RootMatches::convex)
+    }
+
+    /// Update the matches after the circuit has been modified.
+    ///
+    /// `changed` must contain every node of the circuit that was added, or
+    /// whose operation or links were modified, since the matches were last
+    /// computed. The matches rooted within the pattern radius of these nodes
+    /// are recomputed. `removed` contains the nodes that were deleted from the
+    /// circuit; the matches containing them are discarded, and their
+    /// identifiers may have been reused by nodes in `changed`.
+    pub fn update<H: HugrView<Node = Node>>(
+        &mut self,
+        circ: &Circuit<H>,
+        changed: impl IntoIterator<Item = Node>,
+        removed: impl IntoIterator<Item = Node>,
+    ) {
+        let hugr = circ.hugr();
+        let [inp, out] = circ.io_nodes();
+        let is_command = |n: Node| {
+            hugr.contains_node(n)
+                && hugr.get_parent(n) == Some(circ.parent())
+                && n != inp
+                && n != out
+        };
+        let radius = self.matcher.pattern_radius();
+
+        // Discard the roots that no longer exist, and recompute the ones with
+        // a match that contained removed nodes.
+        let removed: FxHashSet<Node> = removed.into_iter().collect();
+        let mut distances: FxHashMap<Node, usize> = FxHashMap::default();
+        let stale = self
+            .roots
+            .iter()
+            .filter(|(root, found)| {
+                removed.contains(*root)
+                    || found
+                        .matches
+                        .iter()
+                        .any(|(m, _)| m.nodes().iter().any(|n| removed.contains(n)))
+            })
+            .map(|(&root, _)| root)
+            .collect_vec();
+        for root in stale {
+            self.remove_root(root);
+            if !removed.contains(&root) && is_command(root) {
+                distances.insert(root, radius);
+            }
+        }
+
+        // Number the added commands.
+        for node in &removed {
+            self.positions.remove(node);
+        }
+        let changed = changed
+            .into_iter()
+            .filter(|&n| is_command(n))
+            .unique()
+            .collect_vec();
+        let added = changed
+            .iter()
+            .copied()
+            .filter(|n| !self.positions.contains_key(n))
+            .collect_vec();
+        if !self.insert_positions(hugr, &added, &changed) {
+            self.renumber(circ);
+        }
+
+        // Collect the roots within the pattern radius of the changed nodes.
+        let mut queue = VecDeque::new();
+        for &node in &changed {
+            if distances.insert(node, 0).is_none() {
+                queue.push_back(node);
+            }
+        }
+        while let Some(node) = queue.pop_front() {
+            let dist = distances[&node];
+            if dist >= radius {
+                continue;
+            }
+            for next in hugr.all_neighbours(node) {
+                if is_command(next) && !distances.contains_key(&next) {
+                    distances.insert(next, dist + 1);
+                    queue.push_back(next);
+                }
+            }
+        }
+
+        // The patterns found at the other roots are unchanged, but the
+        // convexity of the matches spanning a changed node may not be.
+        let mut straddling = FxHashSet::default();
+        for pos in changed.iter().filter_map(|n| self.positions.get(n)) {
+            let lowest = pos.saturating_sub(self.max_span);
+            for (_, roots) in self.starts.range(lowest..*pos) {
+                straddling.extend(
+                    roots
+                        .iter()
+                        .filter(|&root| self.roots[root].span.1 > *pos)
+                        .filter(|&root| !distances.contains_key(root)),
+                );
+            }
+        }
+        for root in straddling {
+            let convex = self.roots[&root]
+                .matches
+                .iter()
+                .map(|(m, _)| self.is_convex(hugr, m.nodes()))
+                .collect_vec();
+            let found = self.roots.get_mut(&root).unwrap();
+            for ((_, is_convex), convex) in found.matches.iter_mut().zip(convex) {
+                *is_convex = convex;
+            }
+        }
+        for root in distances.into_keys() {
+            self.match_root(circ, root);
+        }
+    }
+
+    /// Apply a rewrite to the circuit and update the matches.
+    ///
+    /// The nodes linked to the boundary of the replaced subgraph are recorded
+    /// before applying the rewrite, as their links are modified by it.
+    ///
+    /// Only simple replacement rewrites are supported; other rewrites must be
+    /// applied on a [`ResourceScope`](crate::resource::ResourceScope).
+    pub fn apply_rewrite<H: HugrMut<Node = Node>>(
+        &mut self,
+        circ: &mut Circuit<H>,
+        rewrite: CircuitRewrite,
+    ) -> Result<simple_replace::Outcome, CircuitRewriteError> {
+        let CircuitRewrite::Old(OldCircuitRewrite(repl)) = &rewrite else {
+            return Err(CircuitRewriteError::new_simple_replacement_error(
+                "incremental matching only supports simple replacement rewrites",
+            ));
+        };
+        let subgraph = repl.subgraph();
+        let hugr = circ.hugr();
+        let boundary = subgraph
+            .incoming_ports()
+            .iter()
+            .flatten()
+            .flat_map(|&(n, p)| hugr.linked_outputs(n, p).map(|(n, _)| n))
+            .chain(
+                subgraph
+                    .outgoing_ports()
+                    .iter()
+                    .flat_map(|&(n, p)| hugr.linked_inputs(n, p).map(|(n, _)| n)),
+            )
+            .collect_vec();
+
+        let outcome = <CircuitRewrite as Patch<Circuit<H>>>::apply(rewrite, circ)?;
+        let changed = outcome.node_map.values().copied().chain(boundary);
+        self.update(circ, changed, outcome.removed_nodes.keys().copied());
+        Ok(outcome)
+    }
+
+    /// Run the automaton from a root, replacing the patterns found there.
+    fn match_root(&mut self, circ: &Circuit<impl HugrView<Node = Node>>, root: Node) {
+        self.remove_root(root);
+        let matches = self
+            .matcher
+            .rooted_pattern_ids(circ, root)
+            .into_iter()
+            .filter_map(|pattern| {
+                let res =
+                    PatternMatch::from_root_match_unchecked(root, pattern, circ, self.matcher);
+                handle_match_error(res, root)
+            })
+            .map(|m| {
+                let convex = self.is_convex(circ.hugr(), m.nodes());
+                (m, convex)
+            })
+            .collect_vec();
+        if !matches.is_empty() {
+            self.insert_root(root, matches);
+        }
+    }
+
+    /// Record the matches found at a root, indexed by their positions.
+    fn insert_root(&mut self, root: Node, matches: Vec<(PatternMatch, bool)>) {
+        let span = self.span(matches.iter().flat_map(|(m, _)| m.nodes()));
+        self.max_span = self.max_span.max(span.1 - span.0);
+        self.starts.entry(span.0).or_default().push(root);
+        self.roots.insert(root, RootMatches { matches, span });
+    }
+
+    /// Forget the matches found at a root.
+    fn remove_root(&mut self, root: Node) {
+        let Some(found) = self.roots.remove(&root) else {
+            return;
+        };
+        if let Some(roots) = self.starts.get_mut(&found.span.0) {
+            roots.retain(|&r| r != root);
+            if roots.is_empty() {
+                self.starts.remove(&found.span.0);
+            }
+        }
+    }
+
+    /// The lowest and highest positions of a set of commands.
+    fn span<'a>(&self, nodes: impl IntoIterator<Item = &'a Node>) -> (u64, u64) {
+        nodes
+            .into_iter()
+            .filter_map(|n| self.positions.get(n).copied())
+            .minmax()
+            .into_option()
+            .unwrap_or_default()
+    }
+
+    /// Number the commands of the circuit in a topological order.
+    ///
+    /// The positions of the matches found so far are indexed again.
+    fn renumber(&mut self, circ: &Circuit<impl HugrView<Node = Node>>) {
+        let hugr = circ.hugr();
+        let [inp, out] = circ.io_nodes();
+        let commands = hugr
+            .children(circ.parent())
+            .filter(|&n| n != inp && n != out)
+            .collect_vec();
+        let mut in_degree: FxHashMap<Node, usize> = commands.iter().map(|&n| (n, 0)).collect();
+        for &node in &commands {
+            for next in hugr.output_neighbours(node) {
+                if let Some(degree) = in_degree.get_mut(&next) {
+                    *degree += 1;
+                }
+            }
+        }
+        let mut queue: VecDeque<Node> =
+            commands.into_iter().filter(|n| in_degree[n] == 0).collect();
+        self.positions.clear();
+        let mut position = 0;
+        while let Some(node) = queue.pop_front() {
+            position += POSITION_SPACING;
+            self.positions.insert(node, position);
+            for next in hugr.output_neighbours(node) {
+                if let Some(degree) = in_degree.get_mut(&next) {
+                    *degree -= 1;
+                    if *degree == 0 {
+                        queue.push_back(next);
+                    }
+                }
+            }
+        }
+
+        let roots = std::mem::take(&mut self.roots);
+        self.starts.clear();
+        self.max_span = 0;
+        for (root, found) in roots {
+            self.insert_root(root, found.matches);
+        }
+    }
+
+    /// Give positions to the commands added by a rewrite, between the
+    /// positions of the commands they are linked to.
+    ///
+    /// Returns `false` if there is no room left between these positions, or
+    /// if the rewrite linked commands against their current order. The
+    /// circuit must then be renumbered.
+    fn insert_positions(
+        &mut self,
+        hugr: &impl HugrView<Node = Node>,
+        added: &[Node],
+        changed: &[Node],
+    ) -> bool {
+        // Order the added commands among themselves.
+        let mut in_degree: FxHashMap<Node, usize> = added.iter().map(|&n| (n, 0)).collect();
+        for &node in added {
+            for next in hugr.output_neighbours(node) {
+                if let Some(degree) = in_degree.get_mut(&next) {
+                    *degree += 1;
+                }
+            }
+        }
+        let mut queue: VecDeque<Node> = added
+            .iter()
+            .copied()
+            .filter(|n| in_degree[n] == 0)
+            .collect();
+        let mut order = Vec::with_capacity(added.len());
+        while let Some(node) = queue.pop_front() {
+            order.push(node);
+            for next in hugr.output_neighbours(node) {
+                if let Some(degree) = in_degree.get_mut(&next) {
+                    *degree -= 1;
+                    if *degree == 0 {
+                        queue.push_back(next);
+                    }
+                }
+            }
+        }
+
+        // Spread them between their existing predecessors and successors.
+        let lowest = added
+            .iter()
+            .flat_map(|&n| hugr.input_neighbours(n))
+            .filter_map(|n| self.positions.get(&n).copied())
+            .max()
+            .unwrap_or(0);
+        let highest = added
+            .iter()
+            .flat_map(|&n| hugr.output_neighbours(n))
+            .filter_map(|n| self.positions.get(&n).copied())
+            .min()
+            .unwrap_or(u64::MAX);
+        let step = highest.saturating_sub(lowest) / (order.len() as u64 + 1);
+        if step == 0 {
+            return false;
+        }
+        for (i, node) in order.into_iter().enumerate() {
+            self.positions.insert(node, lowest + step * (i as u64 + 1));
+        }
+
+        // Existing commands may also have been linked by the rewrite.
+        changed.iter().all(|n| {
+            let Some(&pos) = self.positions.get(n) else {
+                return false;
+            };
+            hugr.output_neighbours(*n)
+                .all(|next| self.positions.get(&next).is_none_or(|&p| pos < p))
+        })
+    }
+
+    /// Check that no path leaves a set of commands and comes back to it.
+    ///
+    /// Such a path only visits commands positioned before the last node of
+    /// the set, which bounds the search.
+    fn is_convex(&self, hugr: &impl HugrView<Node = Node>, nodes: &[Node]) -> bool {
+        let nodes: FxHashSet<Node> = nodes.iter().copied().collect();
+        let (_, end) = self.span(&nodes);
+        let within =
+            |n: &Node| !nodes.contains(n) && self.positions.get(n).is_some_and(|&pos| pos < end);
+        let mut visited = FxHashSet::default();
+        let mut stack = nodes
+            .iter()
+            .flat_map(|&n| hugr.output_neighbours(n))
+            .filter(within)
+            .collect_vec();
+        while let Some(node) = stack.pop() {
+            if !visited.insert(node) {
+                continue;
+            }
+            for next in hugr.output_neighbours(node) {
+                if nodes.contains(&next) {
+                    return false;
+                }
+                if within(&next) && !visited.contains(&next) {
+                    stack.push(next);
+                }
+            }
+        }
+        true
+    }
+}
+
+impl RootMatches {
+    /// The convex matches found at the root.
+    fn convex(&self) -> impl Iterator<Item = &PatternMatch> + '_ {
+        self.matches
+            .iter()
+            .filter(|(_, convex)| *convex)
+            .map(|(m, _)| m)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use hugr::Node;
+    use itertools::Itertools;
+    use rstest::{fixture, rstest};
+
+    use crate::portmatching::{CircuitPattern, PatternMatch, PatternMatcher};
+    use crate::utils::build_simple_circuit;
+    use crate::TketOp;
+
+    use super::IncrementalMatcher;
+
+    fn pattern(n_qubits: usize, ops: &[(TketOp, &[usize])]) -> CircuitPattern {
+        let circ = build_simple_circuit(n_qubits, |circ| {
+            for (op, qbs) in ops {
+                circ.append(*op, qbs.iter().copied())?;
+            }
+            Ok(())
+        })
+        .unwrap();
+        CircuitPattern::try_from_circuit(&circ).unwrap()
+    }
+
+    #[fixture]
+    fn matcher() -> PatternMatcher {
+        PatternMatcher::from_patterns(vec![
+            pattern(2, &[(TketOp::CX, &[0, 1]), (TketOp::CX, &[0, 1])]),
+            pattern(2, &[(TketOp::CX, &[0, 1]), (TketOp::H, &[0])]),
+            pattern(1, &[(TketOp::H, &[0]), (TketOp::H, &[0])]),
+        ])
+    }
+
+    fn sorted<'a>(matches: impl IntoIterator<Item = &'a PatternMatch>) -> Vec<(usize, Vec<Node>)> {
+        matches
+            .into_iter()
+            .map(|m| {
+                (
+                    m.pattern_id().0,
+                    m.nodes().iter().copied().sorted().collect(),
+                )
+            })
+            .sorted()
+            .collect()
+    }
+
+    #[rstest]
+    fn incremental_matches_after_rewrite(matcher: PatternMatcher) {
+        let mut circ = build_simple_circuit(3, |circ| {
+            circ.append(TketOp::H, [0])?;
+            circ.append(TketOp::CX, [0, 1])?;
+            circ.append(TketOp::CX, [0, 1])?;
+            circ.append(TketOp::H, [0])?;
+            circ.append(TketOp::CX, [1, 2])?;
+            circ.append(TketOp::H, [1])?;
+            Ok(())
+        })
+        .unwrap();
+        let mut incremental = IncrementalMatcher::new(&matcher, &circ);
+        assert_eq!(
+            sorted(incremental.matches()),
+            sorted(&matcher.find_matches(&circ))
+        );
+        assert_eq!(incremental.matches().count(), 3);
+
+        // Cancel the two CX gates.
+        let cx_cx = incremental
+            .matches()
+            .find(|m| m.pattern_id().0 == 0)
+            .unwrap()
+            .clone();
+        let identity = build_simple_circuit(2, |_| Ok(())).unwrap();
+        let rewrite = cx_cx.to_rewrite(&circ, identity).unwrap();
+        incremental.apply_rewrite(&mut circ, rewrite).unwrap();
+
+        // The H gates are now adjacent, which is only visible from nodes that
+        // were not part of the rewrite.
+        let expected = sorted(&matcher.find_matches(&circ));
+        assert_eq!(sorted(incremental.matches()), expected);
+        assert_eq!(expected.iter().map(|(p, _)| *p).collect_vec(), [1, 2]);
+    }
+
+    #[test]
+    fn incremental_convexity_after_distant_rewrite() {
+        let matcher = PatternMatcher::from_patterns(vec![
+            pattern(2, &[(TketOp::CX, &[0, 1]), (TketOp::CX, &[0, 1])]),
+            pattern(3, &[(TketOp::CX, &[0, 1]), (TketOp::CX, &[1, 2])]),
+        ]);
+        // The first and last gates match the second pattern, but a path
+        // through qubits 7, 9, 3, 4, 6, 10 and 8 leaves the match and comes
+        // back.
+        let mut circ = build_simple_circuit(11, |circ| {
+            circ.append(TketOp::CX, [0, 1])?;
+            circ.append(TketOp::CX, [0, 7])?;
+            circ.append(TketOp::CX, [7, 9])?;
+            circ.append(TketOp::CX, [9, 3])?;
+            circ.append(TketOp::CX, [3, 4])?;
+            circ.append(TketOp::CX, [3, 4])?;
+            circ.append(TketOp::CX, [4, 6])?;
+            circ.append(TketOp::CX, [6, 10])?;
+            circ.append(TketOp::CX, [10, 8])?;
+            circ.append(TketOp::CX, [8, 2])?;
+            circ.append(TketOp::CX, [1, 2])?;
+            Ok(())
+        })
+        .unwrap();
+        let commands = circ.commands().map(|cmd| cmd.node()).collect_vec();
+        let outer = (
+            1,
+            [commands[0], commands[10]]
+                .into_iter()
+                .sorted()
+                .collect_vec(),
+        );
+
+        let mut incremental = IncrementalMatcher::new(&matcher, &circ);
+        let expected = sorted(&matcher.find_matches(&circ));
+        assert_eq!(sorted(incremental.matches()), expected);
+        assert!(!expected.contains(&outer));
+
+        // Cancelling the CX gates on qubits 3 and 4 breaks the path, out of
+        // the pattern radius of the outer gates.
+        let cx_cx = incremental
+            .matches()
+            .find(|m| m.pattern_id().0 == 0)
+            .unwrap()
+            .clone();
+        let identity = build_simple_circuit(2, |_| Ok(())).unwrap();
+        let rewrite = cx_cx.to_rewrite(&circ, identity).unwrap();
+        incremental.apply_rewrite(&mut circ, rewrite).unwrap();
+
+        let expected = sorted(&matcher.find_matches(&circ));
+        assert_eq!(sorted(incremental.matches()), expected);
+        assert!(expected.contains(&outer));
+    }
+}
@@ -142,6 +142,47 @@ impl PatternMatch {
         matcher: &PatternMatcher,
         checker: &TopoConvexChecker<'_, H>,
     ) -> Result<Self, InvalidPatternMatch> {
+        let (inputs, outputs, _) = Self::root_match_boundary(root, pattern, circ, matcher)?;
+        Self::try_from_io_with_checker(root, pattern, circ, inputs, outputs, checker)
+    }
+
+    /// Create a pattern match from the image of a pattern root, without
+    /// checking that it is convex.
+    ///
+    /// The caller is responsible for checking the convexity of the match, see
+    /// [`IncrementalMatcher`].
+    ///
+    /// [`IncrementalMatcher`]: super::IncrementalMatcher
+    pub(super) fn from_root_match_unchecked(
+        root: Node,
+        pattern: PatternID,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        matcher: &PatternMatcher,
+    ) -> Result<Self, InvalidPatternMatch> {
+        let (inputs, outputs, nodes) = Self::root_match_boundary(root, pattern, circ, matcher)?;
+        let subgraph = SiblingSubgraph::new_unchecked(inputs, outputs, vec![], nodes);
+        Ok(Self {
+            subgraph,
+            pattern,
+            root,
+        })
+    }
+
+    /// The boundary ports and the nodes of the image of a pattern root.
+    #[allow(clippy::type_complexity)]
+    fn root_match_boundary(
+        root: Node,
+        pattern: PatternID,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        matcher: &PatternMatcher,
+    ) -> Result<
+        (
+            Vec<Vec<(Node, IncomingPort)>>,
+            Vec<(Node, OutgoingPort)>,
+            Vec<Node>,
+        ),
+        InvalidPatternMatch,
+    > {
         let pattern_ref = matcher
             .get_pattern(pattern)
             .ok_or(InvalidPatternMatch::MatchNotFound)?;
@@ -162,7 +203,7 @@ impl PatternMatch {
             .iter()
             .map(|(n, p)| (map[n], p.as_outgoing().unwrap()))
             .collect_vec();
-        Self::try_from_io_with_checker(root, pattern, circ, inputs, outputs, checker)
+        Ok((inputs, outputs, map.into_values().collect()))
     }
 
     /// Create a pattern match from the subcircuit boundaries.
@@ -300,14 +341,8 @@ impl PatternMatcher {
         root: Node,
         checker: &TopoConvexChecker<'_, H>,
     ) -> Vec<PatternMatch> {
-        self.automaton
-            .run(
-                root.into(),
-                // Node weights (none)
-                validate_circuit_node(circ),
-                // Check edge exist
-                validate_circuit_edge(circ),
-            )
+        self.rooted_pattern_ids(circ, root)
+            .into_iter()
             .filter_map(|pattern_id| {
                 handle_match_error(
                     PatternMatch::try_from_root_match_with_checker(
@@ -319,6 +354,30 @@ impl PatternMatcher {
             .collect()
     }
 
+    /// The patterns that match the circuit at a given root, ignoring
+    /// convexity.
+    pub(super) fn rooted_pattern_ids(
+        &self,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        root: Node,
+    ) -> Vec<PatternID> {
+        self.automaton
+            .run(
+                root.into(),
+                // Node weights (none)
+                validate_circuit_node(circ),
+                // Check edge exist
+                validate_circuit_edge(circ),
+            )
+            .collect()
+    }
+
+    /// An upper bound on the number of edges between the root of a match and
+    /// any of its nodes.
+    pub fn pattern_radius(&self) -> usize {
+        self.patterns.iter().map(|p| p.n_edges()).max().unwrap_or(0)
+    }
+
     /// Get a pattern by ID.
     pub fn get_pattern(&self, id: PatternID) -> Option<&CircuitPattern> {
         self.patterns.get(id.0)
@@ -485,7 +544,10 @@ pub(crate) fn validate_circuit_node(
 ///
 /// Benign errors are non-convex matches, which are expected to occur.
 /// Other errors are considered logic errors and should never occur.
-fn handle_match_error<T>(match_res: Result<T, InvalidPatternMatch>, root: Node) -> Option<T> {
+pub(super) fn handle_match_error<T>(
+    match_res: Result<T, InvalidPatternMatch>,
+    root: Node,
+) -> Option<T> {
     match_res
         .map_err(|err| match err {
             InvalidPatternMatch::NotConvex => InvalidPatternMatch::NotConvex,
@@ -183,7 +183,11 @@ impl<H: HugrView> ResourceScope<H> {
 
 impl<H: HugrView<Node = hugr::Node>> CircuitHash for ResourceScope<H> {
     fn circuit_hash(&self, parent: hugr::Node) -> Result<u64, HashError> {
-        self.as_circuit().circuit_hash(parent)
+        if parent == self.parent() {
+            self.cached_circuit_hash()
+        } else {
+            self.as_circuit().circuit_hash(parent)
+        }
     }
 }
 
@@ -14,6 +14,9 @@ use std::collections::{BTreeSet, VecDeque};
 use std::{cmp, iter};
 >>>>>>> pr-1269
 
+use std::sync::OnceLock;
+
+use crate::circuit::{HashError, IncrementalHash};
 use crate::resource::flow::{DefaultResourceFlow, ResourceFlow};
 use crate::resource::types::{CircuitUnit, PortMap};
 use crate::utils::type_is_linear;
@@ -47,6 +50,9 @@ pub struct ResourceScope<H: HugrView = hugr::Hugr> {
     subgraph: Option<SiblingSubgraph<H::Node>>,
     /// Mapping from nodes and ports to their [`CircuitUnit`]s.
     circuit_units: IndexMap<H::Node, NodeCircuitUnits<H::Node>>,
+    /// The node hashes of the circuit, computed on first use and updated
+    /// incrementally when rewrites are applied.
+    hash_cache: OnceLock<IncrementalHash<H::Node>>,
 }
 
 #[derive(Debug, Clone)]
@@ -137,6 +143,7 @@ impl<H: HugrView> ResourceScope<H> {
             hugr,
             subgraph: Some(subgraph),
             circuit_units: IndexMap::new(),
+            hash_cache: OnceLock::new(),
         };
         scope.compute_circuit_units(&config.flows);
         scope
@@ -155,6 +162,7 @@ impl<H: HugrView> ResourceScope<H> {
             hugr,
             subgraph: None,
             circuit_units: IndexMap::new(),
+            hash_cache: OnceLock::new(),
         }
     }
 
@@ -182,10 +190,16 @@ impl<H: HugrView> ResourceScope<H> {
             SiblingSubgraph::new_unchecked(new_inputs, new_outputs, new_function_calls, new_nodes)
         });
 
+        let hash_cache = OnceLock::new();
+        if let Some(cache) = self.hash_cache.get() {
+            let _ = hash_cache.set(cache.map_nodes(map_node));
+        }
+
         ResourceScope {
             hugr,
             subgraph,
             circuit_units: new_circuit_units,
+            hash_cache,
         }
     }
 
@@ -221,7 +235,22 @@ impl<H: HugrView> ResourceScope<H> {
             hugr: &self.hugr,
             subgraph: self.subgraph.clone(),
             circuit_units: self.circuit_units.clone(),
+            hash_cache: self.hash_cache.clone(),
+        }
+    }
+
+    /// The hash of the circuit, as computed by
+    /// [`CircuitHash::circuit_hash`](crate::circuit::CircuitHash::circuit_hash)
+    /// on its parent node.
+    ///
+    /// The hash is computed on first use, and then updated incrementally as
+    /// rewrites are applied to the scope.
+    pub(super) fn cached_circuit_hash(&self) -> Result<u64, HashError> {
+        if let Some(cache) = self.hash_cache.get() {
+            return Ok(cache.hash());
         }
+        let cache = IncrementalHash::new(&self.hugr, self.as_circuit().parent())?;
+        Ok(self.hash_cache.get_or_init(|| cache).hash())
     }
 
     /// Get the underlying subgraph, or `None` if the circuit is empty.
@@ -78,6 +78,7 @@ where
         rewrite: NewCircuitRewrite<H::Node>,
     ) -> Result<<SimpleReplacement<H::Node> as Patch<H>>::Outcome, CircuitRewriteError> {
         let simple_replacement = rewrite.to_simple_replacement(self);
+        let hash_successors = self.hash_cache_successors(simple_replacement.subgraph().nodes());
 
         let (repl_scope, input_remap) = rewrite.get_replacement_scope(self)?;
 
@@ -98,6 +99,7 @@ where
         );
 
         self.update_subgraph(node_map.values().copied(), &removed_nodes);
+        self.update_hash_cache(node_map.values().copied(), &removed_nodes, hash_successors);
 
         Ok(simple_replace::Outcome {
             node_map,
@@ -124,6 +126,7 @@ mod badgerv2_unstable {
                     ))?;
 
             let rewrite = create_rewrite_from_replacement(simple_replacement.clone(), self)?;
+            let hash_successors = self.hash_cache_successors(simple_replacement.subgraph().nodes());
 
             let (repl_scope, input_remap) = rewrite.get_replacement_scope(self)?;
 
@@ -153,6 +156,7 @@ mod badgerv2_unstable {
             );
 
             self.update_subgraph(node_map.values().copied(), &removed_nodes);
+            self.update_hash_cache(node_map.values().copied(), &removed_nodes, hash_successors);
 
             Ok(commit_id)
         }
@@ -176,6 +180,7 @@ mod badgerv2_unstable {
             rewrite: NewCircuitRewrite<PatchNode>,
         ) -> Result<CommitId, CircuitRewriteError> {
             let simple_replacement = rewrite.to_simple_replacement(self);
+            let hash_successors = self.hash_cache_successors(simple_replacement.subgraph().nodes());
 
             let (repl_scope, input_remap) = rewrite.get_replacement_scope(self)?;
 
@@ -204,6 +209,7 @@ mod badgerv2_unstable {
             );
 
             self.update_subgraph(node_map.values().copied(), &removed_nodes);
+            self.update_hash_cache(node_map.values().copied(), &removed_nodes, hash_successors);
 
             Ok(commit_id)
         }
@@ -285,6 +291,42 @@ impl<H: HugrView> ResourceScope<H> {
         ));
     }
 
+    /// The nodes outside of `removed` that are linked to the outputs of
+    /// `removed`, if the circuit hash is cached.
+    ///
+    /// Must be called before the nodes are removed, to collect the nodes
+    /// whose inputs will be relinked by a rewrite.
+    fn hash_cache_successors(&self, removed: &[H::Node]) -> Vec<H::Node> {
+        if self.hash_cache.get().is_none() {
+            return Vec::new();
+        }
+        removed
+            .iter()
+            .flat_map(|&n| self.hugr.output_neighbours(n))
+            .filter(|n| !removed.contains(n))
+            .collect()
+    }
+
+    /// Update the cached circuit hash after a rewrite, rehashing the new
+    /// nodes, the relinked `successors` and everything downstream of them.
+    fn update_hash_cache<V>(
+        &mut self,
+        new_nodes: impl IntoIterator<Item = H::Node>,
+        removed_nodes: &HashMap<H::Node, V>,
+        successors: Vec<H::Node>,
+    ) {
+        let Some(cache) = self.hash_cache.get_mut() else {
+            return;
+        };
+        let changed = new_nodes.into_iter().chain(successors);
+        if cache
+            .update(&self.hugr, changed, removed_nodes.keys().copied())
+            .is_err()
+        {
+            self.hash_cache = Default::default();
+        }
+    }
+
     fn get_nearest_position<P: Into<Port>>(
         &self,
         ports: impl IntoIterator<Item = (H::Node, P)>,
@@ -330,6 +372,7 @@ impl<H: Clone + HugrView<Node = hugr::Node>> ResourceScope<H> {
             hugr: circuit.into_hugr(),
             subgraph,
             circuit_units: IndexMap::new(),
+            hash_cache: Default::default(),
         };
 
         for (inp, unit) in inputs.into_iter().zip_eq(units) {
@@ -515,6 +558,7 @@ impl CircuitRewriteError {
 #[cfg(test)]
 mod tests {
     use crate::{
+        circuit::CircuitHash,
         resource::{CircuitUnit, ResourceScope},
         rewrite::CircuitRewrite,
         utils::build_simple_circuit,
@@ -642,4 +686,32 @@ mod tests {
 
         insta::assert_debug_snapshot!(name, circuit_units);
     }
+
+    #[rstest]
+    #[case(rewrite_to_n_cx(0))]
+    #[case(rewrite_to_n_cx(1))]
+    #[case(rewrite_to_n_cx(4))]
+    fn test_circuit_rewrite_updates_cached_hash(
+        #[case] (circ, rewrite): (ResourceScope, CircuitRewrite),
+    ) {
+        let mut rewritten_scope = circ.clone();
+        // Compute the hash before rewriting, so that it gets updated in place.
+        let hash_before = rewritten_scope
+            .circuit_hash(rewritten_scope.parent())
+            .unwrap();
+        rewritten_scope.apply_rewrite(rewrite).unwrap();
+
+        let parent = rewritten_scope.parent();
+        let cached_hash = rewritten_scope.circuit_hash(parent).unwrap();
+        let full_hash = rewritten_scope.hugr().circuit_hash(parent).unwrap();
+        assert_eq!(cached_hash, full_hash);
+        assert_ne!(cached_hash, hash_before);
+
+        // The cached hash is carried over when extracting the circuit.
+        let owned_scope = rewritten_scope.to_owned();
+        assert_eq!(
+            owned_scope.circuit_hash(owned_scope.parent()),
+            Ok(full_hash)
+        );
+    }
 }
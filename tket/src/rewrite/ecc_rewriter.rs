@@ -12,13 +12,17 @@
 //! to generate such a file is to use the `gen_ecc_set.sh` script at the root
 //! of the Quartz repository.
 
+#[cfg(feature = "binary-eccs")]
+mod mapped;
+mod targets;
+
 use derive_more::{Display, Error, From, Into};
+use hugr::envelope::EnvelopeError;
 use hugr::extension::resolution::ExtensionResolutionError;
 use hugr::hugr::views::sibling_subgraph::TopoConvexChecker;
 use hugr::{Hugr, HugrView, Node, PortIndex};
 use itertools::Itertools;
 use portmatching::PatternID;
-use serde_with::serde_as;
 use std::{
     collections::HashSet,
     fs::File,
@@ -26,14 +30,13 @@ use std::{
     path::{Path, PathBuf},
 };
 
-use crate::extension::REGISTRY;
 use crate::resource::ResourceScope;
 use crate::{
     circuit::{remove_empty_wire, Circuit},
     optimiser::badger::{load_eccs_json_file, EqCircClass},
-    portmatching::{CircuitPattern, PatternMatcher},
-    serialize::AsStringTk2Envelope,
+    portmatching::{CircuitPattern, PatternMatch, PatternMatcher},
 };
+use targets::Targets;
 
 use super::{CircuitRewrite, Rewriter};
 
@@ -46,14 +49,12 @@ struct TargetID(usize);
 /// Valid rewrites turn a non-representative circuit into its representative,
 /// or a representative circuit into any of the equivalent non-representative
 /// circuits.
-#[serde_as]
 #[derive(Debug, Clone, serde::Serialize, serde::Deserialize)]
 pub struct ECCRewriter {
     /// Matcher for finding patterns.
     matcher: PatternMatcher,
     /// Targets of some rewrite rules.
-    #[serde_as(as = "Vec<AsStringTk2Envelope>")]
-    targets: Vec<Hugr>,
+    targets: Targets,
     /// Rewrites, stored as a map from the source PatternID to possibly multiple
     /// target TargetIDs. The usize index of PatternID is used to index into
     /// the outer vector.
@@ -109,17 +110,48 @@ impl ECCRewriter {
         let matcher = PatternMatcher::from_patterns(patterns);
         Self {
             matcher,
-            targets,
+            targets: targets.into(),
             rewrite_rules,
             empty_wires,
         }
     }
 
+    /// The matcher for the patterns of the rewriter.
+    ///
+    /// Can be used to maintain an
+    /// [`IncrementalMatcher`](crate::portmatching::IncrementalMatcher) over a
+    /// circuit being rewritten, whose matches are turned into rewrites with
+    /// [`ECCRewriter::get_rewrites_from_matches`].
+    pub fn matcher(&self) -> &PatternMatcher {
+        &self.matcher
+    }
+
+    /// The rewrites for a set of pattern matches in `circ`.
+    pub fn get_rewrites_from_matches<'a>(
+        &self,
+        circ: &Circuit<impl HugrView<Node = Node>>,
+        matches: impl IntoIterator<Item = &'a PatternMatch>,
+    ) -> Vec<CircuitRewrite> {
+        matches
+            .into_iter()
+            .flat_map(|m| {
+                let pattern_id = m.pattern_id();
+                self.get_targets(pattern_id).map(move |repl| {
+                    let mut repl = repl.to_owned();
+                    for &empty_qb in self.empty_wires[pattern_id.0].iter().rev() {
+                        remove_empty_wire(&mut repl, empty_qb).unwrap();
+                    }
+                    m.to_rewrite(circ, repl).expect("invalid replacement")
+                })
+            })
+            .collect()
+    }
+
     /// Get all targets of rewrite rules given a source pattern.
     fn get_targets(&self, pattern: PatternID) -> impl Iterator<Item = Circuit<&Hugr>> {
         self.rewrite_rules[pattern.0]
             .iter()
-            .map(|id| (&self.targets[id.0]).into())
+            .map(|id| self.targets.get(id.0).into())
     }
 
     /// Serialise a rewriter to an IO stream.
@@ -170,12 +202,26 @@ impl ECCRewriter {
         Ok(file_name)
     }
 
-    /// Loads a rewriter saved using [`ECCRewriter::save_binary`].
+    /// Loads a rewriter saved using [`ECCRewriter::save_binary`] or
+    /// [`ECCRewriter::save_mapped`].
+    ///
+    /// Files in the memory-mappable format are loaded with
+    /// [`ECCRewriter::load_mapped`].
     ///
     /// Requires the `binary-eccs` feature to be enabled.
     #[cfg(feature = "binary-eccs")]
     pub fn load_binary(name: impl AsRef<Path>) -> Result<Self, RewriterSerialisationError> {
-        let mut file = File::open(name)?;
+        let mut file = File::open(name.as_ref())?;
+        let mut magic = [0; mapped::MAGIC.len()];
+        let is_mapped = match io::Read::read_exact(&mut file, &mut magic) {
+            Ok(()) => &magic == mapped::MAGIC,
+            Err(e) if e.kind() == io::ErrorKind::UnexpectedEof => false,
+            Err(e) => return Err(e.into()),
+        };
+        if is_mapped {
+            return Self::load_mapped(name);
+        }
+        io::Seek::rewind(&mut file)?;
         // Note: Buffering does not improve performance when using
         // `zstd::decode_all`.
         Self::load_binary_io(&mut file)
@@ -185,9 +231,7 @@ impl ECCRewriter {
     /// `OpaqueOp`. We need to resolve them into `ExtensionOp`s by
     /// validating the definitions.
     fn resolve_extension_ops(&mut self) -> Result<(), ExtensionResolutionError> {
-        self.targets
-            .iter_mut()
-            .try_for_each(|hugr| hugr.resolve_extension_defs(&REGISTRY))
+        self.targets.resolve_extension_defs()
     }
 }
 
@@ -224,41 +268,15 @@ impl<H: HugrView<Node = Node>> Rewriter<H> for ECCRewriter {
 
     fn get_rewrites(&self, h: &H, root_node: Node) -> Vec<CircuitRewrite> {
         let circ = Circuit::new(h);
-        let circ_ref = &circ;
         let checker = TopoConvexChecker::new(&h, circ.parent());
         let matches = self.matcher.find_rooted_matches(&circ, root_node, &checker);
-        matches
-            .into_iter()
-            .flat_map(|m| {
-                let pattern_id = m.pattern_id();
-                self.get_targets(pattern_id).map(move |repl| {
-                    let mut repl = repl.to_owned();
-                    for &empty_qb in self.empty_wires[pattern_id.0].iter().rev() {
-                        remove_empty_wire(&mut repl, empty_qb).unwrap();
-                    }
-                    m.to_rewrite(circ_ref, repl).expect("invalid replacement")
-                })
-            })
-            .collect()
+        self.get_rewrites_from_matches(&circ, &matches)
     }
 
     fn get_all_rewrites(&self, h: &H) -> Vec<CircuitRewrite> {
         let circ = Circuit::new(h);
-        let circ_ref = &circ;
         let matches = self.matcher.find_matches(&circ);
-        matches
-            .into_iter()
-            .flat_map(|m| {
-                let pattern_id = m.pattern_id();
-                self.get_targets(pattern_id).map(move |repl| {
-                    let mut repl = repl.to_owned();
-                    for &empty_qb in self.empty_wires[pattern_id.0].iter().rev() {
-                        remove_empty_wire(&mut repl, empty_qb).unwrap();
-                    }
-                    m.to_rewrite(circ_ref, repl).expect("invalid replacement")
-                })
-            })
-            .collect()
+        self.get_rewrites_from_matches(&circ, &matches)
     }
 }
 
@@ -278,6 +296,21 @@ pub enum RewriterSerialisationError {
     /// An error occurred while resolving the extension ops
     /// in the deserialised rewrite set.
     ExtensionResolutionError(ExtensionResolutionError),
+    /// A target circuit could not be encoded.
+    #[display("Envelope error: {_0}")]
+    Envelope(EnvelopeError),
+    /// The file is not a valid memory-mappable rewriter.
+    #[display("Invalid memory-mapped rewriter file")]
+    #[from(ignore)]
+    InvalidMappedFile,
+    /// The memory-mappable rewriter was written with an unsupported format
+    /// version.
+    #[display("Unsupported memory-mapped rewriter format version {version}")]
+    #[from(ignore)]
+    UnsupportedVersion {
+        /// The version found in the file.
+        version: u32,
+    },
 }
 
 fn into_targets(rep_sets: Vec<EqCircClass>) -> Vec<Hugr> {
@@ -482,4 +515,33 @@ mod tests {
         assert_eq!(rewriter.rewrite_rules, loaded_rewriter.rewrite_rules);
         assert_eq!(rewriter.empty_wires, loaded_rewriter.empty_wires);
     }
+
+    #[test]
+    #[cfg(feature = "binary-eccs")]
+    fn ecc_mapped_file_roundtrip() {
+        let ecc1 = EqCircClass::new(h_h(), vec![empty(), cx_cx()]);
+        let ecc2 = EqCircClass::new(cx_x(), vec![x_cx()]);
+        let rewriter = ECCRewriter::from_eccs([ecc1, ecc2]);
+
+        let path = std::env::temp_dir().join(format!("ecc-mapped-{}", std::process::id()));
+        let path = rewriter.save_mapped(path).unwrap();
+        // `load_binary` detects the mapped format.
+        let loaded_rewriter = ECCRewriter::load_binary(&path).unwrap();
+        assert!(matches!(loaded_rewriter.targets, Targets::Mapped(_)));
+
+        assert_eq!(
+            rewriter.matcher.n_patterns(),
+            loaded_rewriter.matcher.n_patterns()
+        );
+        assert_eq!(rewriter.targets, loaded_rewriter.targets);
+        assert_eq!(rewriter.rewrite_rules, loaded_rewriter.rewrite_rules);
+        assert_eq!(rewriter.empty_wires, loaded_rewriter.empty_wires);
+        assert_eq!(
+            rewriter.get_all_rewrites(&cx_x()).len(),
+            loaded_rewriter.get_all_rewrites(&cx_x()).len()
+        );
+
+        drop(loaded_rewriter);
+        std::fs::remove_file(path).unwrap();
+    }
 }
@@ -0,0 +1,178 @@
+//! An uncompressed, memory-mappable file format for [`ECCRewriter`]s.
+//!
+//! The file starts with a fixed-size header, followed by an index and the
+//! target circuits:
+//!
+//! | Bytes         | Content                                               |
+//! |---------------|-------------------------------------------------------|
+//! | `0..8`        | The magic bytes `TKETRWRM`.                           |
+//! | `8..12`       | The format version, as a little-endian `u32`.         |
+//! | `12..20`      | The length `n` of the index, as a little-endian `u64`. |
+//! | `20..20+n`    | The index, encoded as MessagePack.                    |
+//! | `20+n..`      | The target circuits, as binary HUGR envelopes.        |
+//!
+//! The index contains the pattern matcher, the rewrite rules and the byte
+//! range of each target circuit. Loading a rewriter only decodes the index;
+//! target circuits are decoded from the mapping the first time they are used.
+//! Processes loading the same file share the pages of the mapping.
+
+use std::fs::File;
+use std::io::{self, Write};
+use std::path::{Path, PathBuf};
+use std::sync::Arc;
+
+use hugr::envelope::EnvelopeConfig;
+
+use super::targets::{MappedTargets, Targets};
+use super::{ECCRewriter, RewriterSerialisationError, TargetID};
+use crate::portmatching::PatternMatcher;
+
+/// Magic bytes at the start of a mapped rewriter file.
+pub(super) const MAGIC: &[u8; 8] = b"TKETRWRM";
+
+/// The current version of the mapped file format.
+const FORMAT_VERSION: u32 = 1;
+
+/// The size of the fixed header, in bytes.
+const HEADER_LEN: usize = 20;
+
+/// The index of a mapped rewriter file, as written.
+#[derive(serde::Serialize)]
+struct IndexRef<'a> {
+    matcher: &'a PatternMatcher,
+    rewrite_rules: &'a [Vec<TargetID>],
+    empty_wires: &'a [Vec<usize>],
+    /// Offset and length of each target, relative to the end of the index.
+    target_ranges: Vec<(u64, u64)>,
+}
+
+/// The index of a mapped rewriter file, as read.
+#[derive(serde::Deserialize)]
+struct Index {
+    matcher: PatternMatcher,
+    rewrite_rules: Vec<Vec<TargetID>>,
+    empty_wires: Vec<Vec<usize>>,
+    target_ranges: Vec<(u64, u64)>,
+}
+
+impl ECCRewriter {
+    /// Serialise a rewriter in the memory-mappable format to an IO stream.
+    ///
+    /// Streams written this way can be saved to a file and loaded with
+    /// [`ECCRewriter::load_mapped`].
+    pub fn save_mapped_io<W: io::Write>(
+        &self,
+        mut writer: W,
+    ) -> Result<(), RewriterSerialisationError> {
+        // Envelopes record their own format, so files written with other
+        // envelope configurations remain readable.
+        let targets = (0..self.targets.len())
+            .map(|i| {
+                let mut bytes = Vec::new();
+                self.targets
+                    .get(i)
+                    .store(&mut bytes, EnvelopeConfig::binary())?;
+                Ok(bytes)
+            })
+            .collect::<Result<Vec<_>, RewriterSerialisationError>>()?;
+        let mut offset = 0;
+        let target_ranges = targets
+            .iter()
+            .map(|t| {
+                let range = (offset, t.len() as u64);
+                offset += t.len() as u64;
+                range
+            })
+            .collect();
+        let index = rmp_serde::encode::to_vec(&IndexRef {
+            matcher: &self.matcher,
+            rewrite_rules: &self.rewrite_rules,
+            empty_wires: &self.empty_wires,
+            target_ranges,
+        })?;
+
+        writer.write_all(MAGIC)?;
+        writer.write_all(&FORMAT_VERSION.to_le_bytes())?;
+        writer.write_all(&(index.len() as u64).to_le_bytes())?;
+        writer.write_all(&index)?;
+        for target in targets {
+            writer.write_all(&target)?;
+        }
+        writer.flush()?;
+        Ok(())
+    }
+
+    /// Save a rewriter in the memory-mappable format.
+    ///
+    /// The file is larger than the one written by
+    /// [`ECCRewriter::save_binary`], as it is not compressed, but loads much
+    /// faster. It can be loaded with [`ECCRewriter::load_mapped`] or
+    /// [`ECCRewriter::load_binary`].
+    ///
+    /// The extension of the file name will always be set or amended to be
+    /// `.rwr`.
+    ///
+    /// If successful, returns the path to the newly created file.
+    pub fn save_mapped(
+        &self,
+        name: impl AsRef<Path>,
+    ) -> Result<PathBuf, RewriterSerialisationError> {
+        let mut file_name = PathBuf::from(name.as_ref());
+        file_name.set_extension("rwr");
+        let file = File::create(&file_name)?;
+        self.save_mapped_io(io::BufWriter::new(file))?;
+        Ok(file_name)
+    }
+
+    /// Load a rewriter saved with [`ECCRewriter::save_mapped`] by memory
+    /// mapping the file.
+    ///
+    /// Only the pattern matcher is decoded eagerly. Target circuits are
+    /// decoded from the mapping the first time a rewrite produces them.
+    ///
+    /// The file must not be modified while the rewriter, or any of its
+    /// clones, is alive.
+    pub fn load_mapped(name: impl AsRef<Path>) -> Result<Self, RewriterSerialisationError> {
+        let file = File::open(name)?;
+        // SAFETY: Modifying the file while it is mapped is undefined
+        // behaviour. Rewriter files are written once and then only read, as
+        // documented above.
+        let mmap = unsafe { memmap2::Mmap::map(&file)? };
+        Self::from_mapping(Arc::new(mmap))
+    }
+
+    /// Decode the index of a mapped rewriter file.
+    fn from_mapping(mmap: Arc<memmap2::Mmap>) -> Result<Self, RewriterSerialisationError> {
+        if mmap.len() < HEADER_LEN || &mmap[..MAGIC.len()] != MAGIC {
+            return Err(RewriterSerialisationError::InvalidMappedFile);
+        }
+        let version = u32::from_le_bytes(mmap[8..12].try_into().unwrap());
+        if version != FORMAT_VERSION {
+            return Err(RewriterSerialisationError::UnsupportedVersion { version });
+        }
+        let index_len = u64::from_le_bytes(mmap[12..20].try_into().unwrap()) as usize;
+        let data_start = HEADER_LEN
+            .checked_add(index_len)
+            .filter(|&end| end <= mmap.len())
+            .ok_or(RewriterSerialisationError::InvalidMappedFile)?;
+
+        let index: Index = rmp_serde::decode::from_slice(&mmap[HEADER_LEN..data_start])?;
+        let ranges = index
+            .target_ranges
+            .iter()
+            .map(|&(offset, len)| {
+                let start = data_start.checked_add(offset as usize)?;
+                let end = start.checked_add(len as usize)?;
+                (end <= mmap.len()).then_some(start..end)
+            })
+            .collect::<Option<Vec<_>>>()
+            .ok_or(RewriterSerialisationError::InvalidMappedFile)?;
+
+        Ok(Self {
+            matcher: index.matcher,
+            targets: Targets::Mapped(MappedTargets::new(mmap, ranges)),
+            rewrite_rules: index.rewrite_rules,
+            empty_wires: index.empty_wires,
+        })
+    }
+}
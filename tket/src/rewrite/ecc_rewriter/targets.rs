@@ -0,0 +1,118 @@
+//! Storage for the replacement circuits of an [`ECCRewriter`](super::ECCRewriter).
+
+#[cfg(feature = "binary-eccs")]
+use std::ops::Range;
+#[cfg(feature = "binary-eccs")]
+use std::sync::{Arc, OnceLock};
+
+use hugr::extension::resolution::ExtensionResolutionError;
+use hugr::Hugr;
+use serde_with::ser::SerializeAsWrap;
+use serde_with::As;
+
+use crate::extension::REGISTRY;
+use crate::serialize::AsStringTk2Envelope;
+
+/// The target circuits of the rewrite rules.
+#[derive(Debug, Clone)]
+pub(super) enum Targets {
+    /// Targets held in memory.
+    Owned(Vec<Hugr>),
+    /// Targets decoded on first use from a memory-mapped rewriter file.
+    #[cfg(feature = "binary-eccs")]
+    Mapped(MappedTargets),
+}
+
+/// Target circuits stored as binary envelopes in a memory-mapped file.
+#[cfg(feature = "binary-eccs")]
+#[derive(Debug, Clone)]
+pub(super) struct MappedTargets {
+    /// The mapped rewriter file, shared between clones of the rewriter.
+    mmap: Arc<memmap2::Mmap>,
+    /// The byte range of each encoded target in the mapping.
+    ranges: Vec<Range<usize>>,
+    /// The targets decoded so far.
+    decoded: Vec<OnceLock<Hugr>>,
+}
+
+#[cfg(feature = "binary-eccs")]
+impl MappedTargets {
+    /// Targets stored at the given byte ranges of `mmap`.
+    ///
+    /// The ranges must be within the mapping.
+    pub(super) fn new(mmap: Arc<memmap2::Mmap>, ranges: Vec<Range<usize>>) -> Self {
+        let decoded = ranges.iter().map(|_| OnceLock::new()).collect();
+        Self {
+            mmap,
+            ranges,
+            decoded,
+        }
+    }
+}
+
+impl Targets {
+    /// The `i`-th target circuit.
+    ///
+    /// # Panics
+    ///
+    /// If the target is stored in a memory-mapped file and cannot be decoded.
+    pub(super) fn get(&self, i: usize) -> &Hugr {
+        match self {
+            Self::Owned(targets) => &targets[i],
+            #[cfg(feature = "binary-eccs")]
+            Self::Mapped(m) => m.decoded[i].get_or_init(|| {
+                let bytes = &m.mmap[m.ranges[i].clone()];
+                Hugr::load(bytes, Some(&REGISTRY))
+                    .unwrap_or_else(|e| panic!("Corrupted target {i} in mapped rewriter: {e}"))
+            }),
+        }
+    }
+
+    /// The number of target circuits.
+    pub(super) fn len(&self) -> usize {
+        match self {
+            Self::Owned(targets) => targets.len(),
+            #[cfg(feature = "binary-eccs")]
+            Self::Mapped(m) => m.ranges.len(),
+        }
+    }
+
+    /// Resolve the extension operations in the targets held in memory.
+    ///
+    /// Mapped targets are resolved when they are decoded.
+    pub(super) fn resolve_extension_defs(&mut self) -> Result<(), ExtensionResolutionError> {
+        match self {
+            Self::Owned(targets) => targets
+                .iter_mut()
+                .try_for_each(|hugr| hugr.resolve_extension_defs(&REGISTRY)),
+            #[cfg(feature = "binary-eccs")]
+            Self::Mapped(_) => Ok(()),
+        }
+    }
+}
+
+impl PartialEq for Targets {
+    fn eq(&self, other: &Self) -> bool {
+        self.len() == other.len() && (0..self.len()).all(|i| self.get(i) == other.get(i))
+    }
+}
+
+impl From<Vec<Hugr>> for Targets {
+    fn from(targets: Vec<Hugr>) -> Self {
+        Self::Owned(targets)
+    }
+}
+
+impl serde::Serialize for Targets {
+    fn serialize<S: serde::Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        serializer.collect_seq(
+            (0..self.len()).map(|i| SerializeAsWrap::<Hugr, AsStringTk2Envelope>::new(self.get(i))),
+        )
+    }
+}
+
+impl<'de> serde::Deserialize<'de> for Targets {
+    fn deserialize<D: serde::Deserializer<'de>>(deserializer: D) -> Result<Self, D::Error> {
+        As::<Vec<AsStringTk2Envelope>>::deserialize(deserializer).map(Self::Owned)
+    }
+}
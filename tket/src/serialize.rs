@@ -1,7 +1,9 @@
 //! Utilities for serializing circuits.
 //!
-//! See [`crate::serialize::pytket`] for serialization to and from the legacy pytket format.
+//! See [`crate::serialize::pytket`] for serialization to and from the legacy pytket format,
+//! and [`crate::serialize::stream`] for streams of circuits.
 pub mod pytket;
+pub mod stream;
 
 use derive_more::derive::Into;
 use hugr::envelope::serde_with::impl_serde_as_string_envelope;
@@ -16,6 +18,7 @@ pub use pytket::{
     load_tk1_json_file, load_tk1_json_reader, load_tk1_json_str, save_tk1_json_file,
     save_tk1_json_str, save_tk1_json_writer, TKETDecode,
 };
+pub use stream::{CircuitStreamError, CircuitStreamReader, CircuitStreamWriter};
 
 use derive_more::{Display, Error, From};
 use hugr::ops::{OpTag, OpTrait, OpType};
@@ -0,0 +1,507 @@
+//! Streams of circuits, stored as a sequence of HUGR envelopes.
+//!
+//! A circuit stream starts with a fixed-size header, followed by any number of
+//! records:
+//!
+//! | Bytes       | Content                                       |
+//! |-------------|-----------------------------------------------|
+//! | `0..8`      | The magic bytes `TKETCSTR`.                   |
+//! | `8..12`     | The format version, as a little-endian `u32`. |
+//!
+//! Each record is the length `n` of a HUGR envelope, as a little-endian `u64`,
+//! followed by the `n` bytes of the envelope. Records can be appended to an
+//! existing stream at any time, and readers only hold one record in memory at
+//! a time.
+
+use std::collections::HashMap;
+use std::fs::{File, OpenOptions};
+use std::io::{self, BufWriter, Read};
+use std::path::Path;
+
+use derive_more::{Display, Error, From};
+use hugr::envelope::{EnvelopeConfig, EnvelopeError};
+use hugr::hugr::hugrmut::HugrMut;
+use hugr::hugr::views::ExtractionResult;
+use hugr::ops::OpType;
+use hugr::package::Package;
+use hugr::{Hugr, HugrView, Node};
+
+use super::CircuitLoadError;
+use crate::extension::REGISTRY;
+use crate::Circuit;
+
+/// Magic bytes at the start of a circuit stream.
+pub const MAGIC: &[u8; 8] = b"TKETCSTR";
+
+/// The current version of the stream format.
+pub const FORMAT_VERSION: u32 = 1;
+
+/// The size of the fixed header, in bytes.
+pub const HEADER_LEN: usize = 12;
+
+/// Writes circuits to a stream, one envelope per record.
+#[derive(Debug)]
+pub struct CircuitStreamWriter<W> {
+    writer: W,
+    config: EnvelopeConfig,
+    /// Buffer for the envelope being written, reused between records.
+    buf: Vec<u8>,
+}
+
+impl<W: io::Write> CircuitStreamWriter<W> {
+    /// Start a new stream, writing its header.
+    pub fn new(mut writer: W, config: EnvelopeConfig) -> Result<Self, CircuitStreamError> {
+        writer.write_all(MAGIC)?;
+        writer.write_all(&FORMAT_VERSION.to_le_bytes())?;
+        Ok(Self::appending(writer, config))
+    }
+
+    /// Append records to an existing stream.
+    ///
+    /// The writer must be positioned at the end of a valid stream.
+    pub fn appending(writer: W, config: EnvelopeConfig) -> Self {
+        Self {
+            writer,
+            config,
+            buf: Vec::new(),
+        }
+    }
+
+    /// Write a circuit as a new record.
+    pub fn write(&mut self, circ: &Circuit<impl HugrView>) -> Result<(), CircuitStreamError> {
+        self.buf.clear();
+        circ.store(&mut self.buf, self.config.clone())?;
+        self.writer
+            .write_all(&(self.buf.len() as u64).to_le_bytes())?;
+        self.writer.write_all(&self.buf)?;
+        Ok(())
+    }
+
+    /// Flush the underlying writer.
+    pub fn flush(&mut self) -> io::Result<()> {
+        self.writer.flush()
+    }
+
+    /// Return the underlying writer.
+    pub fn into_inner(self) -> W {
+        self.writer
+    }
+}
+
+impl CircuitStreamWriter<BufWriter<File>> {
+    /// Create a stream file, truncating it if it already exists.
+    pub fn create(
+        path: impl AsRef<Path>,
+        config: EnvelopeConfig,
+    ) -> Result<Self, CircuitStreamError> {
+        Self::new(BufWriter::new(File::create(path)?), config)
+    }
+
+    /// Open a stream file to append records to it.
+    ///
+    /// If the file does not exist or is empty, a new stream is started.
+    /// Otherwise the header of the existing stream is checked first.
+    pub fn open_append(
+        path: impl AsRef<Path>,
+        config: EnvelopeConfig,
+    ) -> Result<Self, CircuitStreamError> {
+        let mut file = OpenOptions::new()
+            .create(true)
+            .read(true)
+            .append(true)
+            .open(path)?;
+        if file.metadata()?.len() == 0 {
+            return Self::new(BufWriter::new(file), config);
+        }
+        let mut header = Vec::with_capacity(HEADER_LEN);
+        (&mut file)
+            .take(HEADER_LEN as u64)
+            .read_to_end(&mut header)?;
+        check_header(&header)?;
+        Ok(Self::appending(BufWriter::new(file), config))
+    }
+}
+
+/// Reads the circuits of a stream lazily, one record at a time.
+///
+/// Inputs that do not start with the stream header are read as a single HUGR
+/// envelope instead.
+///
+/// By default, each record yields the circuit at the entrypoint of its
+/// envelope. With [`CircuitStreamReader::with_split_functions`], each record
+/// instead yields one circuit per function definition in its modules. Each
+/// function is extracted into its own HUGR, along with the definitions it
+/// refers to.
+#[derive(Debug)]
+pub struct CircuitStreamReader<R> {
+    reader: R,
+    split_functions: bool,
+    /// Buffer for the envelope being read, reused between records.
+    buf: Vec<u8>,
+    /// The whole input, when it is a single envelope rather than a stream.
+    unframed: Option<Vec<u8>>,
+    /// Modules of the current record whose functions have not all been
+    /// yielded, in reverse order.
+    modules: Vec<Hugr>,
+    /// The functions of the last module in `modules` that have not been
+    /// yielded, in reverse order.
+    functions: Vec<Node>,
+}
+
+impl<R: io::Read> CircuitStreamReader<R> {
+    /// Start reading a stream, checking its header.
+    pub fn new(mut reader: R) -> Result<Self, CircuitStreamError> {
+        let mut header = Vec::with_capacity(HEADER_LEN);
+        (&mut reader)
+            .take(HEADER_LEN as u64)
+            .read_to_end(&mut header)?;
+        let unframed = if header.starts_with(MAGIC) {
+            check_header(&header)?;
+            None
+        } else {
+            reader.read_to_end(&mut header)?;
+            Some(header)
+        };
+        Ok(Self {
+            reader,
+            split_functions: false,
+            buf: Vec::new(),
+            unframed,
+            modules: Vec::new(),
+            functions: Vec::new(),
+        })
+    }
+
+    /// Yield one circuit per function definition, instead of one per record.
+    pub fn with_split_functions(mut self, split_functions: bool) -> Self {
+        self.split_functions = split_functions;
+        self
+    }
+
+    /// Read the next record into the buffer.
+    ///
+    /// Returns `false` at the end of the stream. A truncated length at the end
+    /// of the stream, as left by an interrupted writer, is ignored.
+    fn read_record(&mut self) -> Result<bool, CircuitStreamError> {
+        if let Some(envelope) = self.unframed.take() {
+            self.buf = envelope;
+            return Ok(true);
+        }
+        let mut len = [0; 8];
+        match self.reader.read_exact(&mut len) {
+            Ok(()) => {}
+            Err(e) if e.kind() == io::ErrorKind::UnexpectedEof => return Ok(false),
+            Err(e) => return Err(e.into()),
+        }
+        let len = u64::from_le_bytes(len);
+        self.buf.clear();
+        (&mut self.reader).take(len).read_to_end(&mut self.buf)?;
+        if self.buf.len() as u64 != len {
+            return Err(CircuitStreamError::TruncatedRecord);
+        }
+        Ok(true)
+    }
+
+    /// Decode the modules of the current record.
+    fn load_modules(&mut self) -> Result<(), CircuitStreamError> {
+        let pkg = Package::load(self.buf.as_slice(), Some(&REGISTRY))?;
+        pkg.validate().map_err(CircuitLoadError::from)?;
+        self.modules = pkg.modules;
+        self.modules.reverse();
+        self.functions = self.modules.last().map(functions).unwrap_or_default();
+        Ok(())
+    }
+
+    /// Yield the next function of the current record, if any.
+    fn next_function(&mut self) -> Option<Result<Circuit, CircuitStreamError>> {
+        while let Some(module) = self.modules.last() {
+            let Some(function) = self.functions.pop() else {
+                self.modules.pop();
+                self.functions = self.modules.last().map(functions).unwrap_or_default();
+                continue;
+            };
+            let hugr = extract_function(module, function);
+            return Some(Circuit::try_new(hugr).map_err(|e| CircuitLoadError::from(e).into()));
+        }
+        None
+    }
+}
+
+impl<R: io::Read> Iterator for CircuitStreamReader<R> {
+    type Item = Result<Circuit, CircuitStreamError>;
+
+    fn next(&mut self) -> Option<Self::Item> {
+        loop {
+            if let Some(circ) = self.next_function() {
+                return Some(circ);
+            }
+            match self.read_record() {
+                Ok(false) => return None,
+                Ok(true) if !self.split_functions => {
+                    return Some(Circuit::load(self.buf.as_slice(), None).map_err(Into::into))
+                }
+                Ok(true) => {
+                    if let Err(e) = self.load_modules() {
+                        return Some(Err(e));
+                    }
+                }
+                Err(e) => return Some(Err(e)),
+            }
+        }
+    }
+}
+
+/// Check the header of a stream.
+fn check_header(header: &[u8]) -> Result<(), CircuitStreamError> {
+    if header.len() < HEADER_LEN || !header.starts_with(MAGIC) {
+        return Err(CircuitStreamError::InvalidHeader);
+    }
+    let version = u32::from_le_bytes(header[MAGIC.len()..HEADER_LEN].try_into().unwrap());
+    if version != FORMAT_VERSION {
+        return Err(CircuitStreamError::UnsupportedVersion { version });
+    }
+    Ok(())
+}
+
+/// Extract a function definition into a module of its own, with the function
+/// as entrypoint.
+///
+/// The module-level definitions it refers to, such as the functions it calls,
+/// are extracted along with it. The rest of the module is not copied.
+fn extract_function(module: &Hugr, function: Node) -> Hugr {
+    let static_source = |node: Node| {
+        let port = module.get_optype(node).static_input_port()?;
+        module.single_linked_output(node, port)
+    };
+
+    // Collect the definitions the function depends on, transitively.
+    let mut definitions = vec![function];
+    let mut i = 0;
+    while let Some(&defn) = definitions.get(i) {
+        i += 1;
+        for node in module.descendants(defn) {
+            if let Some((src, _)) = static_source(node) {
+                if module.get_parent(src) == Some(module.module_root())
+                    && !definitions.contains(&src)
+                {
+                    definitions.push(src);
+                }
+            }
+        }
+    }
+
+    let (mut hugr, map) = module.extract_hugr(function);
+    let mut node_map: HashMap<Node, Node> = module
+        .descendants(function)
+        .map(|n| (n, map.extracted_node(n)))
+        .collect();
+    hugr.set_entrypoint(node_map[&function]);
+    for &defn in &definitions[1..] {
+        let (mut extracted, map) = module.extract_hugr(defn);
+        extracted.set_entrypoint(map.extracted_node(defn));
+        let inserted = hugr.insert_hugr(hugr.module_root(), extracted);
+        node_map.extend(
+            module
+                .descendants(defn)
+                .map(|n| (n, inserted.node_map[&map.extracted_node(n)])),
+        );
+    }
+
+    // Extraction drops the edges between different definitions.
+    for &defn in &definitions {
+        for node in module.descendants(defn) {
+            let Some((src, src_port)) = static_source(node) else {
+                continue;
+            };
+            let port = module.get_optype(node).static_input_port().unwrap();
+            let new_node = node_map[&node];
+            if !hugr.is_linked(new_node, port) {
+                hugr.connect(node_map[&src], src_port, new_node, port);
+            }
+        }
+    }
+    hugr
+}
+
+/// The function definitions at the root of a module, in reverse order.
+fn functions(module: &Hugr) -> Vec<Node> {
+    let mut functions = module
+        .children(module.module_root())
+        .filter(|&n| matches!(module.get_optype(n), OpType::FuncDefn(_)))
+        .collect::<Vec<_>>();
+    functions.reverse();
+    functions
+}
+
+/// Errors that can occur when reading or writing a circuit stream.
+#[derive(Debug, Display, Error, From)]
+#[non_exhaustive]
+pub enum CircuitStreamError {
+    /// An IO error occurred.
+    #[display("IO error: {_0}")]
+    #[from]
+    Io(io::Error),
+    /// The stream header is invalid.
+    #[display("Invalid circuit stream header.")]
+    InvalidHeader,
+    /// The stream was written with an unsupported version of the format.
+    #[display("Unsupported circuit stream version {version}.")]
+    UnsupportedVersion {
+        /// The version of the stream.
+        version: u32,
+    },
+    /// The stream ends in the middle of a record.
+    #[display("The circuit stream ends in the middle of a record.")]
+    TruncatedRecord,
+    /// A circuit could not be encoded or decoded.
+    #[display("{_0}")]
+    #[from]
+    Envelope(EnvelopeError),
+    /// A circuit could not be loaded from its envelope.
+    #[display("{_0}")]
+    #[from]
+    Load(CircuitLoadError),
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    use hugr::builder::{Dataflow, DataflowSubContainer, HugrBuilder, ModuleBuilder};
+    use hugr::extension::prelude::qb_t;
+    use hugr::types::Signature;
+    use itertools::Itertools;
+    use rstest::rstest;
+
+    use crate::circuit::CircuitHash;
+    use crate::utils::build_simple_circuit;
+    use crate::TketOp;
+
+    fn circuits() -> Vec<Circuit> {
+        (1..4)
+            .map(|n| {
+                build_simple_circuit(2, |circ| {
+                    for _ in 0..n {
+                        circ.append(TketOp::CX, [0, 1])?;
+                    }
+                    Ok(())
+                })
+                .unwrap()
+            })
+            .collect()
+    }
+
+    fn hashes<'a>(circs: impl IntoIterator<Item = &'a Circuit>) -> Vec<u64> {
+        circs
+            .into_iter()
+            .map(|c| c.circuit_hash(c.parent()).unwrap())
+            .collect()
+    }
+
+    #[rstest]
+    fn stream_roundtrip() {
+        let circs = circuits();
+        let mut writer = CircuitStreamWriter::new(Vec::new(), EnvelopeConfig::binary()).unwrap();
+        writer.write(&circs[0]).unwrap();
+        // Appending continues the same stream.
+        let mut writer =
+            CircuitStreamWriter::appending(writer.into_inner(), EnvelopeConfig::text());
+        for circ in &circs[1..] {
+            writer.write(circ).unwrap();
+        }
+        let mut bytes = writer.into_inner();
+
+        let read: Vec<Circuit> = CircuitStreamReader::new(bytes.as_slice())
+            .unwrap()
+            .try_collect()
+            .unwrap();
+        assert_eq!(hashes(&read), hashes(&circs));
+
+        // A truncated length is ignored, but not a truncated record.
+        bytes.extend_from_slice(&[3, 0]);
+        assert_eq!(
+            CircuitStreamReader::new(bytes.as_slice()).unwrap().count(),
+            3
+        );
+        // The record announces 3 bytes, but only 2 follow.
+        bytes.extend_from_slice(&[0; 6]);
+        bytes.extend_from_slice(&[0; 2]);
+        let last = CircuitStreamReader::new(bytes.as_slice()).unwrap().last();
+        assert!(matches!(
+            last,
+            Some(Err(CircuitStreamError::TruncatedRecord))
+        ));
+    }
+
+    #[rstest]
+    fn stream_split_functions() {
+        let mut module = ModuleBuilder::new();
+        let signature = Signature::new_endo(vec![qb_t()]);
+        let apple = module.define_function("apple", signature.clone()).unwrap();
+        let inputs = apple.input_wires().collect_vec();
+        let apple = apple.finish_with_outputs(inputs).unwrap();
+        // `banana` calls `apple`.
+        let mut banana = module.define_function("banana", signature).unwrap();
+        let inputs = banana.input_wires().collect_vec();
+        let call = banana.call(apple.handle(), &[], inputs).unwrap();
+        banana.finish_with_outputs(call.outputs()).unwrap();
+        let pkg = Package::from_hugr(module.finish_hugr().unwrap());
+        let mut envelope = Vec::new();
+        pkg.store(&mut envelope, EnvelopeConfig::binary()).unwrap();
+
+        // A bare envelope is read as a single record.
+        let circs: Vec<Circuit> = CircuitStreamReader::new(envelope.as_slice())
+            .unwrap()
+            .with_split_functions(true)
+            .try_collect()
+            .unwrap();
+        let names = circs.iter().map(|c| c.name().unwrap()).collect_vec();
+        assert_eq!(names, ["apple", "banana"]);
+
+        // Each function is extracted with the definitions it calls.
+        let definitions = circs
+            .iter()
+            .map(|c| c.hugr().children(c.hugr().module_root()).count())
+            .collect_vec();
+        assert_eq!(definitions, [1, 2]);
+        for circ in &circs {
+            circ.hugr().validate().unwrap();
+        }
+    }
+
+    #[rstest]
+    fn stream_open_append() {
+        let circs = circuits();
+        let path = std::env::temp_dir().join(format!("circuit-stream-{}", std::process::id()));
+
+        for circ in &circs {
+            let mut writer =
+                CircuitStreamWriter::open_append(&path, EnvelopeConfig::binary()).unwrap();
+            writer.write(circ).unwrap();
+            writer.flush().unwrap();
+        }
+        let read: Vec<Circuit> = CircuitStreamReader::new(File::open(&path).unwrap())
+            .unwrap()
+            .try_collect()
+            .unwrap();
+        assert_eq!(hashes(&read), hashes(&circs));
+
+        // Files that are not streams are not appended to.
+        std::fs::write(&path, b"not a stream").unwrap();
+        assert!(matches!(
+            CircuitStreamWriter::open_append(&path, EnvelopeConfig::binary()),
+            Err(CircuitStreamError::InvalidHeader)
+        ));
+        std::fs::remove_file(path).unwrap();
+    }
+
+    #[rstest]
+    fn stream_invalid_version() {
+        let mut bytes = MAGIC.to_vec();
+        bytes.extend_from_slice(&2u32.to_le_bytes());
+        assert!(matches!(
+            CircuitStreamReader::new(bytes.as_slice()),
+            Err(CircuitStreamError::UnsupportedVersion { version: 2 })
+        ));
+    }
+}